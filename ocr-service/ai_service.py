@@ -11,12 +11,17 @@ The service is designed to:
 
 import json
 import logging
-from typing import Optional
-
-from openai import OpenAI
+import time
+from typing import Dict, List, Optional, Tuple
 
+from circuit_breaker import CircuitOpenError
 from config import get_settings
+from deadline import DeadlineExceeded
+from lexicon import get_lexicon
+from matcher import similarity, trim_ocr_text
+from metrics import AI_CALL_SECONDS
 from models import AIVerificationResult
+from openai_pool import ModelCallPool
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,7 @@ PRAVILA:
 7. Uzmi u obzir uobičajene skraćenice, varijante i množinu (npr. "jaja" = "jaje", "jabuke" = "jabuka")
 8. Tekst može sadržavati dodatne informacije (cijene, težine, sastojke) - to je u redu
 9. Budi TOLERANTAN - ako postoji BILO KAKVA šansa da je to isti proizvod, prihvati ga
+10. Ako je uz artikal naveden RJEČNIK, navedeni oblici i brendovi su isti artikal
 
 KADA ODBITI:
 - Samo kada je OČIGLEDNO potpuno druga vrsta proizvoda
@@ -60,6 +66,64 @@ PRIMJERI:
 - Artikal: "jogurt", OCR: "jogrt vocni 150" → is_match: true, confidence: 0.85 (OCR greška ali jasno jogurt)"""
 
 
+# Appended to SYSTEM_PROMPT when several item checks are packed into one call
+BATCH_PROMPT_SUFFIX = """
+
+VIŠE PROVJERA ODJEDNOM:
+Ovaj put dobijaš VIŠE provjera. Svaka provjera ima broj (id), artikal i oznaku teksta sa cjenovnika (T1, T2, ...).
+Primijeni ista pravila na svaku provjeru nezavisno.
+
+U OVOM SLUČAJU ODGOVORI ISKLJUČIVO OVAKVIM JSON OBJEKTOM (tačno jedan element po id-u):
+{
+    "results": [
+        {"id": 1, "is_match": true/false, "confidence": 0.0-1.0, "reasoning": "Kratko objašnjenje"}
+    ]
+}"""
+
+# Compact prompt (AI_PROMPT_MODE=compact): the rules of SYSTEM_PROMPT in short,
+# fewer examples and both reply formats, as one system message for single and
+# batched calls, so it stays well under the full prompt even with the batch
+# suffix. The OCR text in the user message is trimmed and the reasoning short.
+COMPACT_SYSTEM_PROMPT = """Provjeravaš da li tekst sa cjenovnika (OCR, bosanski/hrvatski) odgovara artiklu sa liste za kupovinu.
+
+PRAVILA:
+- Semantičko podudaranje: sinonimi, množina, brendovi i podvrste artikla se podudaraju ("kruh" = "hljeb", "špageti" su tjestenina)
+- Toleriši OCR greške (o/a, i/l, rn/m, slova koja nedostaju)
+- Odbij samo očigledno drugu vrstu proizvoda; slična riječ nije dovoljna
+- "Rječnik:" uz artikal nabraja njegove oblike i brendove
+- Iz teksta su uklonjene cijene, težine i barkodovi
+
+PRIMJERI:
+- "mlijeko" / "Dukat svježe mlijeko" → true, 0.95
+- "jogurt" / "jogrt vocni" → true, 0.85
+- "sok" / "Cedevita narandža" → true, 0.80
+- "salama" / "Salata zelena kom" → false, 0.90
+- "kruh" / "Čokoladna torta" → false, 0.98
+
+ODGOVOR (JSON, reasoning najviše 10 riječi):
+{"is_match": true/false, "confidence": 0.0-1.0, "reasoning": "..."}
+Za više provjera (id, artikal, oznaka teksta T1, T2, ...) svaku ocijeni nezavisno, tačno jedan element po id-u:
+{"results": [{"id": 1, "is_match": true/false, "confidence": 0.0-1.0, "reasoning": "..."}]}"""
+
+# Shortest static prefix the provider caches; shorter prompts are never cached
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Output token budgets: the full prompt's free-form reasoning, and the compact
+# JSON verdict (about 30 tokens with a ten-word reasoning, with headroom for a
+# longer one). A reply cut off at the budget is asked again with the full budget.
+FULL_MAX_TOKENS = 250
+COMPACT_MAX_TOKENS = 120
+COMPACT_BATCH_TOKENS_PER_ITEM = 60
+COMPACT_BATCH_BASE_TOKENS = 30
+
+# Minimum local similarity for the fallback to report a match
+FALLBACK_MATCH_SCORE = 0.7
+
+# Output token budget for batched calls
+BATCH_TOKENS_PER_ITEM = 80
+BATCH_BASE_TOKENS = 50
+
+
 class AIVerificationService:
     """
     Service for AI-powered semantic verification of shopping items.
@@ -70,92 +134,310 @@ class AIVerificationService:
     
     def __init__(self):
         self.settings = get_settings()
-        self._client: Optional[OpenAI] = None
+        self.lexicon = get_lexicon()
+        self.compact = self.settings.ai_prompt_mode == "compact"
+        self._pool: Optional[ModelCallPool] = None
+        
+        # Token usage and latency of answered model calls
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_seconds = 0.0
     
     @property
-    def client(self) -> OpenAI:
+    def pool(self) -> ModelCallPool:
         """
-        Lazy initialization of OpenAI client.
+        Lazy initialization of the shared OpenAI client pool.
         Raises error if API key not configured.
         """
-        if self._client is None:
-            if not self.settings.openai_api_key:
+        if self._pool is None:
+            if not self.settings.openai_api_key and self.settings.ai_backend != "local":
                 raise ValueError(
                     "OpenAI API key not configured. "
                     "Set OPENAI_API_KEY environment variable."
                 )
-            self._client = OpenAI(api_key=self.settings.openai_api_key)
-        return self._client
+            self._pool = ModelCallPool(self.settings)
+        return self._pool
+    
+    def pool_stats(self) -> Optional[dict]:
+        """Connection pool and call queue counters, None before the first call."""
+        return self._pool.stats() if self._pool is not None else None
     
-    def verify_match(self, item_name: str, ocr_text: str) -> AIVerificationResult:
+    def usage_stats(self) -> dict:
+        """Prompt mode with average tokens and latency per answered model call."""
+        calls = max(1, self.calls)
+        return {
+            "prompt_mode": "compact" if self.compact else "full",
+            "calls": self.calls,
+            "avg_prompt_tokens": round(self.prompt_tokens / calls, 1),
+            "avg_cached_prompt_tokens": round(self.cached_prompt_tokens / calls, 1),
+            "avg_completion_tokens": round(self.completion_tokens / calls, 1),
+            "avg_latency_ms": round(self.latency_seconds / calls * 1000, 1),
+        }
+    
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+    
+    async def verify_match(
+        self, item_name: str, ocr_text: str, timeout: Optional[float] = None
+    ) -> AIVerificationResult:
         """
         Verify if OCR text semantically matches the shopping item.
         
         Args:
             item_name: Shopping list item name (e.g., "mlijeko")
             ocr_text: Text extracted from price tag via OCR
+            timeout: Seconds left in the request budget, None for no limit
             
         Returns:
             AIVerificationResult with match decision and confidence
             
         Raises:
-            ValueError: If AI service fails or returns invalid response
+            ValueError: If AI service fails, returns invalid response, the circuit is open
+                or the budget runs out
         """
         try:
             # Construct the user message
-            user_message = f"""Artikal sa liste: "{item_name}"
-
+            hint = self.lexicon.hint(item_name)
+            if self.compact:
+                system_prompt = COMPACT_SYSTEM_PROMPT
+                hint_line = f"Rječnik: {hint}\n" if hint else ""
+                text = trim_ocr_text(ocr_text, [item_name], self.lexicon)
+                user_message = f'Artikal: "{item_name}"\n{hint_line}Tekst: "{text}"'
+                max_tokens = COMPACT_MAX_TOKENS
+            else:
+                system_prompt = SYSTEM_PROMPT
+                hint_line = f"\nRječnik: {hint}\n" if hint else ""
+                user_message = f"""Artikal sa liste: "{item_name}"
+{hint_line}
 Tekst sa cjenovnika (OCR): "{ocr_text}"
 
 Da li se tekst sa cjenovnika SEMANTIČKI PODUDARA sa artiklom sa liste?"""
+                max_tokens = FULL_MAX_TOKENS
             
             logger.info(f"Verifying match: item='{item_name}', ocr_text='{ocr_text[:100]}...'")
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.settings.openai_model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.2,  # Slightly higher for more flexible matching
-                max_tokens=250,
-                response_format={"type": "json_object"}  # Enforce JSON response
+            # Call OpenAI API (awaited so the event loop keeps serving other requests)
+            result_json = await self._create_json(
+                timeout,
+                "single",
+                system_prompt,
+                user_message,
+                max_tokens,
+                FULL_MAX_TOKENS
             )
+            result = self._parse_result(result_json)
             
-            # Parse the response
-            result_text = response.choices[0].message.content
-            result_json = json.loads(result_text)
+            logger.info(
+                f"AI verification complete: match={result.is_match}, "
+                f"confidence={result.confidence:.2f}, reasoning='{result.reasoning}'"
+            )
             
-            # Validate and extract fields
-            is_match = bool(result_json.get("is_match", False))
-            confidence = float(result_json.get("confidence", 0.0))
-            reasoning = str(result_json.get("reasoning", "Nije moguće utvrditi."))
+            return result
             
-            # Clamp confidence to valid range
-            confidence = max(0.0, min(1.0, confidence))
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # Expected while OpenAI is down or slow, the caller falls back locally
+            raise ValueError(str(e))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse AI response as JSON: {e}")
+            raise ValueError("AI returned invalid response format")
+        except Exception as e:
+            logger.error(f"AI verification failed: {e}")
+            raise ValueError(f"AI verification failed: {str(e)}")
+    
+    async def verify_matches(
+        self, pairs: List[Tuple[str, str]], timeout: Optional[float] = None
+    ) -> List[Optional[AIVerificationResult]]:
+        """
+        Verify several (item_name, ocr_text) pairs with a single model call.
+        
+        Identical OCR texts are sent once and referenced by label, so one shelf
+        photo checked against many items costs one copy of its text.
+        
+        Args:
+            pairs: (item_name, ocr_text) pairs to check
+            timeout: Seconds left in the request budget, None for no limit
             
-            logger.info(
-                f"AI verification complete: match={is_match}, "
-                f"confidence={confidence:.2f}, reasoning='{reasoning}'"
+        Returns:
+            Results in the same order as pairs; None where the model skipped a pair
+            
+        Raises:
+            ValueError: If AI service fails, returns invalid response, the circuit is open
+                or the budget runs out
+        """
+        try:
+            text_labels: Dict[str, str] = {}
+            for _, ocr_text in pairs:
+                if ocr_text not in text_labels:
+                    text_labels[ocr_text] = f"T{len(text_labels) + 1}"
+            
+            check_lines = "\n".join(
+                self._check_line(i, item_name, text_labels[ocr_text])
+                for i, (item_name, ocr_text) in enumerate(pairs, 1)
             )
+            if self.compact:
+                # Each text is trimmed against all items checked against it
+                items_by_text: Dict[str, List[str]] = {}
+                for item_name, ocr_text in pairs:
+                    items_by_text.setdefault(ocr_text, []).append(item_name)
+                text_lines = "\n".join(
+                    f'[{label}] "{trim_ocr_text(text, items_by_text[text], self.lexicon)}"'
+                    for text, label in text_labels.items()
+                )
+                system_prompt = COMPACT_SYSTEM_PROMPT
+                user_message = f"Tekstovi:\n{text_lines}\nProvjere:\n{check_lines}"
+                max_tokens = COMPACT_BATCH_BASE_TOKENS + COMPACT_BATCH_TOKENS_PER_ITEM * len(pairs)
+            else:
+                text_lines = "\n".join(f'[{label}] "{text}"' for text, label in text_labels.items())
+                system_prompt = SYSTEM_PROMPT + BATCH_PROMPT_SUFFIX
+                user_message = f"""Tekstovi sa cjenovnika (OCR):
+{text_lines}
+
+Provjere:
+{check_lines}
+
+Za svaku provjeru: da li se tekst sa cjenovnika SEMANTIČKI PODUDARA sa artiklom sa liste?"""
+                max_tokens = BATCH_BASE_TOKENS + BATCH_TOKENS_PER_ITEM * len(pairs)
             
-            return AIVerificationResult(
-                is_match=is_match,
-                confidence=confidence,
-                reasoning=reasoning
+            logger.info(f"Verifying {len(pairs)} matches in one call ({len(text_labels)} distinct texts)")
+            
+            result_json = await self._create_json(
+                timeout,
+                "batch",
+                system_prompt,
+                user_message,
+                max_tokens,
+                BATCH_BASE_TOKENS + BATCH_TOKENS_PER_ITEM * len(pairs)
             )
             
+            results: List[Optional[AIVerificationResult]] = [None] * len(pairs)
+            for entry in result_json.get("results", []):
+                try:
+                    index = int(entry.get("id")) - 1
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= index < len(pairs):
+                    results[index] = self._parse_result(entry)
+            
+            missing = sum(1 for r in results if r is None)
+            if missing:
+                logger.warning(f"AI batch response missing {missing} of {len(pairs)} results")
+            
+            return results
+            
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # Expected while OpenAI is down or slow, the caller falls back locally
+            raise ValueError(str(e))
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI response as JSON: {e}")
+            logger.error(f"Failed to parse AI batch response as JSON: {e}")
             raise ValueError("AI returned invalid response format")
         except Exception as e:
-            logger.error(f"AI verification failed: {e}")
+            logger.error(f"AI batch verification failed: {e}")
             raise ValueError(f"AI verification failed: {str(e)}")
     
+    async def _create_json(
+        self,
+        timeout: Optional[float],
+        kind: str,
+        system_prompt: str,
+        user_message: str,
+        max_tokens: int,
+        retry_max_tokens: int
+    ) -> dict:
+        """
+        JSON reply of one model call. A reply cut off at max_tokens is not valid
+        JSON; it is asked once more with retry_max_tokens, within the same budget.
+        """
+        start = time.perf_counter()
+        while True:
+            response = await self._create(
+                timeout,
+                kind,
+                model=self.settings.openai_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.2,  # Slightly higher for more flexible matching
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}  # Enforce JSON response
+            )
+            choice = response.choices[0]
+            if getattr(choice, "finish_reason", None) != "length" or max_tokens >= retry_max_tokens:
+                return json.loads(choice.message.content)
+            
+            logger.warning(f"AI {kind} reply truncated at {max_tokens} tokens, asking again with {retry_max_tokens}")
+            max_tokens = retry_max_tokens
+            if timeout is not None:
+                timeout -= time.perf_counter() - start
+                if timeout <= 0:
+                    raise DeadlineExceeded("AI verification", time.perf_counter() - start)
+    
+    async def _create(self, timeout: Optional[float], kind: str, **kwargs):
+        """
+        Model call, bounded and hedged when the request has a budget.
+        kind ("single" or "batch") labels the call's latency metric.
+        """
+        start = time.perf_counter()
+        try:
+            if timeout is None:
+                response = await self.pool.create(**kwargs)
+            else:
+                response = await self.pool.create_within(timeout, **kwargs)
+        except Exception:
+            AI_CALL_SECONDS.labels(kind, "error").observe(time.perf_counter() - start)
+            raise
+        AI_CALL_SECONDS.labels(kind, "ok").observe(time.perf_counter() - start)
+        self._record_usage(response, time.perf_counter() - start)
+        return response
+    
+    def _record_usage(self, response, elapsed: float) -> None:
+        """Count the call's tokens (cached prefix tokens separately) and latency."""
+        self.calls += 1
+        self.latency_seconds += elapsed
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        self.prompt_tokens += usage.prompt_tokens
+        self.cached_prompt_tokens += cached
+        self.completion_tokens += usage.completion_tokens
+        logger.info(
+            f"AI call: {usage.prompt_tokens} prompt tokens ({cached} cached), "
+            f"{usage.completion_tokens} completion tokens, {elapsed * 1000:.0f} ms"
+        )
+    
+    def _check_line(self, index: int, item_name: str, text_label: str) -> str:
+        """One numbered check of a batch prompt, with the lexicon hint if any."""
+        line = f'{index}. Artikal: "{item_name}" → tekst {text_label}'
+        hint = self.lexicon.hint(item_name)
+        return f"{line} (rječnik: {hint})" if hint else line
+    
+    def _parse_result(self, result_json: dict) -> AIVerificationResult:
+        """
+        Validate and extract fields from one JSON verdict.
+        """
+        is_match = bool(result_json.get("is_match", False))
+        confidence = float(result_json.get("confidence", 0.0))
+        reasoning = str(result_json.get("reasoning", "Nije moguće utvrditi."))
+        
+        # Clamp confidence to valid range
+        confidence = max(0.0, min(1.0, confidence))
+        
+        return AIVerificationResult(
+            is_match=is_match,
+            confidence=confidence,
+            reasoning=reasoning
+        )
+    
     def verify_match_fallback(self, item_name: str, ocr_text: str) -> AIVerificationResult:
         """
-        Fallback verification using fuzzy keyword matching.
+        Fallback verification using the local similarity engine.
         
         Used when AI service is unavailable or fails.
         More lenient to handle OCR errors.
@@ -165,57 +447,27 @@ Da li se tekst sa cjenovnika SEMANTIČKI PODUDARA sa artiklom sa liste?"""
             ocr_text: Text extracted from price tag
             
         Returns:
-            AIVerificationResult based on fuzzy keyword matching
+            AIVerificationResult based on token similarity
         """
         logger.warning("Using fallback verification (AI service unavailable)")
         
-        # Normalize text for comparison
-        item_lower = item_name.lower().strip()
-        ocr_lower = ocr_text.lower()
-        
-        # Simple substring matching (exact)
-        is_match = item_lower in ocr_lower
+        # Precompiled similarity engine: folded tokens, trigram index and
+        # confusion-aware edit distance against every OCR token in one pass
+        score = similarity(item_name, ocr_text, self.lexicon)
         
-        if is_match:
-            # Check if it's a word boundary match
-            import re
-            pattern = r'\b' + re.escape(item_lower) + r'\b'
-            if re.search(pattern, ocr_lower):
-                confidence = 0.85
-                reasoning = f"Pronađeno tačno podudaranje: '{item_name}' u tekstu."
-            else:
-                confidence = 0.7
-                reasoning = f"Pronađeno djelomično podudaranje: '{item_name}' u tekstu."
+        if score >= 1.0:
+            is_match = True
+            confidence = 0.85
+            reasoning = f"Pronađeno tačno podudaranje: '{item_name}' u tekstu."
+        elif score >= FALLBACK_MATCH_SCORE:
+            # Close enough to be the same word with OCR errors
+            is_match = True
+            confidence = 0.6 + (score * 0.2)
+            reasoning = f"Pronađeno podudaranje sa OCR greškama: '{item_name}' (~{score*100:.0f}% sličnost)."
         else:
-            # Try fuzzy matching for OCR errors
-            # Check if most characters match
-            import re
-            words = ocr_text.split()
-            best_match_ratio = 0.0
-            
-            for word in words:
-                word_lower = word.lower()
-                # Remove special chars for comparison
-                word_clean = re.sub(r'[^a-z0-9čćđšž]', '', word_lower)
-                item_clean = re.sub(r'[^a-z0-9čćđšž]', '', item_lower)
-                
-                if len(word_clean) < 3 or len(item_clean) < 3:
-                    continue
-                
-                # Calculate similarity (simple character overlap)
-                matches = sum(1 for c in item_clean if c in word_clean)
-                ratio = matches / len(item_clean)
-                best_match_ratio = max(best_match_ratio, ratio)
-            
-            # If 70%+ characters match, consider it a match (OCR errors)
-            if best_match_ratio >= 0.7:
-                is_match = True
-                confidence = 0.6 + (best_match_ratio * 0.2)
-                reasoning = f"Pronađeno podudaranje sa OCR greškama: '{item_name}' (~{best_match_ratio*100:.0f}% sličnost)."
-            else:
-                is_match = False
-                confidence = 0.5
-                reasoning = f"Artikal '{item_name}' nije pronađen u tekstu sa cjenovnika."
+            is_match = False
+            confidence = 0.5
+            reasoning = f"Artikal '{item_name}' nije pronađen u tekstu sa cjenovnika."
         
         return AIVerificationResult(
             is_match=is_match,
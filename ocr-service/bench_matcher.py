@@ -0,0 +1,187 @@
+"""
+Accuracy and speed benchmark for the local fallback matcher.
+Compares the original character-overlap fallback with the similarity engine
+in matcher.py (with and without the lexicon) on a labelled set of item / OCR
+text pairs.
+
+Usage:
+    python bench_matcher.py [--runs 200]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ai_service import FALLBACK_MATCH_SCORE
+from lexicon import get_lexicon
+from matcher import compile_text, similarity
+
+# (item name, OCR text, expected match)
+CASES = [
+    # Clean text
+    ("mlijeko", "Dukat svježe mlijeko 2.8% 1L 2,49 KM", True),
+    ("sir", "Mladi sir 250g 4,99 KM", True),
+    ("jogurt", "Meggle jogurt voćni 150g", True),
+    ("jaja", "Jaja M 10 kom 3,20 KM", True),
+    ("čokolada", "Milka čokolada 100g", True),
+    ("kafa", "Zlatna džezva kafa 200g", True),
+    ("ulje", "Suncokretovo ulje 1L", True),
+    ("pivo", "Sarajevsko pivo 0,5L", True),
+    ("šećer", "Bijeli secer 1kg", True),
+    ("brašno", "Brasno T-500 5kg", True),
+    # OCR errors
+    ("mlijeko", "rnlijeko 2.8% 1L", True),
+    ("mlijeko", "MLIJEK0 SVJEZE", True),
+    ("mlijeko", "mli jeko 1L", True),
+    ("jogurt", "jogrt vocni 150", True),
+    ("jogurt", "jougrt 2,8%", True),
+    ("hljeb", "hleb bijeli 500g", True),
+    ("jabuke", "Zlatni delišes jabuka 1kg", True),
+    ("kruh", "Bijeli krub 500g", True),
+    ("pašteta", "Argeta pasteta 95g", True),
+    ("salama", "Pileca salarna 100g", True),
+    ("deterdžent", "Persil deterdzent 3L", True),
+    ("keks", "Plazma keks 300g", True),
+    # Synonyms, inflection and brands (lexicon)
+    ("kruh", "Bijeli hljeb 500g", True),
+    ("hljeb", "Domaći kruh 600g", True),
+    ("krompir", "Krumpir mladi 2kg", True),
+    ("čokoladica", "Snickers 50g", True),
+    ("pelene", "Pampers Active Baby 4", True),
+    ("kafa", "Jacobs kava mljevena", True),
+    # Different products
+    ("mlijeko", "Čokoladna torta 1,2kg", False),
+    ("kruh", "Čokoladna torta 1,2kg", False),
+    ("jogurt", "Suncokretovo ulje 1L", False),
+    ("sir", "Sok od jabuke 1L", False),
+    ("jaja", "Jabuke zlatni delišes", False),
+    ("kafa", "Kakao prah 100g", False),
+    ("pivo", "Pileća prsa 1kg", False),
+    ("ulje", "Ljuta paprika 500g", False),
+    ("šećer", "Sol morska 1kg", False),
+    ("riža", "Rižoto gljive gotovo jelo", False),
+    ("mlijeko", "Mlin kukuruzno brašno", False),
+    ("salama", "Salata zelena kom", False),
+    ("keks", "Kečap blagi 500g", False),
+    ("deterdžent", "Detelina med 500g", False),
+    ("banane", "Bademi pečeni 200g", False),
+    ("limun", "Lim za pečenje", False),
+    ("tuna", "Tuba pasta za zube", False),
+    ("med", "Medvjedić bombone", False),
+]
+
+# Typical extra shelf-tag text, appended for the long-text timing
+TAG_NOISE = (
+    " AKCIJA cijena za kg 12,99 KM ušteda 20% vrijedi do 31.10.2026 EAN 3850104"
+    " porez PDV uključen proizvođač Dukat d.d. Zagreb zemlja porijekla Hrvatska"
+)
+
+
+def legacy_fallback(item_name: str, ocr_text: str) -> bool:
+    """The original verify_match_fallback decision (character overlap per word)."""
+    item_lower = item_name.lower().strip()
+    ocr_lower = ocr_text.lower()
+
+    if item_lower in ocr_lower:
+        return True
+
+    words = ocr_text.split()
+    best_match_ratio = 0.0
+    for word in words:
+        word_clean = re.sub(r'[^a-z0-9čćđšž]', '', word.lower())
+        item_clean = re.sub(r'[^a-z0-9čćđšž]', '', item_lower)
+        if len(word_clean) < 3 or len(item_clean) < 3:
+            continue
+        matches = sum(1 for c in item_clean if c in word_clean)
+        best_match_ratio = max(best_match_ratio, matches / len(item_clean))
+
+    return best_match_ratio >= 0.7
+
+
+def engine_fallback(item_name: str, ocr_text: str) -> bool:
+    """The similarity engine decision used by verify_match_fallback."""
+    return similarity(item_name, ocr_text) >= FALLBACK_MATCH_SCORE
+
+
+def lexicon_fallback(item_name: str, ocr_text: str) -> bool:
+    """The similarity engine decision with the bundled lexicon."""
+    return similarity(item_name, ocr_text, get_lexicon()) >= FALLBACK_MATCH_SCORE
+
+
+def evaluate(func) -> dict:
+    true_positive = false_positive = false_negative = 0
+    errors = []
+    for item_name, ocr_text, expected in CASES:
+        predicted = func(item_name, ocr_text)
+        if predicted and expected:
+            true_positive += 1
+        elif predicted:
+            false_positive += 1
+            errors.append(f"false match: {item_name!r} ~ {ocr_text!r}")
+        elif expected:
+            false_negative += 1
+            errors.append(f"missed:      {item_name!r} ~ {ocr_text!r}")
+
+    correct = len(CASES) - false_positive - false_negative
+    return {
+        "accuracy": correct / len(CASES),
+        "false_positive": false_positive,
+        "false_negative": false_negative,
+        "errors": errors,
+    }
+
+
+def time_per_check_us(func, runs: int, clear_compiled: bool, suffix: str = "") -> float:
+    cases = [(item_name, ocr_text + suffix) for item_name, ocr_text, _ in CASES]
+    start = time.perf_counter()
+    for _ in range(runs):
+        if clear_compiled:
+            compile_text.cache_clear()
+        for item_name, ocr_text in cases:
+            func(item_name, ocr_text)
+    return (time.perf_counter() - start) / (runs * len(cases)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fallback matcher")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    positives = sum(1 for _, _, expected in CASES if expected)
+    print(f"Cases: {len(CASES)} ({positives} matches, {len(CASES) - positives} non-matches), "
+          f"runs: {args.runs}")
+
+    cases = [
+        ("legacy overlap", legacy_fallback, False),
+        ("engine (cold text)", engine_fallback, True),
+        ("engine (compiled text)", engine_fallback, False),
+        ("engine + lexicon", lexicon_fallback, False),
+    ]
+
+    # us/check: the tag text alone, and with typical extra shelf-tag text
+    print(f"\n{'matcher':<24}{'accuracy':>10}{'false +':>9}{'false -':>9}"
+          f"{'us short':>10}{'us long':>10}")
+    print("-" * 72)
+    reports = {}
+    for name, func, clear_compiled in cases:
+        report = evaluate(func)
+        reports[name] = report
+        short_us = time_per_check_us(func, args.runs, clear_compiled)
+        long_us = time_per_check_us(func, args.runs, clear_compiled, TAG_NOISE)
+        print(f"{name:<24}{report['accuracy']:>10.1%}{report['false_positive']:>9}"
+              f"{report['false_negative']:>9}{short_us:>10.1f}{long_us:>10.1f}")
+
+    for name in ("legacy overlap", "engine (compiled text)", "engine + lexicon"):
+        if reports[name]["errors"]:
+            print(f"\n{name} errors:")
+            for error in reports[name]["errors"]:
+                print(f"   {error}")
+
+
+if __name__ == "__main__":
+    main()
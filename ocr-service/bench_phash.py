@@ -0,0 +1,73 @@
+"""
+Near-duplicate hash benchmark on synthetic same-template price tags.
+
+For every pair tag_corpus.make_layout_pair builds a tag on a shelf, the same
+photo sent again (new sensor noise, re-encoded at 3/4 resolution) and a
+different product and price on the same template at the same spot. It prints
+the Hamming distances of both and, per threshold, how many copies the index
+would catch and how many different tags it would wrongly take for the first.
+
+A usable PHASH_MAX_DISTANCE is below the smallest different-tag distance.
+The 64-bit whole-frame hash is reported for comparison.
+
+Usage:
+    python bench_phash.py [--count 120] [--seed 7]
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_settings
+from phash_index import dhash, region_hash
+from preprocessing import load_image
+from tag_corpus import find_fonts, make_layout_pair
+from text_regions import find_text_regions
+
+THRESHOLDS = (2, 4, 6, 8, 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate hash distances on same-template tags")
+    parser.add_argument("--count", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    fonts = find_fonts()
+    hashes = {
+        "frame (64 bit)": lambda gray: dhash(gray, 8),
+        "text region (256 bit)": lambda gray: region_hash(
+            gray, find_text_regions(gray, settings.ocr_max_regions)
+        ),
+    }
+    copies = {name: [] for name in hashes}
+    different = {name: [] for name in hashes}
+    for index in range(args.count):
+        photo, copy, other = (
+            load_image(image, settings.ocr_max_dimension)
+            for image in make_layout_pair(index, args.seed, fonts)
+        )
+        for name, hash_of in hashes.items():
+            photo_hash = hash_of(photo)
+            copies[name].append((photo_hash ^ hash_of(copy)).bit_count())
+            different[name].append((photo_hash ^ hash_of(other)).bit_count())
+
+    print(f"{args.count} same-template pairs (seed {args.seed}), "
+          f"PHASH_MAX_DISTANCE={settings.phash_max_distance}")
+    for name in hashes:
+        print(f"\n{name}")
+        print(f"   copy distance:          median {statistics.median(copies[name]):.0f}, max {max(copies[name])}")
+        print(f"   different tag distance: median {statistics.median(different[name]):.0f}, min {min(different[name])}")
+        for threshold in THRESHOLDS:
+            caught = sum(distance <= threshold for distance in copies[name]) / args.count
+            false = sum(distance <= threshold for distance in different[name]) / args.count
+            print(f"   distance <= {threshold:>2}: copies caught {caught:>6.1%}, different tags matched {false:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Micro-benchmark for OCR image preprocessing.
+Compares the original PIL variant builder with the NumPy implementation,
+and full-resolution decoding with the reduced-scale JPEG decode path.
+
+Usage:
+    python bench_preprocessing.py [--runs 20] [--width 1200] [--height 900]
+"""
+
+import argparse
+import io
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from preprocessing import (
+    binarize_otsu_pil,
+    build_variants_numpy,
+    build_variants_pil,
+    load_image,
+    otsu_threshold,
+)
+
+PHONE_PHOTO_SIZE = (4032, 3024)  # 12 MP
+MAX_DIMENSION = 1200
+
+
+def make_test_image(width: int, height: int, seed: int = 42) -> Image.Image:
+    """Create a grayscale price-tag-like image with text and sensor noise."""
+    rng = random.Random(seed)
+    img = Image.new('L', (width, height), color=200)
+    draw = ImageDraw.Draw(img)
+
+    # Tag background and text lines
+    draw.rectangle((width // 8, height // 4, width * 7 // 8, height * 3 // 4), fill=240)
+    for i, line in enumerate(["BIJELI HLJEB 500g", "Dukat svježe mlijeko 1L", "2,50 KM"]):
+        draw.text((width // 6, height // 3 + i * 40), line, fill=20)
+
+    noise = np.random.default_rng(seed).normal(0, 12, (height, width))
+    pixels = np.clip(np.asarray(img, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+
+    # A soft glare gradient, as seen on shelf photos
+    pixels = np.clip(pixels + np.linspace(0, rng.randint(20, 50), width, dtype=np.float32), 0, 255)
+    return Image.fromarray(pixels.astype(np.uint8))
+
+
+def time_call(func, image: Image.Image, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def make_phone_jpeg() -> bytes:
+    """A 12 MP RGB JPEG with EXIF orientation, like a portrait phone photo."""
+    gray = make_test_image(*PHONE_PHOTO_SIZE)
+    photo = Image.merge('RGB', (gray, gray.point(lambda x: x * 0.9), gray))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    buffer = io.BytesIO()
+    photo.save(buffer, format='JPEG', quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def decode_full(image_bytes: bytes) -> Image.Image:
+    """Original decode path: full decode, LANCZOS on RGB, then grayscale."""
+    image = Image.open(io.BytesIO(image_bytes))
+    if max(image.size) > MAX_DIMENSION:
+        ratio = MAX_DIMENSION / max(image.size)
+        new_size = tuple(int(dim * ratio) for dim in image.size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    return image.convert('L')
+
+
+def decode_draft(image_bytes: bytes) -> Image.Image:
+    return load_image(image_bytes, MAX_DIMENSION)
+
+
+def _read_status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def peak_rss_growth_mb(func, image_bytes: bytes) -> float:
+    """
+    Peak RSS growth of one call (Linux only): resets the high-water mark,
+    runs the call and compares VmHWM with the RSS before the call.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        before = _read_status_kb("VmRSS")
+        func(image_bytes)
+        return (_read_status_kb("VmHWM") - before) / 1024
+    except OSError:
+        return float("nan")
+
+
+def bench_decode(runs: int) -> None:
+    image_bytes = make_phone_jpeg()
+    print(f"\nDecode {PHONE_PHOTO_SIZE[0]}x{PHONE_PHOTO_SIZE[1]} JPEG ({len(image_bytes) / 1024:.0f} KB) "
+          f"to max {MAX_DIMENSION}px:")
+    print(f"{'decoder':<22}{'mean ms':>10}{'min ms':>10}{'peak RSS':>12}")
+    print("-" * 54)
+
+    decoders = (("full + LANCZOS", decode_full), ("draft + EXIF", decode_draft))
+
+    # Each decoder measured in a fresh process so earlier allocations don't hide its peak
+    context = multiprocessing.get_context("spawn")
+    peak_rss = {}
+    for name, func in decoders:
+        with context.Pool(1) as pool:
+            peak_rss[name] = pool.apply(peak_rss_growth_mb, (func, image_bytes))
+
+    for name, func in decoders:
+        timings = time_call(func, image_bytes, runs)
+        rss_mb = peak_rss[name]
+        print(f"{name:<22}{statistics.mean(timings):>10.2f}{min(timings):>10.2f}{rss_mb:>9.1f} MB")
+
+    print(f"   Output size (draft + EXIF): {decode_draft(image_bytes).size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=900)
+    args = parser.parse_args()
+
+    gray = make_test_image(args.width, args.height)
+    print(f"Image: {args.width}x{args.height}, runs: {args.runs}")
+
+    # Warm up both paths once
+    build_variants_pil(gray)
+    build_variants_numpy(gray)
+
+    cases = [
+        ("pil", build_variants_pil),
+        ("numpy/otsu", lambda img: build_variants_numpy(img, "otsu")),
+        ("numpy/sauvola", lambda img: build_variants_numpy(img, "sauvola")),
+        ("numpy/otsu+stretch", lambda img: build_variants_numpy(img, "otsu", stretch=True)),
+    ]
+
+    baseline = None
+    print(f"\n{'variant builder':<22}{'mean ms':>10}{'min ms':>10}{'speedup':>10}")
+    print("-" * 52)
+    for name, func in cases:
+        timings = time_call(func, gray, args.runs)
+        mean = statistics.mean(timings)
+        if baseline is None:
+            baseline = mean
+        print(f"{name:<22}{mean:>10.2f}{min(timings):>10.2f}{baseline / mean:>9.1f}x")
+
+    # Output agreement between the two implementations
+    pil_enhanced, pil_binary = build_variants_pil(gray)
+    np_enhanced, np_binary = build_variants_numpy(gray)
+
+    pil_pixels = np.asarray(pil_enhanced, dtype=np.int16)
+    np_pixels = np.asarray(np_enhanced, dtype=np.int16)
+    max_diff = int(np.abs(pil_pixels - np_pixels).max())
+
+    binary_agreement = float(
+        (np.asarray(pil_binary.convert('L')) == np.asarray(np_binary.convert('L'))).mean()
+    )
+
+    # Otsu binarization alone: Python loop vs vectorized threshold
+    def binarize_vectorized(img: Image.Image) -> Image.Image:
+        threshold = otsu_threshold(img.histogram())
+        return img.point([255 if x > threshold else 0 for x in range(256)], mode='1')
+
+    loop_ms = statistics.mean(time_call(binarize_otsu_pil, pil_enhanced, args.runs))
+    vector_ms = statistics.mean(time_call(binarize_vectorized, pil_enhanced, args.runs))
+
+    print("\nAgreement with PIL path:")
+    print(f"   Enhanced max pixel difference: {max_diff}")
+    print(f"   Binary pixel agreement: {binary_agreement:.2%}")
+    print("\nOtsu binarization only:")
+    print(f"   Python loop: {loop_ms:.2f} ms")
+    print(f"   Vectorized:  {vector_ms:.2f} ms")
+
+    bench_decode(args.runs)
+
+
+if __name__ == "__main__":
+    main()
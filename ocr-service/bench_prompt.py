@@ -0,0 +1,161 @@
+"""
+Prompt size benchmark for the AI verification call.
+Compares the full prompt with the compact one (AI_PROMPT_MODE) on the
+labelled cases of bench_matcher.py, with typical shelf-tag noise appended.
+
+Offline it builds the exact messages each mode sends and counts their tokens
+(tiktoken when installed, otherwise estimated as UTF-8 bytes / 4), and whether
+the system prompt reaches the provider's prompt caching minimum. With --live
+it calls the configured OpenAI model and reports the provider's token usage,
+cached prefix tokens, latency per call and the accuracy of the verdicts on the
+labelled cases, single and batched.
+
+Usage:
+    python bench_prompt.py [--live] [--batch-size 10]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ai_service import PROMPT_CACHE_MIN_TOKENS, AIVerificationService
+from bench_matcher import CASES, TAG_NOISE
+
+MODES = ("full", "compact")
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """tiktoken's count for the model family if available, else a byte estimate."""
+    try:
+        import tiktoken
+    except ImportError:
+        return "estimated (bytes / 4)", lambda text: max(1, len(text.encode("utf-8")) // 4)
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "tiktoken o200k_base", lambda text: len(encoding.encode(text))
+
+
+class RecordingPool:
+    """Stands in for ModelCallPool offline: keeps the request, answers an empty verdict."""
+
+    def __init__(self):
+        self.requests: List[dict] = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        content = json.dumps({"is_match": False, "confidence": 0.0, "reasoning": "", "results": []})
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")
+        return SimpleNamespace(choices=[choice])
+
+    async def create_within(self, timeout: float, **kwargs):
+        return await self.create(**kwargs)
+
+
+def make_service(mode: str, live: bool) -> AIVerificationService:
+    service = AIVerificationService()
+    service.compact = mode == "compact"
+    if not live:
+        service._pool = RecordingPool()
+    return service
+
+
+async def run_checks(service: AIVerificationService, batch_size: int) -> Tuple[List[float], float, float]:
+    """
+    One single-item call per case, then the cases in batches.
+    Returns the single-call latencies and the share of correct single and batched verdicts.
+    """
+    cases = [(item_name, ocr_text + TAG_NOISE) for item_name, ocr_text, _ in CASES]
+    expected = [is_match for _, _, is_match in CASES]
+    latencies, single = [], []
+    for item_name, ocr_text in cases:
+        start = time.perf_counter()
+        single.append((await service.verify_match(item_name, ocr_text)).is_match)
+        latencies.append(time.perf_counter() - start)
+    batched = []
+    for i in range(0, len(cases), batch_size):
+        results = await service.verify_matches(cases[i:i + batch_size])
+        batched.extend(result is not None and result.is_match for result in results)
+
+    def accuracy(verdicts: List[bool]) -> float:
+        return sum(v == e for v, e in zip(verdicts, expected)) / len(expected)
+
+    return latencies, accuracy(single), accuracy(batched)
+
+
+def report_offline(batch_size: int) -> None:
+    # The recorded calls get empty answers; skip the "missing results" warnings
+    logging.disable(logging.WARNING)
+    method, count_tokens = token_counter()
+    print(f"Cases: {len(CASES)} single calls + batches of {batch_size}, tokens: {method}")
+    print(f"\n{'mode':<10}{'call':<8}{'prompt tok':>12}{'system tok':>12}{'max_tokens':>12}"
+          f"{'prefixes':>10}{'cacheable':>11}")
+    print("-" * 75)
+
+    for mode in MODES:
+        service = make_service(mode, live=False)
+        asyncio.run(run_checks(service, batch_size))
+        requests = service.pool.requests
+        for kind, selected in (
+            ("single", requests[:len(CASES)]),
+            ("batch", requests[len(CASES):]),
+        ):
+            prompt = [sum(count_tokens(m["content"]) for m in r["messages"]) for r in selected]
+            system = [count_tokens(r["messages"][0]["content"]) for r in selected]
+            prefixes = len({r["messages"][0]["content"] for r in selected})
+            max_tokens = statistics.mean(r["max_tokens"] for r in selected)
+            cacheable = "yes" if min(system) >= PROMPT_CACHE_MIN_TOKENS else "no"
+            print(f"{mode:<10}{kind:<8}{statistics.mean(prompt):>12.0f}{statistics.mean(system):>12.0f}"
+                  f"{max_tokens:>12.0f}{prefixes:>10}{cacheable:>11}")
+
+        all_prefixes = {r["messages"][0]["content"] for r in requests}
+        print(f"{'':<10}distinct system prompts across all calls: {len(all_prefixes)}")
+
+
+def report_live(batch_size: int) -> None:
+    print(f"Cases: {len(CASES)} single calls + batches of {batch_size}, live model calls")
+    print(f"\n{'mode':<10}{'calls':>6}{'prompt tok':>12}{'cached':>8}{'output tok':>12}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'acc':>8}{'batch acc':>11}")
+    print("-" * 85)
+
+    for mode in MODES:
+        service = make_service(mode, live=True)
+
+        async def run():
+            try:
+                return await run_checks(service, batch_size)
+            finally:
+                await service.close()
+
+        latencies, single_accuracy, batch_accuracy = asyncio.run(run())
+        latencies.sort()
+        stats = service.usage_stats()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{mode:<10}{stats['calls']:>6}{stats['avg_prompt_tokens']:>12.0f}"
+              f"{stats['avg_cached_prompt_tokens']:>8.0f}{stats['avg_completion_tokens']:>12.0f}"
+              f"{statistics.median(latencies) * 1000:>9.0f}{p95 * 1000:>9.0f}"
+              f"{single_accuracy:>8.1%}{batch_accuracy:>11.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI prompt size")
+    parser.add_argument("--live", action="store_true", help="Call the model (needs OPENAI_API_KEY)")
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.live:
+        report_live(args.batch_size)
+    else:
+        report_offline(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+End-to-end OCR benchmark on the synthetic price tag corpus (tag_corpus.py).
+
+Measures, per run:
+- latency of every pipeline stage: decode, resize, each preprocessing variant,
+  each Tesseract pass ("ocr:<variant>/psm<N>") and the local match
+- text region detection: share of the frame the crops cover and share of the
+  ground-truth tag inside them
+- whole-request latency, OCR passes and pixels read per request; with OCR_ADAPTIVE_STRATEGIES
+  the sequential run feeds a fresh strategy scheduler (no saved state) and the
+  throughput runs use the order it learned
+- throughput at several concurrency levels on the production executor
+- peak memory (RSS) of the sequential run and of the worker pool
+- accuracy: OCR text similarity to the ground truth, and local match
+  decisions for the tag's own item (should match) and another item (should not)
+
+Results are written as JSON; --compare prints the change against an earlier
+result file and --fail-on-regression exits with 1 when a metric got worse by
+more than --tolerance, so the suite can gate CI.
+
+Without a Tesseract installation the OCR passes and the throughput runs are
+skipped and matching runs on the ground-truth text, which still covers
+decode, preprocessing and the matcher.
+
+Usage:
+    python bench_suite.py [--count 40] [--seed 7] [--corpus corpus/]
+                          [--concurrency 1,2,4] [--output results.json]
+                          [--compare baseline.json] [--fail-on-regression]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Repeated runs over the same corpus must not be served by the near-duplicate index
+os.environ["PHASH_INDEX_SIZE"] = "0"
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from ai_service import FALLBACK_MATCH_SCORE
+from config import get_settings
+from lexicon import get_lexicon
+from matcher import similarity
+from ocr_service import OCRService, init_worker, process_image_in_worker
+from preprocessing import load_image
+from strategy_scheduler import StrategyScheduler
+from tag_corpus import TagSample, find_fonts, generate_corpus, load_corpus, save_corpus
+from text_regions import find_text_regions
+from timings import StageTimings
+
+# Metrics compared by --compare: (section, key, True if higher is better)
+COMPARED_METRICS = [
+    ("request", "mean_ms", False),
+    ("request", "p95_ms", False),
+    ("request", "ocr_passes_mean", False),
+    ("request", "ocr_pixels_mean", False),
+    ("regions", "pixel_fraction_mean", False),
+    ("regions", "tag_coverage_mean", True),
+    ("accuracy", "text_similarity_mean", True),
+    ("accuracy", "match_accuracy", True),
+    ("accuracy", "quality_rejection_rate", False),
+    ("memory", "sequential_peak_rss_mb", False),
+]
+
+
+def summarize(values_ms: List[float]) -> dict:
+    ordered = sorted(values_ms)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def _read_status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak_rss() -> bool:
+    """Reset the RSS high-water mark (Linux only). Returns False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak RSS of this process (since reset_peak_rss) or of the largest worker process."""
+    if children:
+        return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    try:
+        return _read_status_kb("VmHWM") / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def tesseract_available(service: OCRService) -> bool:
+    try:
+        service.backend.image_to_string(Image.new("L", (64, 32), 255), 6)
+        return True
+    except Exception:
+        return False
+
+
+def text_similarity(ocr_text: str, truth: str) -> float:
+    return difflib.SequenceMatcher(None, ocr_text.casefold(), truth.casefold()).ratio()
+
+
+def region_coverage(sample: TagSample) -> dict:
+    """
+    Regions the service would read for sample: share of the frame they cover
+    and share of the ground-truth tag inside them (the whole frame without regions).
+    """
+    settings = get_settings()
+    gray = load_image(sample.image, settings.ocr_max_dimension)
+    boxes = find_text_regions(gray, settings.ocr_max_regions) if settings.ocr_text_regions else []
+
+    covered = np.zeros((gray.height, gray.width), dtype=bool)
+    for left, top, right, bottom in boxes or [(0, 0, gray.width, gray.height)]:
+        covered[top:bottom, left:right] = True
+
+    tag_coverage = None
+    if sample.tag_box is not None:
+        scale = gray.width / sample.distortions.resolution[0]
+        left, top, right, bottom = (max(0, int(value * scale)) for value in sample.tag_box)
+        tag_coverage = round(float(covered[top:bottom, left:right].mean()), 3)
+    return {
+        "regions": len(boxes),
+        "pixel_fraction": round(float(covered.mean()), 3),
+        "tag_coverage": tag_coverage,
+    }
+
+
+def run_regions(samples: List[TagSample]) -> dict:
+    """Region detection over the corpus, outside the timed and memory-measured run."""
+    rows = [{"sample_id": sample.sample_id, **region_coverage(sample)} for sample in samples]
+    coverages = [row["tag_coverage"] for row in rows if row["tag_coverage"] is not None]
+    return {
+        "regions_mean": round(statistics.mean(row["regions"] for row in rows), 2),
+        "whole_frame_rate": round(sum(row["regions"] == 0 for row in rows) / len(rows), 3),
+        "pixel_fraction_mean": round(statistics.mean(row["pixel_fraction"] for row in rows), 3),
+        "tag_coverage_mean": round(statistics.mean(coverages), 3) if coverages else None,
+        "samples": rows,
+    }
+
+
+def run_sequential(
+    service: OCRService,
+    samples: List[TagSample],
+    ocr_available: bool,
+    scheduler: Optional[StrategyScheduler] = None
+) -> dict:
+    """Every sample once, in-process, with stage timings and accuracy."""
+    lexicon = get_lexicon()
+    stages = StageTimings()
+    rows = []
+    reset_peak_rss()
+
+    for index, sample in enumerate(samples):
+        timings = StageTimings()
+        start = time.perf_counter()
+        plan = scheduler.plan() if scheduler is not None else None
+        result = service.process_image_bytes(sample.image, timings, plan)
+        ocr_seconds = time.perf_counter() - start
+        if scheduler is not None and ocr_available:
+            scheduler.record(timings)
+
+        # A photo the quality gate rejected reads as nothing, with or without Tesseract
+        ocr_text = result.text if ocr_available or result.quality_issue else sample.text
+        # A different product from the corpus, as the negative check
+        other_item = samples[(index + len(samples) // 2) % len(samples)].item_name
+        if other_item == sample.item_name:
+            other_item = samples[(index + 1) % len(samples)].item_name
+
+        with timings.measure("match"):
+            own_score = similarity(sample.item_name, ocr_text, lexicon)
+            other_score = similarity(other_item, ocr_text, lexicon)
+
+        if not ocr_available:
+            # The failed Tesseract calls would only measure the missing binary
+            timings.stages = {k: v for k, v in timings.stages.items() if not k.startswith("ocr:")}
+            ocr_seconds = sum(sum(durations) for durations in timings.stages.values())
+        else:
+            ocr_seconds += timings.total("match")
+        stages.merge(timings)
+
+        ocr_passes = sum(len(v) for k, v in timings.stages.items() if k.startswith("ocr:"))
+        rows.append({
+            "sample_id": sample.sample_id,
+            "item_name": sample.item_name,
+            "ocr_text": result.text,
+            "total_ms": round(ocr_seconds * 1000, 2),
+            "ocr_passes": ocr_passes,
+            # Without Tesseract every crop reads empty and the frame is read too
+            "ocr_pixels": timings.pixels if ocr_available else None,
+            "quality_issue": result.quality_issue,
+            "sharpness": round(timings.sharpness, 1) if timings.sharpness is not None else None,
+            "text_similarity": round(text_similarity(ocr_text, sample.text), 3),
+            "own_item_score": round(own_score, 3),
+            "own_item_matched": own_score >= FALLBACK_MATCH_SCORE,
+            "other_item": other_item,
+            "other_item_matched": other_score >= FALLBACK_MATCH_SCORE,
+            "distortions": sample.label()["distortions"],
+        })
+
+    true_positives = sum(row["own_item_matched"] for row in rows)
+    false_positives = sum(row["other_item_matched"] for row in rows)
+    return {
+        "stages": {
+            stage: summarize([seconds * 1000 for seconds in durations])
+            for stage, durations in sorted(stages.stages.items())
+        },
+        "request": {
+            **summarize([row["total_ms"] for row in rows]),
+            "ocr_passes_mean": round(statistics.mean(row["ocr_passes"] for row in rows), 2),
+            "ocr_pixels_mean": (
+                round(statistics.mean(row["ocr_pixels"] for row in rows)) if ocr_available else None
+            ),
+        },
+
+        "accuracy": {
+            "text_similarity_mean": round(statistics.mean(row["text_similarity"] for row in rows), 3),
+            "own_item_recall": round(true_positives / len(rows), 3),
+            "other_item_false_positive_rate": round(false_positives / len(rows), 3),
+            "match_accuracy": round((true_positives + len(rows) - false_positives) / (2 * len(rows)), 3),
+            # Corpus distortions stay readable, so every rejection here is a false one
+            "quality_rejection_rate": round(sum(bool(row["quality_issue"]) for row in rows) / len(rows), 3),
+        },
+        "memory": {"sequential_peak_rss_mb": round(peak_rss_mb(), 1)},
+        "samples": rows,
+    }
+
+
+def create_executor(kind: str, workers: int) -> Executor:
+    """The same pool type the service uses (OCR_EXECUTOR), sized to workers."""
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr", initializer=init_worker)
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+
+def run_throughput(
+    samples: List[TagSample], concurrency: int, kind: str, plan: Optional[List[str]] = None
+) -> dict:
+    """All samples through a pool of concurrency workers, after one warm-up task per worker."""
+    with create_executor(kind, concurrency) as executor:
+        list(executor.map(process_image_in_worker, [samples[0].image] * concurrency))
+
+        def timed(image: bytes) -> float:
+            start = time.perf_counter()
+            executor.submit(process_image_in_worker, image, plan).result()
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            latencies = list(clients.map(timed, [sample.image for sample in samples]))
+        wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "executor": kind,
+        "requests_per_second": round(len(samples) / wall, 2),
+        **{key: value for key, value in summarize(latencies).items() if key != "count"},
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Print metric changes against baseline; returns the regressed metric names."""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'metric':<42}{'baseline':>12}{'current':>12}{'change':>10}")
+    print("-" * 76)
+
+    rows = [(section, key, higher_better) for section, key, higher_better in COMPARED_METRICS]
+    rows += [("stages", stage, False) for stage in current["stages"] if stage in baseline["stages"]]
+    for section, key, higher_better in rows:
+        old = baseline.get(section, {}).get(key)
+        new = current.get(section, {}).get(key)
+        if section == "stages":
+            old, new, key = old["mean_ms"], new["mean_ms"], f"{key} mean_ms"
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if higher_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(f"{section}.{key}")
+        print(f"{section + '.' + key:<42}{old:>12.3f}{new:>12.3f}{change:>+9.1%}{flag}")
+
+    for old, new in zip(baseline.get("throughput", []), current.get("throughput", [])):
+        if old["concurrency"] == new["concurrency"] and old["requests_per_second"]:
+            change = new["requests_per_second"] / old["requests_per_second"] - 1
+            flag = "  REGRESSION" if -change > tolerance else ""
+            if flag:
+                regressions.append(f"throughput.c{new['concurrency']}")
+            print(f"{'throughput c=' + str(new['concurrency']) + ' req/s':<42}"
+                  f"{old['requests_per_second']:>12.3f}{new['requests_per_second']:>12.3f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    meta = results["meta"]
+    print(f"Corpus: {meta['samples']} samples (seed {meta['seed']}), OCR backend: {meta['ocr_backend']}"
+          f"{'' if meta['ocr_available'] else ' (unavailable, matching on ground truth)'}")
+
+    print(f"\n{'stage':<26}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    print("-" * 73)
+    for stage, row in results["stages"].items():
+        print(f"{stage:<26}{row['count']:>7}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}"
+              f"{row['p95_ms']:>10.2f}{row['max_ms']:>10.2f}")
+    request = results["request"]
+    print(f"{'request total':<26}{request['count']:>7}{request['mean_ms']:>10.2f}{request['p50_ms']:>10.2f}"
+          f"{request['p95_ms']:>10.2f}{request['max_ms']:>10.2f}")
+    print(f"   OCR passes per request: {request['ocr_passes_mean']}")
+    if request["ocr_pixels_mean"] is not None:
+        print(f"   Pixels read per request: {request['ocr_pixels_mean']}")
+    regions = results["regions"]
+    print(f"   Text regions per request: {regions['regions_mean']} "
+          f"(whole frame {regions['whole_frame_rate']:.0%}), "
+          f"{regions['pixel_fraction_mean']:.0%} of the frame, "
+          f"tag coverage {regions['tag_coverage_mean']}")
+    if results.get("scheduler"):
+        print(f"   Learned strategy order: {' > '.join(results['scheduler']['order'])}")
+
+    print(f"\n{'executor':<10}{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 48)
+    if not results["throughput"]:
+        print("   skipped, no Tesseract installation")
+    for row in results["throughput"]:
+        print(f"{row['executor']:<10}{row['concurrency']:>8}{row['requests_per_second']:>10.2f}"
+              f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}")
+
+    accuracy, memory = results["accuracy"], results["memory"]
+    print("\nAccuracy:")
+    print(f"   OCR text similarity:      {accuracy['text_similarity_mean']:.3f}")
+    print(f"   Own item matched:         {accuracy['own_item_recall']:.1%}")
+    print(f"   Other item matched (FP):  {accuracy['other_item_false_positive_rate']:.1%}")
+    print(f"   Match accuracy:           {accuracy['match_accuracy']:.1%}")
+    print(f"   Rejected by quality gate: {accuracy['quality_rejection_rate']:.1%}")
+    print("Memory:")
+    print(f"   Sequential peak RSS:      {memory['sequential_peak_rss_mb']:.1f} MB")
+    print(f"   Largest worker peak RSS:  {memory['worker_peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR benchmark on a synthetic price tag corpus")
+    parser.add_argument("--count", type=int, default=40, help="Samples to generate")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--corpus", type=Path, help="Load the corpus from here, or save it here if missing")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--executor", choices=("process", "thread"), help="Default: OCR_EXECUTOR")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.corpus is not None and (args.corpus / "labels.json").exists():
+        samples = load_corpus(args.corpus)
+    else:
+        print(f"Generating {args.count} samples (seed {args.seed})...")
+        samples = generate_corpus(args.count, args.seed)
+        if args.corpus is not None:
+            save_corpus(samples, args.corpus)
+
+    service = OCRService()
+    ocr_available = tesseract_available(service)
+    executor_kind = args.executor or settings.ocr_executor
+    scheduler = StrategyScheduler(
+        settings.ocr_exploration_rate,
+        settings.ocr_prune_min_attempts,
+        settings.ocr_prune_win_rate,
+        seed=args.seed
+    ) if settings.ocr_adaptive_strategies else None
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "cpu_count": os.cpu_count(),
+            "samples": len(samples),
+            "seed": args.seed,
+            "fonts": [Path(font).name for font in find_fonts()],
+            "ocr_backend": service.backend.name,
+            "ocr_available": ocr_available,
+            "settings": {
+                "ocr_max_dimension": settings.ocr_max_dimension,
+                "ocr_preprocessing": settings.ocr_preprocessing,
+                "ocr_binarization": settings.ocr_binarization,
+                "ocr_parallel_strategies": settings.ocr_parallel_strategies,
+                "ocr_adaptive_strategies": settings.ocr_adaptive_strategies,
+                "ocr_text_regions": settings.ocr_text_regions,
+                "ocr_max_regions": settings.ocr_max_regions,
+                "quality_gate_enabled": settings.quality_gate_enabled,
+                "ocr_tesseract_profile": settings.ocr_tesseract_profile,
+                "ocr_dpi": settings.ocr_dpi,
+                "ocr_lstm_only": settings.ocr_lstm_only,
+            },
+        },
+        **run_sequential(service, samples, ocr_available, scheduler),
+    }
+    results["regions"] = run_regions(samples)
+    results["scheduler"] = scheduler.stats() if scheduler is not None else None
+    plan = scheduler.ranked() if scheduler is not None else None
+    reset_peak_rss()
+    results["throughput"] = [
+        run_throughput(samples, int(level), executor_kind, plan) for level in args.concurrency.split(",")
+    ] if ocr_available else []
+    results["memory"]["worker_peak_rss_mb"] = round(peak_rss_mb(children=executor_kind == "process"), 1)
+
+    print_report(results)
+    args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions and args.fail_on_regression:
+            print(f"\nRegressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
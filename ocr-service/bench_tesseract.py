@@ -0,0 +1,139 @@
+"""
+Tesseract profile benchmark on the synthetic price tag corpus (tag_corpus.py).
+
+Runs the corpus through the OCR pipeline once per Tesseract configuration and
+compares latency and accuracy:
+- plain: "--oem 3 --psm N", the original configuration
+- price_tag: character whitelist, user words/patterns and DPI hint
+- price_tag_lstm: the same with the LSTM engine only (--oem 1)
+
+Every configuration gets its own OCRService (and Tesseract handles) and the
+hand-tuned strategy order, so only the engine settings differ. Accuracy is
+the OCR text similarity to the ground truth, the share of tags whose price
+was read, and the local match decisions bench_suite.py uses.
+
+Needs a Tesseract installation with the configured language.
+
+Usage:
+    python bench_tesseract.py [--count 40] [--seed 7] [--corpus corpus/] [--output tesseract.json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+# bench_suite turns the near-duplicate index off before settings are loaded
+from bench_suite import summarize, tesseract_available, text_similarity
+
+from ai_service import FALLBACK_MATCH_SCORE
+from config import get_settings
+from lexicon import get_lexicon
+from matcher import similarity
+from ocr_service import OCRService
+from tag_corpus import TagSample, generate_corpus, load_corpus, save_corpus
+from timings import StageTimings
+
+PROFILES = {
+    "plain": {"ocr_tesseract_profile": "plain", "ocr_lstm_only": False},
+    "price_tag": {"ocr_tesseract_profile": "price_tag", "ocr_lstm_only": False},
+    "price_tag_lstm": {"ocr_tesseract_profile": "price_tag", "ocr_lstm_only": True},
+}
+
+
+def run_profile(overrides: dict, samples: List[TagSample]) -> Optional[dict]:
+    """Every sample once through a service with these settings; None without Tesseract."""
+    service = OCRService(get_settings().model_copy(update=overrides))
+    if not tesseract_available(service):
+        return None
+    lexicon = get_lexicon()
+
+    # Load the model and the word lists before timing
+    service.process_image_bytes(samples[0].image)
+
+    request_ms, pass_ms, rows = [], [], []
+    for index, sample in enumerate(samples):
+        timings = StageTimings()
+        start = time.perf_counter()
+        result = service.process_image_bytes(sample.image, timings)
+        request_ms.append((time.perf_counter() - start) * 1000)
+
+        passes = [
+            seconds * 1000
+            for stage, durations in timings.stages.items() if stage.startswith("ocr:")
+            for seconds in durations
+        ]
+        pass_ms.extend(passes)
+
+        other_item = samples[(index + len(samples) // 2) % len(samples)].item_name
+        if other_item == sample.item_name:
+            other_item = samples[(index + 1) % len(samples)].item_name
+        rows.append({
+            "passes": len(passes),
+            "text_similarity": text_similarity(result.text, sample.text),
+            "price_read": sample.price in result.text,
+            "own_item_matched": similarity(sample.item_name, result.text, lexicon) >= FALLBACK_MATCH_SCORE,
+            "other_item_matched": similarity(other_item, result.text, lexicon) >= FALLBACK_MATCH_SCORE,
+        })
+
+    count = len(rows)
+    return {
+        "request": summarize(request_ms),
+        "ocr_pass": summarize(pass_ms),
+        "ocr_passes_mean": round(statistics.mean(row["passes"] for row in rows), 2),
+        "text_similarity_mean": round(statistics.mean(row["text_similarity"] for row in rows), 3),
+        "price_read_rate": round(sum(row["price_read"] for row in rows) / count, 3),
+        "own_item_recall": round(sum(row["own_item_matched"] for row in rows) / count, 3),
+        "other_item_false_positive_rate": round(sum(row["other_item_matched"] for row in rows) / count, 3),
+    }
+
+
+def print_report(results: dict) -> None:
+    print(f"\n{'profile':<16}{'req ms':>9}{'p95 ms':>9}{'pass ms':>9}{'passes':>8}"
+          f"{'text sim':>10}{'price':>8}{'own':>8}{'FP':>7}")
+    print("-" * 84)
+    for name, row in results.items():
+        if row is None:
+            print(f"{name:<16}   skipped, no Tesseract installation")
+            continue
+        print(f"{name:<16}{row['request']['mean_ms']:>9.1f}{row['request']['p95_ms']:>9.1f}"
+              f"{row['ocr_pass']['mean_ms']:>9.1f}{row['ocr_passes_mean']:>8.2f}"
+              f"{row['text_similarity_mean']:>10.3f}{row['price_read_rate']:>8.1%}"
+              f"{row['own_item_recall']:>8.1%}{row['other_item_false_positive_rate']:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tesseract profile benchmark on a synthetic price tag corpus")
+    parser.add_argument("--count", type=int, default=40, help="Samples to generate")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--corpus", type=Path, help="Load the corpus from here, or save it here if missing")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    if args.corpus is not None and (args.corpus / "labels.json").exists():
+        samples = load_corpus(args.corpus)
+    else:
+        print(f"Generating {args.count} samples (seed {args.seed})...")
+        samples = generate_corpus(args.count, args.seed)
+        if args.corpus is not None:
+            save_corpus(samples, args.corpus)
+
+    results = {}
+    for name, overrides in PROFILES.items():
+        print(f"Running {name}...")
+        results[name] = run_profile(overrides, samples)
+
+    print_report(results)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
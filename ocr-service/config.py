@@ -13,9 +13,70 @@ class Settings(BaseSettings):
     
     Environment variables:
     - OPENAI_API_KEY: API key for OpenAI GPT models
+    - AI_BACKEND: "openai", or "local" for the offline stand-in fake_openai.py (default: openai)
+    - AI_LOCAL_BASE_URL: Base URL of the local stand-in (default: http://127.0.0.1:8090/v1)
     - OPENAI_MODEL: Model to use (default: gpt-4o-mini for cost efficiency)
+    - OPENAI_TIMEOUT_SECONDS: Total timeout per model call attempt (default: 12)
+    - OPENAI_CONNECT_TIMEOUT_SECONDS: Connect timeout per attempt (default: 5)
+    - OPENAI_MAX_CONNECTIONS: Shared keep-alive connection pool size (default: 20)
+    - OPENAI_KEEPALIVE_SECONDS: Idle time before a pooled connection is closed (default: 30)
+    - OPENAI_MAX_CONCURRENCY: Model calls in flight at once, others queue (default: 8)
+    - OPENAI_QUEUE_TIMEOUT_SECONDS: Max wait for a free call slot (default: 5)
+    - OPENAI_MAX_RETRIES: Retries for 429/5xx/connection errors (default: 2)
+    - OPENAI_RETRY_BASE_SECONDS: Base of the jittered exponential backoff (default: 0.5)
+    - OPENAI_HEDGE_ENABLED: Send a second model call when the first is slower than p95 (default: True)
+    - OPENAI_HEDGE_MIN_SECONDS: Never hedge earlier than this (default: 2)
+    - REQUEST_BUDGET_SECONDS: Latency budget of a request without X-Request-Budget-Ms (default: 50)
+    - OCR_BUDGET_FRACTION: Share of the budget OCR may use, the AI gets the rest (default: 0.6)
+    - CIRCUIT_BREAKER_ENABLED: Stop calling the AI while it fails or is slow (default: True)
+    - CIRCUIT_WINDOW_SIZE: Recent model calls the failure rate is measured over (default: 20)
+    - CIRCUIT_MIN_CALLS: Calls in the window before the circuit can open (default: 10)
+    - CIRCUIT_ERROR_RATE: Failure rate at which the circuit opens (default: 0.5)
+    - CIRCUIT_SLOW_CALL_SECONDS: Calls slower than this count as failures (default: 8)
+    - CIRCUIT_OPEN_SECONDS: Time the circuit stays open before probing (default: 30)
+    - CIRCUIT_HALF_OPEN_PROBES: Successful probe calls needed to close the circuit (default: 2)
     - OCR_LANGUAGE: Tesseract language code (default: hrv for Croatian/Bosnian)
+    - OCR_BACKEND: "tesserocr" (in-process) or "pytesseract" (subprocess) (default: tesserocr)
+    - TESSDATA_PATH: Directory with traineddata files for tesserocr (default: library default)
+    - OCR_TESSERACT_PROFILE: "price_tag" (whitelist, user words/patterns, DPI hint) or "plain" (default: plain)
+    - OCR_DPI: Resolution Tesseract assumes with the price_tag profile, 0 = estimate per image (default: 300)
+    - OCR_LSTM_ONLY: Run the LSTM engine only (--oem 1) instead of the default mode (default: False)
+    - OCR_PROFILE_DIR: Directory the user words and patterns files are written to
+      (default: /tmp/ocr-service-tesseract)
     - CONFIDENCE_THRESHOLD: Minimum confidence for match (default: 0.7)
+    - OCR_EXECUTOR: Pool type for blocking OCR work, "process" or "thread" (default: process)
+    - OCR_MAX_WORKERS: OCR pool size, 0 = number of CPU cores (default: 0)
+    - OCR_PARALLEL_STRATEGIES: Run image variant x PSM attempts in parallel (default: False)
+    - OCR_STRATEGY_WORKERS: Threads per OCR worker for parallel attempts (default: 3)
+    - OCR_TEXT_REGIONS: OCR only the detected text/tag regions instead of the whole photo (default: False)
+    - OCR_MAX_REGIONS: Most regions read per photo (default: 3)
+    - OCR_REGION_WORKERS: Threads per OCR worker reading regions in parallel, 1 = one after another (default: 2)
+    - OCR_ADAPTIVE_STRATEGIES: Order variant x PSM attempts by how often they pay off (default: False)
+    - OCR_EXPLORATION_RATE: Share of OCR jobs trying every strategy in random order (default: 0.05)
+    - OCR_PRUNE_MIN_ATTEMPTS: Attempts before a rarely winning strategy can be skipped (default: 200)
+    - OCR_PRUNE_WIN_RATE: Win rate below which a strategy is skipped, 0 = never skip (default: 0)
+    - OCR_SCHEDULER_STATE_PATH: JSON file the learned strategy stats persist in, empty = memory only
+      (default: empty)
+    - OCR_MAX_DIMENSION: Longest image side used for OCR, larger photos are downscaled (default: 1200)
+    - OCR_PREPROCESSING: Variant builder, "pil" or "numpy" (same output and speed) (default: pil)
+    - OCR_BINARIZATION: "otsu" (global) or "sauvola" (adaptive, numpy only) (default: otsu)
+    - OCR_CONTRAST_STRETCH: Percentile contrast stretch before enhancing (default: False)
+    - QUALITY_GATE_ENABLED: Reject blurry, dark, washed-out or tiny photos before OCR (default: True)
+    - QUALITY_MIN_SIDE: Shortest accepted image side in pixels (default: 80)
+    - QUALITY_MIN_SHARPNESS: Lowest accepted sharpness, variance of the Laplacian (default: 20)
+    - QUALITY_MIN_CONTRAST: Lowest accepted spread between text and background levels, 0-255 (default: 70)
+    - PHASH_INDEX_SIZE: Recent images kept for near-duplicate lookup, 0 = off (default: 0)
+    - PHASH_MAX_DISTANCE: Max Hamming distance of the 256-bit text region dHash treated as the same photo (default: 6)
+    - AI_BATCH_SIZE: Item checks packed into one AI prompt on /verify/batch (default: 10)
+    - AI_PROMPT_MODE: "compact" (short system prompt, trimmed OCR text) or "full" (default: full)
+    - LOCAL_MATCH_ENABLED: Accept clear matches locally before calling the AI (default: True)
+    - LOCAL_ACCEPT_THRESHOLD: Share of item words found verbatim (or as OCR look-alikes) at or above which a check is a match (default: 0.8)
+    - LEXICON_PATH: JSON lexicon of synonyms, lemmas and brands, empty = bundled lexicon.json
+    - MAX_UPLOAD_BYTES: Largest accepted binary image upload (default: 15 MB)
+    - CACHE_BACKEND: Result cache store, "memory", "disk" or "none" (default: memory)
+    - CACHE_MAX_ENTRIES: Maximum cached results (default: 1024)
+    - CACHE_TTL_SECONDS: Lifetime of a cached result (default: 600)
+    - CACHE_PATH: SQLite file for the disk store, shared between workers
     - DEBUG: Enable debug logging (default: False)
     """
     
@@ -23,14 +84,129 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"  # Cost-efficient, good for semantic matching
     
+    # AI backend: "openai" or "local" (fake_openai.py, no API key or network needed)
+    ai_backend: str = "openai"
+    ai_local_base_url: str = "http://127.0.0.1:8090/v1"
+    
+    # OpenAI client pool
+    # Worst case (queue + 3 attempts + backoff) stays under the backend's 60 s timeout
+    openai_timeout_seconds: float = 12.0
+    openai_connect_timeout_seconds: float = 5.0
+    openai_max_connections: int = 20
+    openai_keepalive_seconds: float = 30.0
+    openai_max_concurrency: int = 8
+    openai_queue_timeout_seconds: float = 5.0
+    openai_max_retries: int = 2
+    openai_retry_base_seconds: float = 0.5
+    openai_hedge_enabled: bool = True
+    openai_hedge_min_seconds: float = 2.0
+    
+    # Request latency budget (X-Request-Budget-Ms header overrides the default)
+    # Below the backend's 60 s timeout so no result is produced after it gave up
+    request_budget_seconds: float = 50.0
+    ocr_budget_fraction: float = 0.6
+    
+    # AI circuit breaker
+    # While open, checks go straight to the local matcher without a network wait
+    circuit_breaker_enabled: bool = True
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 10
+    circuit_error_rate: float = 0.5
+    circuit_slow_call_seconds: float = 8.0
+    circuit_open_seconds: float = 30.0
+    circuit_half_open_probes: int = 2
+    
     # OCR settings
     # hrv = Croatian, also works well for Bosnian as they share Latin script
     ocr_language: str = "hrv"
     
+    # OCR backend
+    # tesserocr keeps the model loaded in memory, pytesseract is the fallback
+    ocr_backend: str = "tesserocr"
+    tessdata_path: str = ""
+    
+    # Tesseract profile (tesseract_profile.py)
+    # price_tag narrows characters and words to what tags carry; plain is stock Tesseract
+    # Switch to price_tag only after bench_tesseract.py shows it reads no worse
+    ocr_tesseract_profile: str = "plain"
+    ocr_dpi: int = 300
+    ocr_lstm_only: bool = False
+    ocr_profile_dir: str = "/tmp/ocr-service-tesseract"
+    
+    # OCR execution model
+    # OCR is CPU-bound, so it runs off the event loop in a bounded pool
+    ocr_executor: str = "process"
+    ocr_max_workers: int = 0
+    
+    # Parallel strategy fan-out inside each OCR worker
+    # Lower OCR_MAX_WORKERS when enabling this to avoid oversubscribing cores
+    ocr_parallel_strategies: bool = False
+    ocr_strategy_workers: int = 3
+    
+    # Text region detection (text_regions.py), off by default
+    # Tesseract reads the tag crops, not the shelf around them; a crop can miss
+    # part of the tag (bench_suite.py reports the tag coverage)
+    ocr_text_regions: bool = False
+    ocr_max_regions: int = 3
+    ocr_region_workers: int = 2
+    
+    # Adaptive strategy order (strategy_scheduler.py), off by default
+    # Attempts that win most per second of Tesseract time go first; rare winners are
+    # skipped only with a prune win rate, late strategies rarely win even when needed
+    ocr_adaptive_strategies: bool = False
+    ocr_exploration_rate: float = 0.05
+    ocr_prune_min_attempts: int = 200
+    ocr_prune_win_rate: float = 0.0
+    ocr_scheduler_state_path: str = ""
+    
     # Verification thresholds
     # Lower threshold to be more accepting of OCR matches
     confidence_threshold: float = 0.6
     
+    # Image preprocessing for OCR variants
+    ocr_max_dimension: int = 1200
+    ocr_preprocessing: str = "pil"
+    ocr_binarization: str = "otsu"
+    ocr_contrast_stretch: bool = False
+    
+    # Image quality gate (quality_gate.py), checked on the downscaled grayscale image
+    # Rejected photos get a retake message without any OCR or AI call
+    quality_gate_enabled: bool = True
+    quality_min_side: int = 80
+    quality_min_sharpness: float = 20.0
+    quality_min_contrast: float = 70.0
+    
+    # Near-duplicate photo detection (per OCR worker), off by default
+    # A photo sent again (re-encoded or resized) within the distance reuses the earlier OCR text
+    phash_index_size: int = 0
+    phash_max_distance: int = 6
+    
+    # Batch verification (/verify/batch)
+    ai_batch_size: int = 10
+    
+    # AI prompt
+    # compact: half-size system prompt shared by all calls, trimmed OCR text and a small max_tokens;
+    # full: the original instruction block with examples
+    # Switch to compact only after bench_prompt.py --live shows the same accuracy
+    ai_prompt_mode: str = "full"
+    
+    # Local matcher in front of the AI model
+    # Scores below the threshold are escalated to the model, never rejected locally
+    local_match_enabled: bool = True
+    local_accept_threshold: float = 0.8
+    
+    # Synonym / lemma / brand lexicon used by the local matcher and AI prompts
+    lexicon_path: str = ""
+    
+    # Binary uploads (/verify/upload)
+    max_upload_bytes: int = 15 * 1024 * 1024
+    
+    # Result cache (keyed on image hash / item name, never stores images)
+    cache_backend: str = "memory"
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 600
+    cache_path: str = "/tmp/ocr-service-cache.sqlite3"
+    
     # Debug mode
     debug: bool = False
     
@@ -0,0 +1,53 @@
+"""
+Request Deadline Module.
+Latency budget of one verification request, split into OCR and AI slices.
+
+The caller (the .NET backend) gives up after 60 s. The budget comes from the
+X-Request-Budget-Ms header, or REQUEST_BUDGET_SECONDS when the header is missing,
+so the service stops working on a request before its caller stops waiting
+instead of finishing a result nobody will read.
+"""
+
+import time
+from typing import Optional
+
+BUDGET_HEADER = "X-Request-Budget-Ms"
+
+# Kept back from every slice for building and sending the response
+RESPONSE_RESERVE_SECONDS = 0.2
+
+
+class DeadlineExceeded(TimeoutError):
+    """A stage ran out of the request's latency budget."""
+
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"{stage} ran out of the request budget after {seconds:.1f}s")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolute deadline on the monotonic clock.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_header(cls, budget_ms: Optional[float], default_seconds: float) -> "Deadline":
+        """Budget from the header value in milliseconds, or the configured default."""
+        if budget_ms is None or budget_ms <= 0:
+            return cls(default_seconds)
+        return cls(budget_ms / 1000.0)
+
+    def remaining(self) -> float:
+        """Seconds left for work, with the response reserve already taken off."""
+        return max(0.0, self.expires_at - time.monotonic() - RESPONSE_RESERVE_SECONDS)
+
+    def slice(self, fraction: float) -> float:
+        """A stage's share of the whole budget, never more than what is left."""
+        return min(self.remaining(), self.budget * fraction)
+
+    def exceeded(self, stage: str) -> DeadlineExceeded:
+        return DeadlineExceeded(stage, self.budget - (self.expires_at - time.monotonic()))
@@ -0,0 +1,239 @@
+"""
+Local OpenAI stand-in for offline load testing.
+A deterministic, OpenAI-compatible /v1/chat/completions server with configurable
+latency and error distributions, so throughput, the circuit breaker, hedging and
+batching can be measured without an API key or network access.
+
+Point a service at it with AI_BACKEND=local (AI_LOCAL_BASE_URL defaults to
+http://127.0.0.1:8090/v1). It answers the ocr-service and vision-service prompts,
+single and batched: each numbered line of the user message ("1. ...") gets one
+entry in "results", otherwise a single verdict is returned.
+
+Verdicts are a hash of the check line, so the same prompt always gets the same
+answer. Latency is log-normal (median and p95), and a seeded random generator
+picks 500s, 429s (with Retry-After) and hangs, so a run is repeatable.
+
+The distributions can be changed while the server runs, e.g. to fail every call
+and watch the circuit open:
+
+    curl -X POST localhost:8090/control -d '{"error_rate": 1.0}'
+
+Usage:
+    python fake_openai.py [--port 8090] [--latency-ms 800] [--p95-ms 2000]
+                          [--error-rate 0] [--rate-limit-rate 0] [--hang-rate 0]
+                          [--match-rate 0.8] [--seed 1]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# z-score of the 95th percentile, for the log-normal spread
+P95_Z = 1.645
+
+# A numbered check line of a batch prompt
+CHECK_LINE = re.compile(r"^\s*(\d+)\.\s+(.+)$", re.MULTILINE)
+
+
+@dataclass
+class Behaviour:
+    """Latency and error distribution of the fake model."""
+
+    latency_ms: float = 800.0
+    p95_ms: float = 2000.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 60.0
+    match_rate: float = 0.8
+    seed: int = 1
+
+
+class FakeModel:
+    """Answers chat completion requests the way the behaviour says."""
+
+    def __init__(self, behaviour: Behaviour):
+        self.behaviour = behaviour
+        self.random = random.Random(behaviour.seed)
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "hangs": 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def update(self, changes: dict) -> None:
+        for name, value in changes.items():
+            if hasattr(self.behaviour, name):
+                setattr(self.behaviour, name, type(getattr(self.behaviour, name))(value))
+        if "seed" in changes:
+            self.random.seed(self.behaviour.seed)
+
+    def latency(self) -> float:
+        """Log-normal latency in seconds with the configured median and p95."""
+        median = max(1.0, self.behaviour.latency_ms)
+        sigma = max(0.0, math.log(max(self.behaviour.p95_ms, median) / median) / P95_Z)
+        return median * math.exp(self.random.gauss(0.0, sigma)) / 1000.0
+
+    def outcome(self) -> str:
+        """"ok", "error", "rate_limited" or "hang" for the next request."""
+        roll = self.random.random()
+        for name, rate in (
+            ("error", self.behaviour.error_rate),
+            ("rate_limited", self.behaviour.rate_limit_rate),
+            ("hang", self.behaviour.hang_rate),
+        ):
+            if roll < rate:
+                return name
+            roll -= rate
+        return "ok"
+
+    def verdict(self, check: str) -> dict:
+        """Stable verdict for one check, derived from its text."""
+        digest = hashlib.sha256(check.encode("utf-8")).digest()
+        is_match = digest[0] / 256 < self.behaviour.match_rate
+        confidence = round(0.6 + 0.39 * digest[1] / 255, 2)
+        return {"is_match": is_match, "confidence": confidence, "reasoning": "Lokalni testni odgovor."}
+
+    def answer(self, messages: List[dict]) -> Tuple[str, int]:
+        """JSON content for the request's messages and an estimated prompt size in tokens."""
+        user_text = ""
+        prompt_chars = 0
+        for message in messages:
+            content = message.get("content") or ""
+            if isinstance(content, list):
+                parts = [part.get("text", "") for part in content if part.get("type") == "text"]
+                # An image costs the flat low-detail token count
+                prompt_chars += 4 * 85 * sum(1 for part in content if part.get("type") == "image_url")
+                content = "\n".join(parts)
+            prompt_chars += len(content)
+            if message.get("role") == "user":
+                user_text = content
+
+        checks = CHECK_LINE.findall(user_text)
+        if checks:
+            body = {"results": [{"id": int(number), **self.verdict(line)} for number, line in checks]}
+        else:
+            body = self.verdict(user_text)
+        return json.dumps(body, ensure_ascii=False), max(1, prompt_chars // 4)
+
+
+def create_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI", description="Lokalni OpenAI zamjenski servis za testiranje opterećenja.")
+    model = FakeModel(behaviour)
+    app.state.model = model
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        model.counts["requests"] += 1
+        model.in_flight += 1
+        model.max_in_flight = max(model.max_in_flight, model.in_flight)
+        try:
+            outcome = model.outcome()
+            if outcome == "hang":
+                model.counts["hangs"] += 1
+                await asyncio.sleep(model.behaviour.hang_seconds)
+            await asyncio.sleep(model.latency())
+
+            if outcome == "error":
+                model.counts["errors"] += 1
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": {"message": "Simulated server error", "type": "server_error"}},
+                )
+            if outcome == "rate_limited":
+                model.counts["rate_limited"] += 1
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"message": "Simulated rate limit", "type": "rate_limit_error"}},
+                    headers={"Retry-After": str(model.behaviour.retry_after_seconds)},
+                )
+
+            content, prompt_tokens = model.answer(payload.get("messages", []))
+            completion_tokens = max(1, len(content) // 4)
+            model.counts["ok"] += 1
+            return {
+                "id": f"chatcmpl-fake-{model.counts['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": 0},
+                },
+            }
+        finally:
+            model.in_flight -= 1
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            **model.counts,
+            "in_flight": model.in_flight,
+            "max_in_flight": model.max_in_flight,
+            "behaviour": asdict(model.behaviour),
+        }
+
+    @app.post("/control")
+    async def control(request: Request):
+        """Change the behaviour at runtime; only the given fields are updated."""
+        model.update(await request.json())
+        return asdict(model.behaviour)
+
+    return app
+
+
+def main():
+    defaults = Behaviour()
+    parser = argparse.ArgumentParser(description="Run a local OpenAI stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median latency")
+    parser.add_argument("--p95-ms", type=float, default=defaults.p95_ms, help="95th percentile latency")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of 500 answers")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate,
+                        help="Share of 429 answers")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after_seconds,
+                        help="Retry-After of 429 answers (seconds)")
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate,
+                        help="Share of calls that stall for --hang-seconds (client timeouts)")
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--match-rate", type=float, default=defaults.match_rate,
+                        help="Share of checks answered as a match")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    behaviour = Behaviour(
+        latency_ms=args.latency_ms,
+        p95_ms=args.p95_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        match_rate=args.match_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(behaviour), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
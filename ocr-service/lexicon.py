@@ -0,0 +1,165 @@
+"""
+Lexicon Module.
+Synonyms, lemmas and category -> brand lists for Bosnian/Croatian items.
+
+Loaded once from a JSON file (bundled lexicon.json unless LEXICON_PATH is set)
+and compiled into hash indexes keyed on folded forms, so "hleb" on a price
+tag and "kruh" on the list resolve to the same concept with two dict lookups.
+
+File format:
+    {
+        "synonyms": [["hljeb", "kruh", "hleb"], ...],
+        "lemmas": {"jabuke": "jabuka", ...},
+        "categories": {"čokoladica": ["snickers", "mars"], ...}
+    }
+
+Entries are single words; the first word of a synonym group names the concept.
+"""
+
+import json
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = Path(__file__).parent / "lexicon.json"
+
+# Bosnian/Croatian letters folded to ASCII (đ → dj, as commonly typed)
+_FOLD_TABLE = str.maketrans({
+    "č": "c", "ć": "c", "š": "s", "ž": "z", "đ": "dj",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words as written (letters with diacritics), for prompt hints
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and fold diacritics."""
+    return text.lower().translate(_FOLD_TABLE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded alphanumeric tokens."""
+    return _TOKEN_RE.findall(fold(text))
+
+
+class Lexicon:
+    """
+    Compiled lexicon: folded word -> concept, concept -> spellings, and
+    brand -> categories, all plain dicts.
+    """
+
+    def __init__(
+        self,
+        synonyms: Optional[List[List[str]]] = None,
+        lemmas: Optional[Dict[str, str]] = None,
+        categories: Optional[Dict[str, List[str]]] = None,
+    ):
+        self._lemmas: Dict[str, str] = {
+            fold(word): fold(lemma) for word, lemma in (lemmas or {}).items()
+        }
+
+        # Every word as written, for the OCR dictionary
+        self._words: Set[str] = set()
+        for group in synonyms or []:
+            self._words.update(group)
+        for word, lemma in (lemmas or {}).items():
+            self._words.update((word, lemma))
+        for category, brands in (categories or {}).items():
+            self._words.add(category)
+            self._words.update(brands)
+
+        # Folded word -> concept id, concept id -> spellings for prompts
+        self._concepts: Dict[str, str] = {}
+        self._spellings: Dict[str, List[str]] = {}
+        for group in synonyms or []:
+            if not group:
+                continue
+            concept = fold(group[0])
+            self._spellings[concept] = list(group)
+            for word in group:
+                self._concepts[fold(word)] = concept
+
+        # Brand -> category concepts, category concept -> brand names
+        self._brand_categories: Dict[str, Set[str]] = {}
+        self._category_brands: Dict[str, List[str]] = {}
+        for category, brands in (categories or {}).items():
+            concept = self.concept(fold(category))
+            self._category_brands.setdefault(concept, []).extend(brands)
+            for brand in brands:
+                self._brand_categories.setdefault(fold(brand), set()).add(concept)
+
+    @classmethod
+    def load(cls, path: Path) -> "Lexicon":
+        with open(path, encoding="utf-8") as lexicon_file:
+            data = json.load(lexicon_file)
+        return cls(
+            synonyms=data.get("synonyms"),
+            lemmas=data.get("lemmas"),
+            categories=data.get("categories"),
+        )
+
+    def __len__(self) -> int:
+        return len(self._concepts) + len(self._lemmas) + len(self._brand_categories)
+
+    def words(self) -> List[str]:
+        """Every word in the lexicon as written (with diacritics), sorted."""
+        return sorted(self._words)
+
+    def concept(self, token: str) -> str:
+        """Concept id of a folded token: its lemma's synonym group, or the lemma itself."""
+        lemma = self._lemmas.get(token, token)
+        return self._concepts.get(lemma, lemma)
+
+    def concepts_of(self, token: str) -> Set[str]:
+        """
+        Concepts a folded token found in OCR text stands for: its own concept
+        plus the categories of a brand name ("snickers" -> "cokoladica").
+        """
+        return {self.concept(token)} | self.categories_of(token)
+
+    def categories_of(self, token: str) -> Set[str]:
+        """Category concepts of a folded brand name, empty for any other token."""
+        return self._brand_categories.get(token, set())
+
+    def hint(self, item_name: str) -> Optional[str]:
+        """
+        Short note on the item's known spellings and brands for the AI prompt,
+        e.g. "kruh = hljeb, kruh, hleb, hljep". None when the lexicon knows nothing.
+        """
+        notes = []
+        for word in _WORD_RE.findall(item_name.lower()):
+            concept = self.concept(fold(word))
+            spellings = self._spellings.get(concept)
+            if spellings:
+                notes.append(f"{word} = {', '.join(spellings)}")
+            brands = self._category_brands.get(concept)
+            if brands:
+                notes.append(f"{word} uključuje brendove: {', '.join(brands)}")
+        return "; ".join(notes) or None
+
+
+@lru_cache()
+def get_lexicon() -> Lexicon:
+    """
+    Load and compile the lexicon once per process.
+    A missing or invalid file leaves matching without lexicon support.
+    """
+    settings = get_settings()
+    path = Path(settings.lexicon_path) if settings.lexicon_path else DEFAULT_LEXICON_PATH
+
+    try:
+        lexicon = Lexicon.load(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Lexicon not loaded from {path}: {e}")
+        return Lexicon()
+
+    logger.info(f"Lexicon loaded from {path}: {len(lexicon)} entries")
+    return lexicon
@@ -14,19 +14,56 @@ The service is designed to be:
 
 Endpoints:
 - POST /verify: Verify if a price tag image matches a shopping item
+- POST /verify/upload: Same, with the image sent as multipart/form-data or raw image/* body
+- POST /verify/batch: Verify many items (own images or one shared image) in one request
+- POST /verify/list: Match one image against every item of a shopping list, ranked
 - GET /health: Health check endpoint
+- GET /metrics: Prometheus metrics
 """
 
+import asyncio
+import base64
 import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from config import get_settings
-from models import VerifyItemRequest, VerifyItemResponse
-from ocr_service import OCRService
+from cache import ResultCache, create_result_cache, image_hash, make_key, normalize_item_name
+from config import Settings, get_settings
+from deadline import BUDGET_HEADER, Deadline, DeadlineExceeded
+from models import (
+    AIVerificationResult,
+    BatchVerifyRequest,
+    BatchVerifyResponse,
+    ItemMatch,
+    OCRResult,
+    VerifyItemRequest,
+    VerifyItemResponse,
+    VerifyListRequest,
+    VerifyListResponse,
+)
+from metrics import (
+    AI_FALLBACKS,
+    CONTENT_TYPE_LATEST,
+    OCR_JOB_SECONDS,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    observe_ocr,
+    register_stats,
+    render,
+)
+from ocr_service import init_worker, process_image_in_worker
+from quality_gate import RETAKE_MESSAGES
+from strategy_scheduler import StrategyScheduler
 from ai_service import AIVerificationService
+from lexicon import get_lexicon
+from matcher import LocalMatcher
+from uploads import UploadError, get_item_name, read_image_upload
 
 # Configure logging
 logging.basicConfig(
@@ -37,8 +74,35 @@ logger = logging.getLogger(__name__)
 
 
 # Global service instances (initialized on startup)
-ocr_service: OCRService | None = None
+ocr_executor: Executor | None = None
 ai_service: AIVerificationService | None = None
+result_cache: ResultCache | None = None
+local_matcher: LocalMatcher | None = None
+strategy_scheduler: StrategyScheduler | None = None
+
+# OCR jobs handed to the worker pool and not finished yet
+ocr_jobs_pending = 0
+
+
+def _ocr_worker_count(settings: Settings) -> int:
+    """OCR pool size: the CPU cores unless OCR_MAX_WORKERS is set."""
+    return settings.ocr_max_workers or os.cpu_count() or 1
+
+
+def _create_ocr_executor(settings: Settings) -> Executor:
+    """
+    Create the bounded pool that runs blocking OCR work.
+    Sized to the CPU cores unless OCR_MAX_WORKERS is set.
+    """
+    max_workers = _ocr_worker_count(settings)
+    
+    if settings.ocr_executor == "thread":
+        return ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="ocr",
+            initializer=init_worker
+        )
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker)
 
 
 @asynccontextmanager
@@ -47,26 +111,55 @@ async def lifespan(app: FastAPI):
     Application lifespan manager.
     Initializes services on startup and cleans up on shutdown.
     """
-    global ocr_service, ai_service
+    global ocr_executor, ai_service, result_cache, local_matcher, strategy_scheduler
     
     settings = get_settings()
     
     # Initialize services
-    logger.info("Initializing OCR service...")
-    ocr_service = OCRService()
+    logger.info("Initializing OCR worker pool...")
+    ocr_executor = _create_ocr_executor(settings)
+    
+    if settings.ocr_adaptive_strategies:
+        strategy_scheduler = StrategyScheduler(
+            settings.ocr_exploration_rate,
+            settings.ocr_prune_min_attempts,
+            settings.ocr_prune_win_rate,
+            settings.ocr_scheduler_state_path
+        )
     
     logger.info("Initializing AI verification service...")
     ai_service = AIVerificationService()
     
+    result_cache = create_result_cache(settings)
+    if result_cache is not None:
+        logger.info(f"Result cache enabled: {result_cache.store.name}")
+    
+    if settings.local_match_enabled:
+        local_matcher = LocalMatcher(
+            settings.local_accept_threshold,
+            get_lexicon()
+        )
+    
     logger.info(f"Services initialized. OCR language: {settings.ocr_language}")
     logger.info(f"AI model: {settings.openai_model}")
+    if settings.ai_backend == "local":
+        logger.info(f"AI backend: local stand-in at {settings.ai_local_base_url}")
     
     yield
     
     # Cleanup on shutdown
     logger.info("Shutting down services...")
-    ocr_service = None
+    ocr_executor.shutdown(wait=False, cancel_futures=True)
+    await ai_service.close()
+    if result_cache is not None:
+        await asyncio.to_thread(result_cache.close)
+    if strategy_scheduler is not None and strategy_scheduler.state_path:
+        strategy_scheduler.save()
+    ocr_executor = None
     ai_service = None
+    result_cache = None
+    local_matcher = None
+    strategy_scheduler = None
 
 
 # Create FastAPI application
@@ -90,6 +183,39 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request duration by route and status, and the number of requests in flight."""
+    start = time.perf_counter()
+    with REQUESTS_IN_FLIGHT.track_inprogress():
+        response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        route.path if route is not None else "other",
+        str(response.status_code)
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+def _service_stats() -> dict:
+    """Counters of the running components, shared by /health and /metrics."""
+    workers = _ocr_worker_count(get_settings())
+    return {
+        "ocr_jobs": {
+            "in_flight": min(ocr_jobs_pending, workers),
+            "queued": max(0, ocr_jobs_pending - workers),
+        } if ocr_executor is not None else None,
+        "cache": result_cache.stats() if result_cache is not None else None,
+        "openai": ai_service.pool_stats() if ai_service is not None else None,
+        "ai_usage": ai_service.usage_stats() if ai_service is not None else None,
+        "local_matcher": local_matcher.stats() if local_matcher is not None else None,
+        "strategy_scheduler": strategy_scheduler.stats() if strategy_scheduler is not None else None
+    }
+
+
+register_stats(_service_stats)
+
+
 @app.get("/health")
 async def health_check():
     """
@@ -101,15 +227,302 @@ async def health_check():
         "status": "healthy",
         "ocr_language": settings.ocr_language,
         "ai_model": settings.openai_model,
+        "ai_backend": settings.ai_backend,
         "services": {
-            "ocr": ocr_service is not None,
+            "ocr": ocr_executor is not None,
             "ai": ai_service is not None
-        }
+        },
+        **_service_stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage and request latencies, OCR outcomes, cache, queues and AI calls."""
+    return Response(content=render(), media_type=CONTENT_TYPE_LATEST)
+
+
+def _ensure_services() -> None:
+    """Reject requests until the lifespan handler has initialized services."""
+    if ocr_executor is None or ai_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Servisi nisu inicijalizirani. Pokušajte ponovo."
+        )
+
+
+async def _run_ocr(image_bytes: bytes) -> OCRResult:
+    """
+    OCR with the result cache in front.
+    OCR is CPU-bound, so it runs in the worker pool and the event loop stays free.
+    """
+    global ocr_jobs_pending
+    image_key = image_hash(image_bytes)
+    
+    ocr_result = await result_cache.get("ocr", image_key, OCRResult) if result_cache else None
+    if ocr_result is not None:
+        logger.info("OCR cache hit")
+        return ocr_result
+    
+    plan = strategy_scheduler.plan() if strategy_scheduler is not None else None
+    
+    loop = asyncio.get_running_loop()
+    ocr_jobs_pending += 1
+    try:
+        with OCR_JOB_SECONDS.time():
+            ocr_result, timings = await loop.run_in_executor(
+                ocr_executor, process_image_in_worker, image_bytes, plan
+            )
+    finally:
+        ocr_jobs_pending -= 1
+    observe_ocr(timings)
+    if strategy_scheduler is not None:
+        strategy_scheduler.record(timings)
+    
+    if result_cache is not None:
+        await result_cache.set("ocr", image_key, ocr_result)
+    return ocr_result
+
+
+def _request_deadline(budget_ms: float | None) -> Deadline:
+    """Deadline from the X-Request-Budget-Ms header, or REQUEST_BUDGET_SECONDS."""
+    return Deadline.from_header(budget_ms, get_settings().request_budget_seconds)
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    """Retrieve a background task's outcome so failures are not reported as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run_ocr_within(image_bytes: bytes, deadline: Deadline) -> OCRResult:
+    """
+    OCR bounded by its slice of the request budget (OCR_BUDGET_FRACTION).
+    A late result is not thrown away: the work finishes in the background and
+    lands in the cache, so the caller's retry is answered from there.
+    
+    Raises:
+        DeadlineExceeded: If OCR did not finish within its slice
+    """
+    task = asyncio.ensure_future(_run_ocr(image_bytes))
+    timeout = deadline.slice(get_settings().ocr_budget_fraction)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        task.add_done_callback(_consume_result)
+        raise deadline.exceeded("OCR")
+
+
+def _deadline_response(e: DeadlineExceeded) -> HTTPException:
+    """504 once the budget is spent, instead of a late answer the caller no longer reads."""
+    logger.warning(f"Request budget exceeded: {e}")
+    return HTTPException(
+        status_code=504,
+        detail="Verifikacija nije završena u predviđenom vremenu. Molimo pokušajte ponovo."
+    )
+
+
+async def _run_ai(
+    item_name: str,
+    ocr_text: str,
+    deadline: Deadline | None = None
+) -> AIVerificationResult:
+    """
+    AI semantic match with the local matcher and result cache in front,
+    and local fallback on failure or when the AI runs out of the request budget.
+    """
+    if local_matcher is not None:
+        local_result = local_matcher.decide(item_name, ocr_text)
+        if local_result is not None:
+            return local_result
+    
+    ai_key = make_key(normalize_item_name(item_name), ocr_text)
+    ai_result = await result_cache.get("ai", ai_key, AIVerificationResult) if result_cache else None
+    if ai_result is not None:
+        logger.info("AI verification cache hit")
+        return ai_result
+    
+    try:
+        timeout = deadline.remaining() if deadline is not None else None
+        ai_result = await ai_service.verify_match(item_name, ocr_text, timeout)
+    except ValueError as e:
+        # AI service failed - try fallback
+        logger.warning(f"AI service failed, using fallback: {e}")
+        AI_FALLBACKS.labels("single").inc()
+        return ai_service.verify_match_fallback(item_name, ocr_text)
+    
+    if result_cache is not None:
+        await result_cache.set("ai", ai_key, ai_result)
+    return ai_result
+
+
+async def _run_ai_batch(
+    pairs: List[Tuple[str, str]],
+    batch_size: int | None = None,
+    deadline: Deadline | None = None
+) -> List[AIVerificationResult]:
+    """
+    AI semantic match for many (item_name, ocr_text) pairs.
+    
+    Locally settled, cached and duplicate pairs are resolved first; the rest are
+    packed into prompts of batch_size (default AI_BATCH_SIZE) checks that run concurrently.
+    Chunks the AI does not answer within the request budget fall back locally.
+    """
+    settings = get_settings()
+    results: List[AIVerificationResult | None] = [None] * len(pairs)
+    
+    # Group duplicate pairs so each distinct check is asked once
+    pending: Dict[str, List[int]] = {}
+    for index, (item_name, ocr_text) in enumerate(pairs):
+        if local_matcher is not None:
+            results[index] = local_matcher.decide(item_name, ocr_text)
+            if results[index] is not None:
+                continue
+        
+        ai_key = make_key(normalize_item_name(item_name), ocr_text)
+        cached = await result_cache.get("ai", ai_key, AIVerificationResult) if result_cache else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.setdefault(ai_key, []).append(index)
+    
+    keys = list(pending)
+    batch_size = max(1, batch_size or settings.ai_batch_size)
+    
+    async def run_chunk(chunk_keys: List[str]) -> None:
+        chunk_pairs = [pairs[pending[key][0]] for key in chunk_keys]
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            chunk_results = await ai_service.verify_matches(chunk_pairs, timeout)
+        except ValueError as e:
+            logger.warning(f"AI batch failed, using fallback: {e}")
+            chunk_results = [None] * len(chunk_pairs)
+        
+        for key, (item_name, ocr_text), ai_result in zip(chunk_keys, chunk_pairs, chunk_results):
+            if ai_result is None:
+                AI_FALLBACKS.labels("batch").inc()
+                ai_result = ai_service.verify_match_fallback(item_name, ocr_text)
+            elif result_cache is not None:
+                await result_cache.set("ai", key, ai_result)
+            for index in pending[key]:
+                results[index] = ai_result
+    
+    await asyncio.gather(*(
+        run_chunk(keys[i:i + batch_size]) for i in range(0, len(keys), batch_size)
+    ))
+    return results
+
+
+def _build_response(
+    item_name: str,
+    ocr_result: OCRResult,
+    ai_result: AIVerificationResult | None
+) -> VerifyItemResponse:
+    """
+    Apply the confidence threshold and build the user-facing message.
+    ai_result is None when OCR found no text or the image failed the quality gate.
+    """
+    settings = get_settings()
+    
+    if ocr_result.quality_issue is not None:
+        # Rejected before OCR - tell the user what to fix when retaking the photo
+        return VerifyItemResponse(
+            is_match=False,
+            confidence=0.0,
+            ocr_text="",
+            extracted_price=None,
+            message=RETAKE_MESSAGES[ocr_result.quality_issue]
+        )
+    
+    if ai_result is None:
+        # No text extracted - likely not a valid price tag image
+        return VerifyItemResponse(
+            is_match=False,
+            confidence=0.0,
+            ocr_text="",
+            extracted_price=None,
+            message="Nije moguće pročitati tekst sa slike. Molimo pokušajte sa jasnijom slikom."
+        )
+    
+    # Apply confidence threshold
+    is_match = ai_result.is_match and ai_result.confidence >= settings.confidence_threshold
+    
+    # Generate appropriate message in Bosnian
+    if is_match:
+        message = f"✓ Proizvod potvrđen: '{item_name}' odgovara cjenovniku."
+    else:
+        if ai_result.is_match:
+            # Match found but confidence too low
+            message = (
+                f"⚠ Nisam siguran da '{item_name}' odgovara cjenovniku. "
+                f"Pouzdanost: {ai_result.confidence:.0%}. Molimo provjerite."
+            )
+        else:
+            message = (
+                f"✗ Proizvod '{item_name}' NE odgovara cjenovniku. "
+                f"{ai_result.reasoning}"
+            )
+    
+    logger.info(
+        f"Verification complete: item='{item_name}', "
+        f"match={is_match}, confidence={ai_result.confidence:.2f}"
+    )
+    
+    return VerifyItemResponse(
+        is_match=is_match,
+        confidence=ai_result.confidence,
+        ocr_text=ocr_result.text,
+        extracted_price=ocr_result.extracted_price,
+        message=message
+    )
+
+
+async def _verify_image(
+    item_name: str,
+    image_bytes: bytes,
+    deadline: Deadline
+) -> VerifyItemResponse:
+    """
+    Shared verification pipeline for base64 and binary uploads.
+    OCR (cached by image hash) followed by AI matching (cached by item + text),
+    each within its slice of the request budget.
+    """
+    try:
+        # Step 1: Extract text from image using OCR
+        # Image is processed in-memory and discarded after extraction
+        logger.info(f"Processing verification request for item: '{item_name}'")
+        ocr_result = await _run_ocr_within(image_bytes, deadline)
+        
+        if not ocr_result.text.strip():
+            return _build_response(item_name, ocr_result, None)
+        
+        # Step 2: Use AI to verify semantic match
+        ai_result = await _run_ai(item_name, ocr_result.text, deadline)
+        
+        # Step 3: Apply confidence threshold
+        return _build_response(item_name, ocr_result, ai_result)
+        
+    except DeadlineExceeded as e:
+        raise _deadline_response(e)
+    except ValueError as e:
+        logger.error(f"Verification failed: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Greška pri obradi slike: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error during verification: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Interna greška servera. Molimo pokušajte ponovo."
+        )
+
+
 @app.post("/verify", response_model=VerifyItemResponse)
-async def verify_item(request: VerifyItemRequest):
+async def verify_item(
+    request: VerifyItemRequest,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER)
+):
     """
     Verify if a price tag image matches a shopping item.
     
@@ -124,6 +537,7 @@ async def verify_item(request: VerifyItemRequest):
     
     Args:
         request: VerifyItemRequest with item_name and image_base64
+        budget_ms: Optional X-Request-Budget-Ms header, the caller's latency budget
         
     Returns:
         VerifyItemResponse with match result, confidence, and OCR text
@@ -131,80 +545,204 @@ async def verify_item(request: VerifyItemRequest):
     Raises:
         HTTPException: If OCR or AI processing fails
     """
+    _ensure_services()
+    deadline = _request_deadline(budget_ms)
+    
+    try:
+        image_bytes = base64.b64decode(request.image_base64)
+    except ValueError as e:
+        logger.error(f"Verification failed: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Greška pri obradi slike: {str(e)}"
+        )
+    
+    return await _verify_image(request.item_name, image_bytes, deadline)
+
+
+@app.post("/verify/upload", response_model=VerifyItemResponse)
+async def verify_item_upload(
+    request: Request,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER)
+):
+    """
+    Verify a price tag sent as binary instead of base64 JSON.
+    
+    Accepts either:
+    - multipart/form-data with fields "item_name" and "image" (file)
+    - a raw image/* body with ?item_name=... in the query string
+    
+    The body is streamed into a single buffer and handed to the OCR pipeline
+    without base64 inflation or extra copies.
+    """
+    _ensure_services()
     settings = get_settings()
+    deadline = _request_deadline(budget_ms)
     
-    if ocr_service is None or ai_service is None:
+    try:
+        upload = await read_image_upload(request, settings.max_upload_bytes)
+        item_name = get_item_name(upload)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error(f"Failed to read upload: {e}")
         raise HTTPException(
-            status_code=503,
-            detail="Servisi nisu inicijalizirani. Pokušajte ponovo."
+            status_code=400,
+            detail="Neispravan zahtjev. Slika nije mogla biti pročitana."
         )
     
+    return await _verify_image(item_name, upload.image, deadline)
+
+
+@app.post("/verify/batch", response_model=BatchVerifyResponse)
+async def verify_batch(
+    request: BatchVerifyRequest,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER)
+):
+    """
+    Verify many items in one request (e.g. a whole shopping list).
+    
+    Items may each carry their own image, or share the request-level image.
+    OCR runs once per distinct image (concurrently, in the worker pool), and
+    the AI checks are packed several per prompt. Results come back in the
+    request order, each in the VerifyItemResponse shape.
+    """
+    _ensure_services()
+    deadline = _request_deadline(budget_ms)
+    
     try:
-        # Step 1: Extract text from image using OCR
-        # Image is processed in-memory and discarded after extraction
-        logger.info(f"Processing verification request for item: '{request.item_name}'")
+        logger.info(f"Processing batch verification for {len(request.items)} items")
         
-        ocr_result = ocr_service.process_image(request.image_base64)
+        # Decode each distinct image once
+        images: Dict[str, bytes] = {}
+        for item in request.items:
+            image_base64 = item.image_base64 or request.image_base64
+            if image_base64 not in images:
+                images[image_base64] = base64.b64decode(image_base64)
         
-        if not ocr_result.text.strip():
-            # No text extracted - likely not a valid price tag image
-            return VerifyItemResponse(
-                is_match=False,
-                confidence=0.0,
-                ocr_text="",
-                extracted_price=None,
-                message="Nije moguće pročitati tekst sa slike. Molimo pokušajte sa jasnijom slikom."
-            )
+        # Step 1: OCR once per distinct image
+        image_keys = list(images)
+        ocr_results = await asyncio.gather(*(
+            _run_ocr_within(images[key], deadline) for key in image_keys
+        ))
+        ocr_by_image = dict(zip(image_keys, ocr_results))
+        del images
         
-        # Step 2: Use AI to verify semantic match
-        try:
-            ai_result = ai_service.verify_match(request.item_name, ocr_result.text)
-        except ValueError as e:
-            # AI service failed - try fallback
-            logger.warning(f"AI service failed, using fallback: {e}")
-            ai_result = ai_service.verify_match_fallback(request.item_name, ocr_result.text)
+        item_ocr = [ocr_by_image[item.image_base64 or request.image_base64] for item in request.items]
         
-        # Step 3: Apply confidence threshold
-        is_match = ai_result.is_match and ai_result.confidence >= settings.confidence_threshold
+        # Step 2: Batched AI checks for items whose image had readable text
+        readable = [i for i, ocr_result in enumerate(item_ocr) if ocr_result.text.strip()]
+        ai_results = await _run_ai_batch(
+            [(request.items[i].item_name, item_ocr[i].text) for i in readable],
+            deadline=deadline
+        )
+        ai_by_item = dict(zip(readable, ai_results))
         
-        # Generate appropriate message in Bosnian
-        if is_match:
-            message = f"✓ Proizvod potvrđen: '{request.item_name}' odgovara cjenovniku."
-        else:
-            if ai_result.is_match:
-                # Match found but confidence too low
-                message = (
-                    f"⚠ Nisam siguran da '{request.item_name}' odgovara cjenovniku. "
-                    f"Pouzdanost: {ai_result.confidence:.0%}. Molimo provjerite."
-                )
-            else:
-                message = (
-                    f"✗ Proizvod '{request.item_name}' NE odgovara cjenovniku. "
-                    f"{ai_result.reasoning}"
-                )
+        # Step 3: Per-item responses
+        return BatchVerifyResponse(results=[
+            _build_response(item.item_name, item_ocr[i], ai_by_item.get(i))
+            for i, item in enumerate(request.items)
+        ])
         
-        logger.info(
-            f"Verification complete: item='{request.item_name}', "
-            f"match={is_match}, confidence={ai_result.confidence:.2f}"
+    except DeadlineExceeded as e:
+        raise _deadline_response(e)
+    except ValueError as e:
+        logger.error(f"Batch verification failed: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Greška pri obradi slike: {str(e)}"
         )
+    except Exception as e:
+        logger.error(f"Unexpected error during batch verification: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Interna greška servera. Molimo pokušajte ponovo."
+        )
+
+
+def _rank_matches(matches: List[ItemMatch]) -> None:
+    """
+    Sort list check results in place: matches first, each group by
+    descending confidence.
+    """
+    matches.sort(key=lambda m: (m.is_match, m.confidence), reverse=True)
+
+
+@app.post("/verify/list", response_model=VerifyListResponse)
+async def verify_list(
+    request: VerifyListRequest,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER)
+):
+    """
+    Match one image against every item of a shopping list.
+    
+    OCR runs once. The local matcher accepts or rejects clear-cut items, and
+    the remaining items go to the AI in a single batched prompt. Returns a
+    ranked match for every item.
+    """
+    _ensure_services()
+    settings = get_settings()
+    deadline = _request_deadline(budget_ms)
+    
+    try:
+        logger.info(f"Processing list verification for {len(request.item_names)} items")
         
-        # Return response - image data has already been discarded
-        return VerifyItemResponse(
-            is_match=is_match,
-            confidence=ai_result.confidence,
+        image_bytes = base64.b64decode(request.image_base64)
+        ocr_result = await _run_ocr_within(image_bytes, deadline)
+        del image_bytes
+        
+        matches: List[ItemMatch] = []
+        
+        if not ocr_result.text.strip():
+            matches = [
+                ItemMatch(
+                    item_name=item_name,
+                    is_match=False,
+                    confidence=0.0,
+                    reasoning=(
+                        RETAKE_MESSAGES[ocr_result.quality_issue]
+                        if ocr_result.quality_issue is not None
+                        else "Nije moguće pročitati tekst sa slike."
+                    )
+                )
+                for item_name in request.item_names
+            ]
+        else:
+            # The local matcher settles clear-cut items; the rest share one AI call
+            ai_results = await _run_ai_batch(
+                [(item_name, ocr_result.text) for item_name in request.item_names],
+                batch_size=len(request.item_names),
+                deadline=deadline
+            )
+            for item_name, ai_result in zip(request.item_names, ai_results):
+                matches.append(ItemMatch(
+                    item_name=item_name,
+                    is_match=(
+                        ai_result.is_match
+                        and ai_result.confidence >= settings.confidence_threshold
+                    ),
+                    confidence=ai_result.confidence,
+                    reasoning=ai_result.reasoning
+                ))
+        
+        _rank_matches(matches)
+        
+        return VerifyListResponse(
             ocr_text=ocr_result.text,
             extracted_price=ocr_result.extracted_price,
-            message=message
+            matches=matches
         )
         
+    except DeadlineExceeded as e:
+        raise _deadline_response(e)
     except ValueError as e:
-        logger.error(f"Verification failed: {e}")
+        logger.error(f"List verification failed: {e}")
         raise HTTPException(
             status_code=400,
             detail=f"Greška pri obradi slike: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"Unexpected error during verification: {e}")
+        logger.error(f"Unexpected error during list verification: {e}")
         raise HTTPException(
             status_code=500,
             detail="Interna greška servera. Molimo pokušajte ponovo."
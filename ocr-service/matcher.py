@@ -0,0 +1,430 @@
+"""
+Local Matcher Module.
+Fast string similarity between shopping item names and OCR text.
+
+Settles clear-cut checks without an AI call: the OCR text literally contains
+the item, up to OCR look-alikes (accept); everything else goes to the AI
+model. Works on diacritic-folded
+lowercase tokens, so "Čokolada" and "cokolada" compare equal, and tolerates
+typical OCR confusions (rn/m, l/i, o/a) via a weighted edit distance. With a
+lexicon, synonyms, inflected forms and brands of a category count as exact.
+
+trim_ocr_text() cuts OCR text down to the words relevant to the items for the
+compact AI prompt.
+
+An OCR text is compiled once (tokens plus a trigram -> token index) and
+reused for every item checked against it. Trigram overlap with all tokens
+comes from one pass over the index; the edit distance is banded and stops
+as soon as a token cannot beat the best score found so far.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from lexicon import Lexicon, tokenize
+from models import AIVerificationResult
+
+logger = logging.getLogger(__name__)
+
+# OCR look-alikes (the ones listed in SYSTEM_PROMPT plus digit/letter swaps)
+OCR_CONFUSIONS = (
+    ("rn", "m"), ("cl", "d"), ("vv", "w"),
+    ("l", "i"), ("o", "a"), ("0", "o"), ("1", "l"), ("1", "i"), ("5", "s"),
+)
+CONFUSION_COST = 0.3
+
+# Single-character substitutions and multi-character rewrites, both directions
+_SUBSTITUTION_COSTS: Dict[Tuple[str, str], float] = {}
+_REWRITES: List[Tuple[str, str, float]] = []
+for _a, _b in OCR_CONFUSIONS:
+    if len(_a) == len(_b) == 1:
+        _SUBSTITUTION_COSTS[(_a, _b)] = _SUBSTITUTION_COSTS[(_b, _a)] = CONFUSION_COST
+    else:
+        _REWRITES += [(_a, _b, CONFUSION_COST), (_b, _a, CONFUSION_COST)]
+
+# Last characters of each rewrite, so most cells skip the rewrite check
+_REWRITE_ENDINGS = {(source[-1], target[-1]) for source, target, _ in _REWRITES}
+
+# Skeleton: every confusion group collapsed to one form, so confusions are free
+_SKELETON_REWRITES = [(source, target) for source, target in OCR_CONFUSIONS if len(source) > 1]
+_SKELETON_TABLE = str.maketrans({"i": "l", "1": "l", "a": "o", "0": "o", "5": "s"})
+
+# Edit similarity below this is noise (more than half the token changed)
+MIN_EDIT_SIMILARITY = 0.5
+
+# Score of an item token found in the text only through a brand of its
+# category ("čokoladica" vs "Kinder jaje"). A brand may cover more than the
+# category, so this stays below the local accept threshold and the AI model
+# confirms; the fallback without AI (FALLBACK_MATCH_SCORE) still counts it.
+BRAND_MATCH_SCORE = 0.7
+
+# Distinct OCR texts kept compiled (a list check reuses one text for every item)
+COMPILED_TEXT_CACHE_SIZE = 256
+
+# Compact prompt: words of OCR text kept, the similarity that makes a word
+# relevant to the item, and context words kept around each relevant one
+PROMPT_MAX_WORDS = 16
+PROMPT_RELEVANCE = 0.6
+PROMPT_CONTEXT_WORDS = 2
+
+# Prices, quantities, dates and barcodes: no letters at all, or a number with a
+# unit or currency ("2,49", "500g", "1L", "2.8%", "12,99KM"), or a bare unit
+_NOISE_WORD_RE = re.compile(
+    r"[\W\d_]*|[\d.,/-]*(?:g|dag|dkg|kg|ml|dl|cl|l|kom|km|kn|eur|%)\.?",
+    re.IGNORECASE,
+)
+
+
+def trigrams(token: str) -> Set[str]:
+    """Character trigrams of a token, padded so short tokens still have some."""
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def token_similarity(a: str, b: str) -> float:
+    """Dice coefficient of the two tokens' trigram sets (0.0 - 1.0)."""
+    if a == b:
+        return 1.0
+    grams_a = trigrams(a)
+    grams_b = trigrams(b)
+    return 2.0 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def skeleton(token: str) -> str:
+    """Token with OCR look-alikes collapsed (rn -> m, i/1 -> l, a/0 -> o, ...)."""
+    for source, target in _SKELETON_REWRITES:
+        token = token.replace(source, target)
+    return token.translate(_SKELETON_TABLE)
+
+
+def skeleton_bigrams(token: str) -> FrozenSet[str]:
+    """Distinct padded bigrams of the token's skeleton."""
+    padded = f" {skeleton(token)} "
+    return frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def distance_lower_bound(bigrams_a: FrozenSet[str], bigrams_b: FrozenSet[str]) -> float:
+    """
+    Cheap lower bound of ocr_edit_distance (q-gram count filter): confusions
+    are free on skeletons, and any other edit destroys at most two bigrams.
+    """
+    shared = len(bigrams_a & bigrams_b)
+    return (max(len(bigrams_a), len(bigrams_b)) - shared) / 2.0
+
+
+def ocr_edit_distance(a: str, b: str, max_distance: float = float("inf")) -> float:
+    """
+    Damerau-Levenshtein distance where OCR confusions cost CONFUSION_COST
+    instead of 1, e.g. "rnlijeko" -> "mlijeko" costs 0.3.
+
+    Stops early and returns a value above max_distance once every cell of
+    a row exceeds it.
+    """
+    length_b = len(b)
+    rows: List[List[float]] = [[float(j) for j in range(length_b + 1)]]
+    substitution_costs = _SUBSTITUTION_COSTS
+
+    for i in range(1, len(a) + 1):
+        previous = rows[-1]
+        current = [float(i)] * (length_b + 1)
+        char_a = a[i - 1]
+        row_min = current[0]
+
+        for j in range(1, length_b + 1):
+            char_b = b[j - 1]
+            if char_a == char_b:
+                # Neighbouring cells differ by at most 1, so the diagonal wins
+                best = previous[j - 1]
+            else:
+                best = previous[j - 1] + substitution_costs.get((char_a, char_b), 1.0)
+                if previous[j] + 1.0 < best:
+                    best = previous[j] + 1.0
+                if current[j - 1] + 1.0 < best:
+                    best = current[j - 1] + 1.0
+
+                # Adjacent transposition
+                if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                    if rows[i - 2][j - 2] + 1.0 < best:
+                        best = rows[i - 2][j - 2] + 1.0
+
+                # Multi-character confusions such as rn <-> m
+                if (char_a, char_b) in _REWRITE_ENDINGS:
+                    for source, target, rewrite_cost in _REWRITES:
+                        if (i >= len(source) and j >= len(target)
+                                and a.endswith(source, 0, i) and b.endswith(target, 0, j)):
+                            candidate = rows[i - len(source)][j - len(target)] + rewrite_cost
+                            if candidate < best:
+                                best = candidate
+
+            current[j] = best
+            if best < row_min:
+                row_min = best
+
+        if row_min > max_distance:
+            return max_distance + 1.0
+        rows.append(current)
+
+    return rows[-1][length_b]
+
+
+def edit_similarity(
+    a: str,
+    b: str,
+    min_score: float = MIN_EDIT_SIMILARITY,
+    bigrams_a: Optional[FrozenSet[str]] = None,
+    bigrams_b: Optional[FrozenSet[str]] = None,
+) -> float:
+    """
+    Confusion-aware edit similarity (0.0 - 1.0), or 0.0 when it would be
+    below min_score. min_score bounds the distance computation; pass the
+    skeleton bigrams to skip hopeless pairs without running it.
+    """
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    max_distance = (1.0 - min_score) * longest
+    if abs(len(a) - len(b)) * CONFUSION_COST > max_distance:
+        return 0.0
+    if bigrams_a is None:
+        bigrams_a = skeleton_bigrams(a)
+    if bigrams_b is None:
+        bigrams_b = skeleton_bigrams(b)
+    if distance_lower_bound(bigrams_a, bigrams_b) > max_distance:
+        return 0.0
+
+    score = 1.0 - ocr_edit_distance(a, b, max_distance) / longest
+    return score if score >= min_score else 0.0
+
+
+class CompiledText:
+    """
+    OCR text prepared for matching: word tokens (plus adjacent pairs joined,
+    for words OCR split in two like "mli jeko") and a trigram -> token index.
+    Pure numbers (prices, dates, barcodes) are left out, item names never
+    match them. With a lexicon, the concepts the tokens stand for are indexed
+    too, and apart from them the categories of the brands in the text.
+    """
+
+    def __init__(self, ocr_text: str, lexicon: Optional[Lexicon] = None):
+        tokens = [token for token in tokenize(ocr_text) if not token.isdigit()]
+        self.tokens = tokens + [tokens[i] + tokens[i + 1] for i in range(len(tokens) - 1)]
+        self.token_set = set(self.tokens)
+        self.skeleton_set = {skeleton(token) for token in self.tokens}
+
+        self.concepts: Set[str] = set()
+        self.brand_concepts: Set[str] = set()
+        if lexicon is not None:
+            for token in self.tokens:
+                self.concepts.add(lexicon.concept(token))
+                self.brand_concepts.update(lexicon.categories_of(token))
+
+        # Skeleton bigrams are only needed for tokens that reach the edit stage
+        self._skeleton_bigrams: List[Optional[FrozenSet[str]]] = [None] * len(self.tokens)
+        self.trigram_counts: List[int] = []
+        self.trigram_index: Dict[str, List[int]] = {}
+        for position, token in enumerate(self.tokens):
+            grams = trigrams(token)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_index.setdefault(gram, []).append(position)
+
+    def contains(self, item_token: str) -> bool:
+        """Whether item_token is in the text as is or with only OCR look-alikes swapped."""
+        return item_token in self.token_set or skeleton(item_token) in self.skeleton_set
+
+    def best_score(self, item_token: str) -> float:
+        """
+        Highest similarity of item_token to any OCR token: trigram Dice or
+        confusion-aware edit similarity, whichever is higher.
+        """
+        if item_token in self.token_set:
+            return 1.0
+        if not self.tokens:
+            return 0.0
+
+        # Shared trigram counts for all tokens in one pass over the index
+        item_grams = trigrams(item_token)
+        shared = [0] * len(self.tokens)
+        for gram in item_grams:
+            for position in self.trigram_index.get(gram, ()):
+                shared[position] += 1
+
+        dice = [
+            2.0 * shared[position] / (len(item_grams) + self.trigram_counts[position])
+            for position in range(len(self.tokens))
+        ]
+        best = max(dice)
+        if best >= 1.0:
+            return 1.0
+
+        # Most similar tokens first, so the bound tightens early
+        item_bigrams = skeleton_bigrams(item_token)
+        for position in sorted(range(len(self.tokens)), key=dice.__getitem__, reverse=True):
+            # Only an edit score above the current best can change the result
+            edit = edit_similarity(
+                item_token,
+                self.tokens[position],
+                max(best, MIN_EDIT_SIMILARITY),
+                item_bigrams,
+                self._bigrams_at(position),
+            )
+            if edit > best:
+                best = edit
+                if best >= 1.0:
+                    break
+        return best
+
+    def _bigrams_at(self, position: int) -> FrozenSet[str]:
+        bigrams = self._skeleton_bigrams[position]
+        if bigrams is None:
+            bigrams = self._skeleton_bigrams[position] = skeleton_bigrams(self.tokens[position])
+        return bigrams
+
+
+@lru_cache(maxsize=COMPILED_TEXT_CACHE_SIZE)
+def compile_text(ocr_text: str, lexicon: Optional[Lexicon] = None) -> CompiledText:
+    """Compiled form of an OCR text, cached by its content."""
+    return CompiledText(ocr_text, lexicon)
+
+
+def similarity(item_name: str, ocr_text: str, lexicon: Optional[Lexicon] = None) -> float:
+    """
+    How well the OCR text covers the item name (0.0 - 1.0).
+    Each item token is matched to its most similar OCR token; scores are averaged.
+    A token whose lexicon concept appears in the text scores 1.0, one whose
+    category is only named by a brand at least BRAND_MATCH_SCORE.
+    """
+    item_tokens = [t for t in tokenize(item_name) if not t.isdigit()]
+    if not item_tokens:
+        return 0.0
+
+    compiled = compile_text(ocr_text, lexicon)
+    total = 0.0
+    for token in item_tokens:
+        concept = lexicon.concept(token) if lexicon is not None else None
+        if concept in compiled.concepts:
+            total += 1.0
+        elif concept in compiled.brand_concepts:
+            total += max(BRAND_MATCH_SCORE, compiled.best_score(token))
+        else:
+            total += compiled.best_score(token)
+    return total / len(item_tokens)
+
+
+def exact_coverage(item_name: str, ocr_text: str, lexicon: Optional[Lexicon] = None) -> float:
+    """
+    Share of item tokens found in the OCR text verbatim, with only OCR
+    look-alikes swapped ("rnlijeko"), or through a lexicon concept (0.0 - 1.0).
+    A category covered by a brand in the text counts only when the item names
+    that brand itself ("Snickers čokoladica"). Unlike similarity(), an
+    arbitrary letter change ("salama" / "salata") does not count at all.
+    """
+    item_tokens = [t for t in tokenize(item_name) if not t.isdigit()]
+    if not item_tokens:
+        return 0.0
+
+    compiled = compile_text(ocr_text, lexicon)
+    names_brand = lexicon is not None and any(
+        lexicon.categories_of(token) and compiled.contains(token) for token in item_tokens
+    )
+    found = 0
+    for token in item_tokens:
+        concept = lexicon.concept(token) if lexicon is not None else None
+        if concept in compiled.concepts or compiled.contains(token):
+            found += 1
+        elif names_brand and concept in compiled.brand_concepts:
+            found += 1
+    return found / len(item_tokens)
+
+
+def _word_relevance(word: str, item_tokens: Set[str], lexicon: Optional[Lexicon]) -> float:
+    """Best similarity of any token of an OCR word to any item token."""
+    best = 0.0
+    for token in tokenize(word):
+        for item_token in item_tokens:
+            if lexicon is not None and lexicon.concept(item_token) in lexicon.concepts_of(token):
+                return 1.0
+            best = max(best, token_similarity(item_token, token), edit_similarity(item_token, token))
+    return best
+
+
+def trim_ocr_text(
+    ocr_text: str,
+    item_names: Iterable[str],
+    lexicon: Optional[Lexicon] = None,
+    max_words: int = PROMPT_MAX_WORDS,
+) -> str:
+    """
+    OCR text cut down for the AI prompt. Price, quantity, date and barcode
+    words are dropped. A text still longer than max_words keeps the words
+    resembling an item, most similar first, each with two words of context on
+    either side, in their original order. When no word resembles an item, the
+    leading words are kept (tags start with the product name), which is enough
+    for the model to reject the check.
+    """
+    words = [word for word in ocr_text.split() if not _NOISE_WORD_RE.fullmatch(word)]
+    if len(words) <= max_words:
+        return " ".join(words)
+
+    item_tokens = {t for name in item_names for t in tokenize(name) if not t.isdigit()}
+    scores = [_word_relevance(word, item_tokens, lexicon) for word in words]
+    relevant = [position for position, score in enumerate(scores) if score >= PROMPT_RELEVANCE]
+    if not relevant:
+        return " ".join(words[:max_words])
+
+    keep: Set[int] = set()
+    for position in sorted(relevant, key=scores.__getitem__, reverse=True):
+        start = max(0, position - PROMPT_CONTEXT_WORDS)
+        window = range(start, min(len(words), position + PROMPT_CONTEXT_WORDS + 1))
+        if keep and len(keep.union(window)) > max_words:
+            break
+        keep.update(window)
+    return " ".join(words[position] for position in sorted(keep))
+
+
+class LocalMatcher:
+    """
+    Decision stage in front of the AI model.
+    Accepts checks whose item is clearly in the text and counts how many it settled.
+    Clearly means exact_coverage(): a fuzzy similarity of 0.8 is one changed
+    letter in a six-letter word, and that is often a different product.
+
+    It never rejects: a low lexical score does not mean a mismatch. A tag
+    names a product ("Cedevita narandža 1L"), the list names a category
+    ("sok"), and telling the two apart needs the model.
+    """
+
+    def __init__(self, accept_threshold: float, lexicon: Optional[Lexicon] = None):
+        self.accept_threshold = accept_threshold
+        self.lexicon = lexicon
+        self.accepted = 0
+        self.escalated = 0
+
+    def decide(self, item_name: str, ocr_text: str) -> Optional[AIVerificationResult]:
+        """
+        Return a match result when the text clearly contains the item, or None
+        when the check should go to the AI model.
+        """
+        score = exact_coverage(item_name, ocr_text, self.lexicon)
+
+        if score >= self.accept_threshold:
+            self.accepted += 1
+            logger.info(f"Local match accepted: item='{item_name}', score={score:.2f}")
+            return AIVerificationResult(
+                is_match=True,
+                confidence=round(min(0.95, 0.6 + 0.35 * score), 2),
+                reasoning=f"Artikal '{item_name}' pronađen u tekstu ({score:.0%} riječi naziva)."
+            )
+
+        self.escalated += 1
+        return None
+
+    def stats(self) -> dict:
+        total = self.accepted + self.escalated
+        return {
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "settled_fraction": round(self.accepted / total, 3) if total else 0.0,
+        }
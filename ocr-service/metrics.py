@@ -0,0 +1,221 @@
+"""
+Metrics Module.
+Prometheus metrics, served on GET /metrics.
+
+Latencies are histograms observed where the work happens. OCR stages are timed
+inside the worker and come back with the result (StageTimings), so they are
+observed in the API process even when OCR runs in a process pool.
+
+Counters the service already keeps for /health (result cache, OpenAI pool,
+circuit breaker, local matcher, OCR queue) are not counted a second time: a
+collector reads them from the same stats at scrape time.
+"""
+
+from typing import Callable, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from strategy_scheduler import parse_strategy
+from timings import StageTimings
+
+# Decode, resize, preprocessing and single Tesseract passes take milliseconds
+STAGE_BUCKETS = (0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Whole requests, OCR jobs and model calls take up to the request budget
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+REQUEST_SECONDS = Histogram(
+    "request_duration_seconds", "Time to answer an HTTP request",
+    ["endpoint", "status"], buckets=REQUEST_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge("requests_in_flight", "HTTP requests being answered")
+
+OCR_STAGE_SECONDS = Histogram(
+    "ocr_stage_seconds", "Time per OCR pipeline stage (decode, resize, quality, regions, variant:<name>, phash)",
+    ["stage"], buckets=STAGE_BUCKETS
+)
+OCR_ATTEMPT_SECONDS = Histogram(
+    "ocr_attempt_seconds", "Time per Tesseract attempt",
+    ["variant", "psm"], buckets=STAGE_BUCKETS
+)
+OCR_JOB_SECONDS = Histogram(
+    "ocr_job_seconds", "Time from handing an image to the OCR pool until its result, queueing included",
+    buckets=REQUEST_BUCKETS
+)
+OCR_EARLY_EXITS = Counter("ocr_early_exits_total", "OCR jobs that stopped at the first good attempt")
+OCR_STRATEGY_WINS = Counter(
+    "ocr_strategy_wins_total", "OCR jobs whose text came from this strategy", ["variant", "psm"]
+)
+OCR_PHASH_HITS = Counter("ocr_phash_hits_total", "OCR jobs answered from a near-duplicate image")
+OCR_ATTEMPTS_PER_JOB = Histogram(
+    "ocr_attempts_per_job", "Tesseract passes per OCR job", buckets=(1, 2, 3, 4, 5, 6, 7, 8, 9)
+)
+OCR_REGIONS_PER_JOB = Histogram(
+    "ocr_regions_per_job", "Text regions read per OCR job, 0 = the whole frame", buckets=(0, 1, 2, 3, 4, 6)
+)
+OCR_PIXELS_PER_JOB = Histogram(
+    "ocr_pixels_per_job", "Pixels of the frame or region crops read per OCR job",
+    buckets=(25_000, 50_000, 100_000, 200_000, 400_000, 600_000, 900_000, 1_500_000)
+)
+
+IMAGE_SHARPNESS = Histogram(
+    "image_sharpness", "Quality gate sharpness score (variance of the Laplacian) per image",
+    buckets=(5, 10, 20, 40, 80, 160, 320, 640, 1280, 2560, 5120)
+)
+IMAGE_BRIGHTNESS = Histogram(
+    "image_brightness", "Quality gate mean brightness (0-255) per image",
+    buckets=(25, 50, 75, 100, 125, 150, 175, 200, 225, 235, 245)
+)
+QUALITY_REJECTIONS = Counter(
+    "quality_rejections_total", "Images rejected by the quality gate before OCR",
+    ["reason"]
+)
+
+AI_CALL_SECONDS = Histogram(
+    "ai_call_seconds", "Time per model call, retries and hedges included",
+    ["kind", "outcome"], buckets=REQUEST_BUCKETS
+)
+AI_FALLBACKS = Counter(
+    "ai_fallbacks_total", "Checks answered by the local fallback because the AI failed", ["kind"]
+)
+
+
+def _strategy_labels(strategy: str) -> Tuple[str, str]:
+    """("enhanced", "3") for "enhanced/psm3"."""
+    variant, psm = parse_strategy(strategy)
+    return variant, str(psm)
+
+
+def observe_ocr(timings: StageTimings) -> None:
+    """Record the stage durations and outcome of one OCR job."""
+    passes = 0
+    for stage, durations in timings.stages.items():
+        if stage.startswith("ocr:"):
+            histogram = OCR_ATTEMPT_SECONDS.labels(*_strategy_labels(stage[len("ocr:"):]))
+            passes += len(durations)
+        else:
+            histogram = OCR_STAGE_SECONDS.labels(stage)
+        for seconds in durations:
+            histogram.observe(seconds)
+
+    if passes:
+        OCR_ATTEMPTS_PER_JOB.observe(passes)
+        OCR_REGIONS_PER_JOB.observe(timings.regions)
+        OCR_PIXELS_PER_JOB.observe(timings.pixels)
+    if timings.winner is not None:
+        OCR_STRATEGY_WINS.labels(*_strategy_labels(timings.winner)).inc()
+    if timings.early_exit:
+        OCR_EARLY_EXITS.inc()
+    if timings.phash_hit:
+        OCR_PHASH_HITS.inc()
+    if timings.sharpness is not None:
+        IMAGE_SHARPNESS.observe(timings.sharpness)
+        IMAGE_BRIGHTNESS.observe(timings.brightness)
+    if timings.rejected is not None:
+        QUALITY_REJECTIONS.labels(timings.rejected).inc()
+
+
+class StatsCollector(Collector):
+    """
+    Exports the /health counters. read_stats returns the same dicts as
+    /health ("cache", "openai", "local_matcher", "ocr_jobs",
+    "strategy_scheduler"), None for components that are off or not started yet.
+    """
+
+    def __init__(self):
+        self.read_stats: Optional[Callable[[], dict]] = None
+
+    def collect(self) -> Iterator[Metric]:
+        if self.read_stats is None:
+            return
+        stats = self.read_stats()
+
+        cache = stats.get("cache")
+        if cache:
+            yield GaugeMetricFamily("cache_entries", "Entries in the result cache", value=cache["entries"])
+            lookups = CounterMetricFamily(
+                "cache_lookups", "Result cache lookups", labels=["namespace", "outcome"]
+            )
+            for namespace, counters in cache["counters"].items():
+                lookups.add_metric([namespace, "hit"], counters["hits"])
+                lookups.add_metric([namespace, "miss"], counters["misses"])
+            yield lookups
+
+        ocr_jobs = stats.get("ocr_jobs")
+        if ocr_jobs:
+            yield GaugeMetricFamily(
+                "ocr_jobs_in_flight", "OCR jobs running in the worker pool", value=ocr_jobs["in_flight"]
+            )
+            yield GaugeMetricFamily(
+                "ocr_jobs_queued", "OCR jobs waiting for a free worker", value=ocr_jobs["queued"]
+            )
+
+        pool = stats.get("openai")
+        if pool:
+            yield GaugeMetricFamily("ai_calls_in_flight", "Model calls in progress", value=pool["in_flight"])
+            yield GaugeMetricFamily(
+                "ai_calls_queued", "Model calls waiting for a concurrency slot", value=pool["queued"]
+            )
+            for name, description in (
+                ("calls", "Model calls answered"),
+                ("retries", "Model call retries"),
+                ("failures", "Model calls that failed after all retries"),
+                ("queue_timeouts", "Model calls that gave up waiting for a slot"),
+                ("hedges", "Hedged duplicate model calls"),
+                ("hedge_wins", "Hedged calls that answered first"),
+                ("deadline_timeouts", "Model calls cut off by the request budget"),
+            ):
+                yield CounterMetricFamily(f"ai_{name}", description, value=pool[name])
+
+            circuit = pool.get("circuit")
+            if circuit:
+                state = GaugeMetricFamily("ai_circuit_state", "Circuit breaker state", labels=["state"])
+                for name in CIRCUIT_STATES:
+                    state.add_metric([name], 1 if circuit["state"] == name else 0)
+                yield state
+                yield CounterMetricFamily(
+                    "ai_circuit_opened", "Times the circuit opened", value=circuit["times_opened"]
+                )
+                yield CounterMetricFamily(
+                    "ai_short_circuited", "Model calls skipped while the circuit was open",
+                    value=circuit["short_circuited"]
+                )
+
+        scheduler = stats.get("strategy_scheduler")
+        if scheduler:
+            yield CounterMetricFamily(
+                "ocr_scheduler_explorations", "OCR jobs that tried every strategy in random order",
+                value=scheduler["explored"]
+            )
+            pruned = GaugeMetricFamily(
+                "ocr_strategy_pruned", "1 while the scheduler skips this strategy", labels=["variant", "psm"]
+            )
+            for strategy, values in scheduler["strategies"].items():
+                pruned.add_metric(list(_strategy_labels(strategy)), 1 if values["pruned"] else 0)
+            yield pruned
+
+        matcher = stats.get("local_matcher")
+        if matcher:
+            decisions = CounterMetricFamily(
+                "local_matcher_decisions", "Local matcher decisions", labels=["decision"]
+            )
+            for decision in ("accepted", "escalated"):
+                decisions.add_metric([decision], matcher[decision])
+            yield decisions
+
+
+_stats_collector = StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def register_stats(read_stats: Callable[[], dict]) -> None:
+    """Set the function that returns the service's current stats."""
+    _stats_collector.read_stats = read_stats
+
+
+def render() -> bytes:
+    """All metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY)
@@ -3,8 +3,8 @@ Pydantic models for request/response validation.
 Ensures type safety and clear API contracts.
 """
 
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import List, Optional
 
 
 class VerifyItemRequest(BaseModel):
@@ -64,6 +64,118 @@ class VerifyItemResponse(BaseModel):
     )
 
 
+class BatchVerifyItem(BaseModel):
+    """
+    One item check within a batch request.
+    
+    Attributes:
+        item_name: The shopping list item name
+        image_base64: Image for this item; omitted to use the batch's shared image
+    """
+    model_config = ConfigDict(populate_by_name=True)
+    
+    item_name: str = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        alias="itemName",
+        validation_alias="item_name",
+        description="Shopping item name from the list"
+    )
+    image_base64: Optional[str] = Field(
+        None,
+        min_length=100,
+        alias="imageBase64",
+        validation_alias="image_base64",
+        description="Base64-encoded image of the price tag for this item"
+    )
+
+
+class BatchVerifyRequest(BaseModel):
+    """
+    Request model for batch verification.
+    
+    Either every item carries its own image, or a single shared image is
+    checked against all item names (or a mix of both).
+    """
+    model_config = ConfigDict(populate_by_name=True)
+    
+    items: List[BatchVerifyItem] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Item checks to run"
+    )
+    image_base64: Optional[str] = Field(
+        None,
+        min_length=100,
+        alias="imageBase64",
+        validation_alias="image_base64",
+        description="Shared base64 image for items without their own image"
+    )
+    
+    @model_validator(mode="after")
+    def check_images(self) -> "BatchVerifyRequest":
+        if self.image_base64 is None and any(item.image_base64 is None for item in self.items):
+            raise ValueError("Every item needs image_base64 unless a shared image_base64 is given")
+        return self
+
+
+class BatchVerifyResponse(BaseModel):
+    """
+    Response model for batch verification.
+    Results are in the same order as the request items.
+    """
+    results: List[VerifyItemResponse]
+
+
+class VerifyListRequest(BaseModel):
+    """
+    Request model for checking one image against a whole shopping list.
+    
+    Attributes:
+        item_names: Item names from the list
+        image_base64: Base64-encoded image (e.g. a shelf photo with several tags)
+    """
+    model_config = ConfigDict(populate_by_name=True)
+    
+    item_names: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        alias="itemNames",
+        validation_alias="item_names",
+        description="Shopping item names to check against the image"
+    )
+    image_base64: str = Field(
+        ...,
+        min_length=100,
+        alias="imageBase64",
+        validation_alias="image_base64",
+        description="Base64-encoded image of the price tag(s)"
+    )
+
+
+class ItemMatch(BaseModel):
+    """
+    Match result for one item of a list check.
+    """
+    item_name: str
+    is_match: bool
+    confidence: float = Field(..., ge=0.0, le=1.0)
+    reasoning: str
+
+
+class VerifyListResponse(BaseModel):
+    """
+    Response model for a list check.
+    Matches are ranked from most to least likely.
+    """
+    ocr_text: str
+    extracted_price: Optional[str] = None
+    matches: List[ItemMatch]
+
+
 class OCRResult(BaseModel):
     """
     Internal model for OCR processing results.
@@ -71,6 +183,8 @@ class OCRResult(BaseModel):
     text: str
     confidence: float = 0.0
     extracted_price: Optional[str] = None
+    # Why the quality gate rejected the image before OCR (see quality_gate.py)
+    quality_issue: Optional[str] = None
 
 
 class AIVerificationResult(BaseModel):
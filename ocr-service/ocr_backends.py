@@ -0,0 +1,126 @@
+"""
+OCR Backends Module.
+Pluggable Tesseract engines used by the OCR service.
+
+Available backends:
+- tesserocr: keeps the Tesseract API (and the traineddata) loaded in memory,
+  so each OCR attempt is a direct library call
+- pytesseract: spawns a tesseract process per call (fallback, no native binding)
+
+Both run with the same TesseractProfile (see tesseract_profile.py).
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from PIL import Image
+import pytesseract
+
+from config import Settings
+from tesseract_profile import OEM_LSTM_ONLY, TesseractProfile, create_profile
+
+logger = logging.getLogger(__name__)
+
+
+class OCRBackend:
+    """
+    Base class for OCR engines.
+    Backends only turn an image into raw text; cleaning and scoring stay in OCRService.
+    """
+
+    name = "base"
+
+    def __init__(self, lang: str, profile: Optional[TesseractProfile] = None):
+        self.lang = lang
+        self.profile = profile or TesseractProfile(name="plain")
+
+    def warm_up(self) -> None:
+        """Load whatever the backend needs before the first request."""
+
+    def image_to_string(self, image: Image.Image, psm: int) -> str:
+        raise NotImplementedError
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Subprocess-based backend.
+    Every call writes a temp image and runs the tesseract binary.
+    """
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image, psm: int) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.profile.command_line(psm))
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    In-process backend built on the tesserocr (libtesseract) binding.
+
+    One API handle per worker thread: the language model is loaded once and
+    the page segmentation mode is switched per call. Tesseract handles are not
+    thread-safe, so they are never shared between threads. Profile variables
+    are set at initialization, where Tesseract reads the user words.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str, tessdata_path: str = "", profile: Optional[TesseractProfile] = None):
+        super().__init__(lang, profile)
+        # Import here so a missing binding only disables this backend
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._tessdata_path = tessdata_path or None
+        self._local = threading.local()
+
+    def _get_api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            oem = (
+                self._tesserocr.OEM.LSTM_ONLY if self.profile.oem == OEM_LSTM_ONLY
+                else self._tesserocr.OEM.DEFAULT
+            )
+            kwargs = {"lang": self.lang, "oem": oem, "variables": self.profile.variables()}
+            if self._tessdata_path:
+                kwargs["path"] = self._tessdata_path
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+            logger.info(f"Loaded Tesseract model '{self.lang}' in-process ({self.profile.name} profile)")
+        return api
+
+    def warm_up(self) -> None:
+        self._get_api()
+
+    def image_to_string(self, image: Image.Image, psm: int) -> str:
+        api = self._get_api()
+        api.SetPageSegMode(psm)
+        api.SetImage(image)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+
+def create_backend(settings: Settings) -> OCRBackend:
+    """
+    Create the configured OCR backend.
+    Falls back to pytesseract when the in-process binding is unavailable.
+    """
+    lang = settings.ocr_language or 'hrv'
+    profile = create_profile(settings)
+    backend: Optional[OCRBackend] = None
+
+    if settings.ocr_backend == "tesserocr":
+        try:
+            backend = TesserocrBackend(lang, settings.tessdata_path, profile)
+            backend.warm_up()
+        except Exception as e:
+            logger.warning(f"tesserocr backend unavailable, falling back to pytesseract: {e}")
+            backend = None
+
+    if backend is None:
+        backend = PytesseractBackend(lang, profile)
+
+    return backend
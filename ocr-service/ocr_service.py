@@ -4,25 +4,68 @@ Handles image processing and text extraction using Tesseract OCR.
 
 The service is designed to:
 - Process images in-memory only (no file system storage)
+- Run Tesseract in-process when the tesserocr binding is available
 - Support Bosnian/Croatian text recognition
 - Focus on detecting product names and words (NOT prices)
 - Filter out noise and garbage text
 """
 
 import base64
-import io
 import re
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Tuple, List
 
-from PIL import Image, ImageEnhance, ImageOps, ImageFilter
-import pytesseract
+from PIL import Image
 
-from config import get_settings
+from config import Settings, get_settings
+from ocr_backends import create_backend
+from phash_index import PerceptualHashIndex, region_hash
+from preprocessing import build_variants, load_image
 from models import OCRResult
+from quality_gate import check_quality
+from strategy_scheduler import DEFAULT_STRATEGIES, parse_strategy
+from text_regions import find_text_regions
+from timings import StageTimings, measure
 
 logger = logging.getLogger(__name__)
 
+# (text, confidence, strategy) of one OCR attempt
+StrategyResult = Tuple[str, float, Optional[str]]
+NO_RESULT: StrategyResult = ("", 0.0, None)
+
+# Per-worker OCR service instance (one per pool process/thread pool)
+_worker_service: Optional["OCRService"] = None
+
+
+def init_worker() -> None:
+    """
+    Executor initializer.
+    Creates the OCR service once per worker instead of once per request
+    and loads the Tesseract model for the calling worker thread.
+    """
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = OCRService()
+    _worker_service.backend.warm_up()
+
+
+def process_image_in_worker(
+    image_bytes: bytes, plan: Optional[List[str]] = None
+) -> Tuple[OCRResult, StageTimings]:
+    """
+    Executor entry point for OCR processing.
+    Must be a module-level function so it can be pickled for process pools.
+    
+    plan is the strategy order from the API process's scheduler. Returns the
+    result with its stage timings, so metrics and the scheduler are fed in the
+    API process whichever executor ran the work.
+    """
+    if _worker_service is None:
+        init_worker()
+    timings = StageTimings()
+    return _worker_service.process_image_bytes(image_bytes, timings, plan), timings
+
 
 class OCRService:
     """
@@ -32,146 +75,280 @@ class OCRService:
     Focuses on extracting clean, readable words.
     """
     
-    def __init__(self):
-        self.settings = get_settings()
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.backend = create_backend(self.settings)
+        logger.info(f"OCR backend: {self.backend.name}")
+        
+        # Optional thread pool for running OCR strategies in parallel.
+        # Tesseract releases the GIL, so threads use spare cores.
+        self._strategy_pool: Optional[ThreadPoolExecutor] = None
+        if self.settings.ocr_parallel_strategies:
+            self._strategy_pool = ThreadPoolExecutor(
+                max_workers=max(1, self.settings.ocr_strategy_workers),
+                thread_name_prefix="ocr-strategy",
+                initializer=self.backend.warm_up
+            )
+        
+        # Optional thread pool for reading several tag regions of one photo at once
+        self._region_pool: Optional[ThreadPoolExecutor] = None
+        if self.settings.ocr_text_regions and self.settings.ocr_region_workers > 1:
+            self._region_pool = ThreadPoolExecutor(
+                max_workers=self.settings.ocr_region_workers,
+                thread_name_prefix="ocr-region",
+                initializer=self.backend.warm_up
+            )
+        
+        # Recent perceptual hashes, so re-shot photos of the same tag skip Tesseract
+        self._phash_index: Optional[PerceptualHashIndex] = None
+        if self.settings.phash_index_size > 0:
+            self._phash_index = PerceptualHashIndex(
+                self.settings.phash_index_size,
+                self.settings.phash_max_distance
+            )
     
     def process_image(self, image_base64: str) -> OCRResult:
         """
         Process a base64-encoded image and extract product names/words.
-        Optimized for speed - uses fewer combinations.
         """
         try:
             # Decode base64 to bytes (in-memory)
             image_bytes = base64.b64decode(image_base64)
+        except Exception as e:
+            logger.error(f"Base64 decoding failed: {str(e)}")
+            raise ValueError(f"Failed to process image: {str(e)}")
+        
+        return self.process_image_bytes(image_bytes)
+    
+    def process_image_bytes(
+        self,
+        image_bytes: bytes,
+        timings: Optional[StageTimings] = None,
+        plan: Optional[List[str]] = None
+    ) -> OCRResult:
+        """
+        Process decoded image bytes and extract product names/words.
+        Optimized for speed - uses fewer combinations.
+        
+        plan lists the "<variant>/psm<N>" strategies to try, in order
+        (see StrategyScheduler); without it the hand-tuned order is used.
+        
+        With timings, every stage (decode, resize, quality, regions, variants,
+        each Tesseract pass as "ocr:<variant>/psm<N>") is recorded into it,
+        along with the quality scores, the winning strategy, whether the run
+        stopped early, and the regions and pixels read.
+        
+        Images failing the quality gate are not read; the result is empty with
+        quality_issue set.
+        """
+        try:
+            # Decode (reduced-scale for JPEGs), downscale and convert to grayscale
+            # in one step - resizing speeds up OCR significantly
+            gray = load_image(image_bytes, self.settings.ocr_max_dimension, timings)
+            
+            # Blurry, dark or tiny photos cannot be read, so no OCR time is spent on them
+            if self.settings.quality_gate_enabled:
+                with measure(timings, "quality"):
+                    quality = check_quality(gray, self.settings)
+                if timings is not None:
+                    timings.sharpness = quality.sharpness
+                    timings.brightness = quality.brightness
+                    timings.rejected = quality.issue
+                if quality.issue is not None:
+                    logger.info(
+                        f"Image rejected by quality gate: {quality.issue} "
+                        f"({quality.width}x{quality.height}, sharpness {quality.sharpness:.0f}, "
+                        f"brightness {quality.brightness:.0f}, contrast {quality.contrast:.0f})"
+                    )
+                    return OCRResult(text="", confidence=0.0, quality_issue=quality.issue)
+            
+            # Likely tag regions, for reading and for the near-duplicate hash
+            regions = []
+            if self.settings.ocr_text_regions or self._phash_index is not None:
+                regions = find_text_regions(gray, self.settings.ocr_max_regions, timings)
+            
+            # Near-duplicate lookup on the text regions of the downscaled grayscale image
+            image_phash = None
+            if self._phash_index is not None:
+                with measure(timings, "phash"):
+                    image_phash = region_hash(gray, regions)
+                    cached = self._phash_index.lookup(image_phash)
+                if cached is not None:
+                    if timings is not None:
+                        timings.phash_hit = True
+                    return cached
+            
+            # Read only the likely tag regions; the whole frame if none are found
+            # or the crops find no text
+            best_result, early_exit = NO_RESULT, False
+            if regions and self.settings.ocr_text_regions:
+                crops = [gray.crop(box) for box in regions]
+                best_result, early_exit = self._ocr_regions(crops, plan, timings)
+                if timings is not None:
+                    timings.regions = len(crops)
+                    timings.pixels = sum(crop.width * crop.height for crop in crops)
             
-            # Open image from bytes
-            original_image = Image.open(io.BytesIO(image_bytes))
-            
-            # Resize if too large (speeds up OCR significantly)
-            max_dimension = 1200
-            if max(original_image.size) > max_dimension:
-                ratio = max_dimension / max(original_image.size)
-                new_size = tuple(int(dim * ratio) for dim in original_image.size)
-                original_image = original_image.resize(new_size, Image.Resampling.LANCZOS)
-                logger.info(f"Resized image to {new_size} for faster processing")
-            
-            # Convert to RGB if necessary
-            if original_image.mode not in ('RGB', 'L'):
-                original_image = original_image.convert('RGB')
-            
-            # Get language setting
-            lang = self.settings.ocr_language or 'hrv'
-            
-            # Try multiple OCR strategies (REDUCED for speed)
-            results = []
-            best_result = ("", 0.0)
-            
-            # Prepare image versions (REDUCED to 3 most effective)
-            gray = original_image.convert('L')
-            
-            # Enhance sharpness + contrast (combined for speed)
-            enhanced = ImageEnhance.Sharpness(gray).enhance(1.8)
-            enhanced = ImageEnhance.Contrast(enhanced).enhance(1.5)
-            
-            # Binarized (black and white)
-            binary = self._binarize_otsu(enhanced)
-            
-            # Only 3 most effective PSM modes (REDUCED from 5)
-            configs = [
-                '--oem 3 --psm 3',   # Auto (works for most cases)
-                '--oem 3 --psm 11',  # Sparse text (price tags)
-                '--oem 3 --psm 6',   # Single block
-            ]
-            
-            # Only 3 image versions (REDUCED from 5)
-            images_to_try = [enhanced, binary, gray]
-            
-            # Try combinations but stop early if we get good results
-            for img in images_to_try:
-                for config in configs:
-                    result = self._try_ocr(img, lang, config)
-                    if result[0]:  # If we got any text
-                        results.append(result)
-                        
-                        # Early exit: if we get good text (5+ words), stop trying
-                        word_count = len(result[0].split())
-                        if word_count >= 5 and result[1] >= 0.6:
-                            logger.info(f"Early exit: found {word_count} words with confidence {result[1]:.2f}")
-                            best_result = result
-                            break
-                
-                # Break outer loop too if we found good result
-                if best_result[0]:
-                    break
-            
-            # Pick the best result
             if not best_result[0]:
-                best_result = self._select_best_result(results)
+                best_result, early_exit = self._ocr_image(gray, plan, timings)
+                if timings is not None:
+                    timings.pixels += gray.width * gray.height
             
-            best_text, best_confidence = best_result
+            best_text, best_confidence, strategy = best_result
+            if timings is not None:
+                timings.winner = strategy
+                timings.early_exit = early_exit
             
             # Clean up
-            del original_image, gray, enhanced, binary, image_bytes
+            del gray, image_bytes
             
             logger.info(f"OCR completed. Text: '{best_text}', Confidence: {best_confidence:.2f}")
             
-            return OCRResult(
+            result = OCRResult(
                 text=best_text,
                 confidence=best_confidence,
                 extracted_price=None
             )
             
+            # Only remember readable results; unreadable shots should be retried
+            if image_phash is not None and best_text:
+                self._phash_index.add(image_phash, result)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"OCR processing failed: {str(e)}")
             raise ValueError(f"Failed to process image: {str(e)}")
     
-    def _binarize_otsu(self, image: Image.Image) -> Image.Image:
+    def _ocr_regions(
+        self, crops: List[Image.Image], plan: Optional[List[str]], timings: Optional[StageTimings]
+    ) -> Tuple[StrategyResult, bool]:
         """
-        Binarize image using Otsu's method approximation.
+        OCR every region crop (concurrently on the region pool when there are
+        several) and join their texts in reading order.
+        The strategy of the crop with the most text is reported as the winner.
         """
-        if image.mode != 'L':
-            image = image.convert('L')
-        
-        # Get histogram
-        histogram = image.histogram()
-        
-        # Calculate Otsu threshold
-        total_pixels = image.width * image.height
-        sum_total = sum(i * histogram[i] for i in range(256))
+        if self._region_pool is not None and len(crops) > 1:
+            outcomes = list(self._region_pool.map(lambda crop: self._ocr_image(crop, plan, timings), crops))
+        else:
+            outcomes = [self._ocr_image(crop, plan, timings) for crop in crops]
+        
+        texts = [result[0] for result, _ in outcomes if result[0]]
+        if not texts:
+            return NO_RESULT, False
+        
+        main_result, early_exit = max(outcomes, key=lambda outcome: len(outcome[0][0]))
+        text = ' '.join(texts)
+        return (text, self._calculate_confidence(text), main_result[2]), early_exit
+    
+    def _ocr_image(
+        self, gray: Image.Image, plan: Optional[List[str]], timings: Optional[StageTimings]
+    ) -> Tuple[StrategyResult, bool]:
+        """
+        Try the planned strategies on one grayscale image (the frame or a region crop).
+        Returns the chosen result and whether it was good enough to stop early.
+        """
+        # Try multiple OCR strategies (REDUCED for speed)
+        # Prepare image versions (REDUCED to 3 most effective)
+        # Enhanced (sharpness + contrast) and binarized (black and white)
+        # Both are cheap next to a Tesseract pass, so they are built even if the plan skips one
+        enhanced, binary = build_variants(
+            gray,
+            method=self.settings.ocr_preprocessing,
+            binarization=self.settings.ocr_binarization,
+            stretch=self.settings.ocr_contrast_stretch,
+            timings=timings
+        )
+        
+        images = {"enhanced": enhanced, "binary": binary, "gray": gray}
+        
+        strategies = []
+        for strategy in plan or DEFAULT_STRATEGIES:
+            name, psm = parse_strategy(strategy)
+            strategies.append((name, images[name], psm))
+        
+        # Try combinations but stop early if we get good results
+        if self._strategy_pool is not None:
+            results, best_result = self._run_strategies_parallel(strategies, timings)
+        else:
+            results, best_result = self._run_strategies_sequential(strategies, timings)
+        
+        # Pick the best result
+        if best_result[0]:
+            return best_result, True
+        return self._select_best_result(results), False
+    
+    def _run_strategies_sequential(
+        self, strategies: List[Tuple[str, Image.Image, int]], timings: Optional[StageTimings] = None
+    ) -> Tuple[List[StrategyResult], StrategyResult]:
+        """
+        Run OCR strategies one after another, stopping at the first good result.
+        Returns all non-empty results and the early-exit result (empty if none).
+        """
+        results = []
         
-        sum_background = 0
-        weight_background = 0
-        max_variance = 0
-        threshold = 0
+        for name, img, psm in strategies:
+            result = self._timed_ocr(name, img, psm, timings)
+            if result[0]:  # If we got any text
+                results.append(result)
+                
+                # Early exit: if we get good text (5+ words), stop trying
+                if self._is_good_result(result):
+                    return results, result
         
-        for i in range(256):
-            weight_background += histogram[i]
-            if weight_background == 0:
-                continue
-            
-            weight_foreground = total_pixels - weight_background
-            if weight_foreground == 0:
-                break
-            
-            sum_background += i * histogram[i]
-            
-            mean_background = sum_background / weight_background
-            mean_foreground = (sum_total - sum_background) / weight_foreground
-            
-            variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
-            
-            if variance > max_variance:
-                max_variance = variance
-                threshold = i
+        return results, NO_RESULT
+    
+    def _run_strategies_parallel(
+        self, strategies: List[Tuple[str, Image.Image, int]], timings: Optional[StageTimings] = None
+    ) -> Tuple[List[StrategyResult], StrategyResult]:
+        """
+        Run OCR strategies concurrently on the strategy pool.
+        The first good result wins and cancels the attempts that have not started.
+        """
+        results = []
+        futures = [
+            self._strategy_pool.submit(self._timed_ocr, name, img, psm, timings)
+            for name, img, psm in strategies
+        ]
         
-        return image.point(lambda x: 255 if x > threshold else 0, mode='1')
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if result[0]:
+                    results.append(result)
+                    
+                    if self._is_good_result(result):
+                        return results, result
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return results, NO_RESULT
     
-    def _try_ocr(self, image: Image.Image, lang: str, config: str) -> Tuple[str, float]:
+    def _timed_ocr(
+        self, name: str, image: Image.Image, psm: int, timings: Optional[StageTimings]
+    ) -> StrategyResult:
+        """One OCR attempt, labelled with its strategy ("<variant>/psm<N>")."""
+        strategy = f"{name}/psm{psm}"
+        with measure(timings, f"ocr:{strategy}"):
+            text, confidence = self._try_ocr(image, psm)
+        return (text, confidence, strategy)
+    
+    def _is_good_result(self, result: StrategyResult) -> bool:
+        """
+        Early-exit criterion: 5+ words with confidence of at least 0.6.
+        """
+        word_count = len(result[0].split())
+        if word_count >= 5 and result[1] >= 0.6:
+            logger.info(f"Early exit: found {word_count} words with confidence {result[1]:.2f}")
+            return True
+        return False
+    
+    def _try_ocr(self, image: Image.Image, psm: int) -> Tuple[str, float]:
         """
-        Try OCR with specific language and configuration.
+        Try OCR with a specific page segmentation mode.
         """
         try:
-            raw_text = pytesseract.image_to_string(image, lang=lang, config=config)
+            raw_text = self.backend.image_to_string(image, psm)
             
             logger.debug(f"Raw OCR output: '{raw_text[:100]}...'")
             
@@ -323,22 +500,22 @@ class OCRService:
         # Clamp to 0-1 range
         return min(max(confidence, 0.1), 1.0)
     
-    def _select_best_result(self, results: List[Tuple[str, float]]) -> Tuple[str, float]:
+    def _select_best_result(self, results: List[StrategyResult]) -> StrategyResult:
         """
         Select the best OCR result - prefer results with more readable text.
         """
         if not results:
-            return ("", 0.0)
+            return NO_RESULT
         
         # Filter out empty results
-        valid_results = [(text, conf) for text, conf in results if text.strip()]
+        valid_results = [result for result in results if result[0].strip()]
         
         if not valid_results:
-            return ("", 0.0)
+            return NO_RESULT
         
         # Score each result
         scored = []
-        for text, conf in valid_results:
+        for text, conf, strategy in valid_results:
             words = text.split()
             word_count = len(words)
             total_chars = sum(len(w) for w in words)
@@ -351,9 +528,9 @@ class OCRService:
             
             score = char_score + word_score + conf_score
             
-            scored.append((text, conf, score))
+            scored.append((text, conf, strategy, score))
         
         # Sort by score
-        scored.sort(key=lambda x: x[2], reverse=True)
+        scored.sort(key=lambda x: x[3], reverse=True)
         
-        return (scored[0][0], scored[0][1])
+        return scored[0][:3]
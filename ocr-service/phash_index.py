@@ -0,0 +1,97 @@
+"""
+Perceptual Hash Index Module.
+Finds near-duplicate photos so re-shot price tags reuse earlier OCR text.
+
+A byte hash misses the same photo uploaded again after re-encoding or
+resizing. A difference hash (dHash) stays within a few bits for such copies,
+so a small Hamming distance is treated as "same tag".
+
+The hash is taken of the detected text regions, not the whole frame: tags of
+one store share a template, and at 64 bits of the whole frame two different
+tags on the same shelf spot are 0-1 bits apart. A 256-bit hash of the text
+region keeps such tags 11 or more bits apart on the synthetic corpus
+(bench_phash.py), so the distance threshold stays below that. Re-shots with
+a moved camera differ by more and are read again; the index only saves the
+OCR of a photo that is sent twice.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from PIL import Image
+
+from models import OCRResult
+from text_regions import Box
+
+logger = logging.getLogger(__name__)
+
+# Hash grid side: HASH_SIZE x HASH_SIZE bits
+HASH_SIZE = 16
+
+
+def dhash(gray_image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """
+    Compute a difference hash (hash_size ** 2 bits) of a grayscale image.
+    Each bit records whether a pixel is brighter than its right neighbour.
+    """
+    small = gray_image.resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+
+    value = 0
+    row_width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * row_width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def region_hash(gray_image: Image.Image, regions: List[Box]) -> int:
+    """dHash of the box around all text regions, of the whole image if there are none."""
+    if not regions:
+        return dhash(gray_image)
+    box = (
+        min(region[0] for region in regions),
+        min(region[1] for region in regions),
+        max(region[2] for region in regions),
+        max(region[3] for region in regions),
+    )
+    return dhash(gray_image.crop(box))
+
+
+class PerceptualHashIndex:
+    """
+    Bounded index of recent image hashes and their OCR results.
+    Oldest entries are dropped first; lookups are a linear scan over a few hundred ints.
+    """
+
+    def __init__(self, max_entries: int, max_distance: int):
+        self.max_distance = max_distance
+        self._entries: Deque[Tuple[int, OCRResult]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def lookup(self, image_hash: int) -> Optional[OCRResult]:
+        """
+        Return the OCR result of the closest recent image within the distance threshold.
+        """
+        best: Optional[Tuple[int, OCRResult]] = None
+
+        with self._lock:
+            for known_hash, result in reversed(self._entries):
+                distance = (known_hash ^ image_hash).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, result)
+                    if distance == 0:
+                        break
+
+        if best is None:
+            return None
+
+        logger.info(f"Near-duplicate image found (Hamming distance {best[0]}), reusing OCR text")
+        return best[1].model_copy()
+
+    def add(self, image_hash: int, result: OCRResult) -> None:
+        with self._lock:
+            self._entries.append((image_hash, result))
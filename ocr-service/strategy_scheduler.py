@@ -0,0 +1,251 @@
+"""
+Strategy Scheduler Module.
+Learns which OCR attempts (preprocessing variant x Tesseract PSM) pay off and
+orders them so a request needs as few Tesseract passes as possible.
+
+An OCR job stops at the first good result, so the expected cost of an order is
+the time spent until the first success. Trying strategies by decreasing ratio
+of success rate to mean cost minimizes it. Per strategy the scheduler keeps:
+- attempts and total time, for the mean cost of a pass
+- good results (early exit worthy) and wins (the result that was used)
+
+Pruning is off unless prune_win_rate is set: after enough attempts, strategies
+whose result is almost never used are then skipped. A strategy late in the
+order only runs after the earlier ones failed, so it rarely wins even when it
+is the one that reads the hard photos; with pruning on, the first order learned
+tends to lock in. A small share of jobs explores: every strategy, in random order, so pruned and
+low-ranked strategies are measured again when the photos change. Counts are
+halved once a strategy reaches WINDOW attempts, so estimates follow recent traffic.
+
+The scheduler lives in the API process. Workers get the plan with each job and
+report their attempts back in StageTimings, so a single scheduler learns from
+every worker of a process pool. With a state_path the state is a small JSON
+file, loaded at startup and saved every save_every jobs and on shutdown;
+without one it lives in memory only.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from timings import StageTimings
+
+logger = logging.getLogger(__name__)
+
+# Image versions and PSM modes (3 = auto, 11 = sparse text as on price tags,
+# 6 = single block), REDUCED from 5 each for speed
+VARIANTS = ("enhanced", "binary", "gray")
+PSMS = (3, 11, 6)
+
+# The hand-tuned order, used until there is data
+DEFAULT_STRATEGIES = [f"{variant}/psm{psm}" for variant in VARIANTS for psm in PSMS]
+
+# Attempts after which a strategy's counts are halved
+WINDOW = 1000
+
+STATE_VERSION = 1
+
+
+def parse_strategy(strategy: str) -> Tuple[str, int]:
+    """("enhanced", 3) for "enhanced/psm3"."""
+    variant, _, psm = strategy.partition("/psm")
+    return variant, int(psm)
+
+
+@dataclass
+class StrategyStats:
+    """Running counts of one strategy."""
+
+    attempts: float = 0.0
+    good: float = 0.0
+    wins: float = 0.0
+    seconds: float = 0.0
+
+    def success_rate(self) -> float:
+        """Share of attempts good enough to stop, with a uniform prior for little data."""
+        return (self.good + 1) / (self.attempts + 2)
+
+    def win_rate(self) -> float:
+        return self.wins / self.attempts if self.attempts else 0.0
+
+    def mean_cost(self, default: float) -> float:
+        return self.seconds / self.attempts if self.attempts else default
+
+    def decay(self) -> None:
+        self.attempts /= 2
+        self.good /= 2
+        self.wins /= 2
+        self.seconds /= 2
+
+
+class StrategyScheduler:
+    """
+    Orders and prunes OCR strategies from the outcomes of earlier jobs.
+    Thread-safe; plan() and record() are called once per OCR job.
+    """
+
+    def __init__(
+        self,
+        exploration_rate: float = 0.05,
+        prune_min_attempts: int = 200,
+        prune_win_rate: float = 0.0,
+        state_path: str = "",
+        save_every: int = 100,
+        seed: Optional[int] = None
+    ):
+        self.exploration_rate = exploration_rate
+        self.prune_min_attempts = prune_min_attempts
+        self.prune_win_rate = prune_win_rate
+        self.state_path = state_path
+        self.save_every = save_every
+        self.strategies: Dict[str, StrategyStats] = {
+            strategy: StrategyStats() for strategy in DEFAULT_STRATEGIES
+        }
+        self.jobs = 0
+        self.explored = 0
+        self.passes = 0
+        self._unsaved = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        if state_path:
+            self.load()
+
+    def _pruned(self, stats: StrategyStats) -> bool:
+        return (
+            self.prune_win_rate > 0
+            and stats.attempts >= self.prune_min_attempts
+            and stats.win_rate() < self.prune_win_rate
+        )
+
+    def _ranked(self) -> List[str]:
+        known = [stats for stats in self.strategies.values() if stats.attempts]
+        default_cost = (
+            sum(stats.seconds for stats in known) / sum(stats.attempts for stats in known)
+            if known else 1.0
+        )
+        # sorted() is stable, so equal scores (no data yet) keep the hand-tuned order
+        return sorted(
+            self.strategies,
+            key=lambda strategy: (
+                self.strategies[strategy].success_rate()
+                / max(1e-6, self.strategies[strategy].mean_cost(default_cost))
+            ),
+            reverse=True
+        )
+
+    def ranked(self) -> List[str]:
+        """The learned order without exploration, pruned strategies left out."""
+        with self._lock:
+            ranked = self._ranked()
+            return [s for s in ranked if not self._pruned(self.strategies[s])] or ranked[:1]
+
+    def plan(self) -> List[str]:
+        """Strategies to try for the next job, in order."""
+        with self._lock:
+            explore = self._random.random() < self.exploration_rate
+            if explore:
+                self.explored += 1
+                plan = list(self.strategies)
+                self._random.shuffle(plan)
+                return plan
+        return self.ranked()
+
+    def record(self, timings: StageTimings) -> None:
+        """Learn from a finished job: every attempt it made and the one that won."""
+        attempts = {
+            stage[len("ocr:"):]: durations
+            for stage, durations in timings.stages.items()
+            if stage.startswith("ocr:")
+        }
+        if not attempts:
+            # Near-duplicate hit or failed decode, nothing was tried
+            return
+
+        with self._lock:
+            self.jobs += 1
+            for strategy, durations in attempts.items():
+                stats = self.strategies.get(strategy)
+                if stats is None:
+                    continue
+                stats.attempts += len(durations)
+                stats.seconds += sum(durations)
+                self.passes += len(durations)
+                if strategy == timings.winner:
+                    stats.wins += 1
+                    if timings.early_exit:
+                        stats.good += 1
+                if stats.attempts >= WINDOW:
+                    stats.decay()
+
+            self._unsaved += 1
+            save = bool(self.state_path) and self._unsaved >= self.save_every
+
+        if save:
+            self.save()
+
+    def stats(self) -> dict:
+        ranked = self.ranked()
+        with self._lock:
+            return {
+                "jobs": self.jobs,
+                "explored": self.explored,
+                "passes_per_job": round(self.passes / self.jobs, 2) if self.jobs else 0.0,
+                "order": ranked,
+                "strategies": {
+                    strategy: {
+                        "attempts": round(stats.attempts, 1),
+                        "success_rate": round(stats.success_rate(), 3),
+                        "win_rate": round(stats.win_rate(), 3),
+                        "mean_ms": round(stats.mean_cost(0.0) * 1000, 1),
+                        "pruned": self._pruned(stats),
+                    }
+                    for strategy, stats in self.strategies.items()
+                },
+            }
+
+    def save(self) -> None:
+        """Write the state to state_path (atomically, via a temporary file)."""
+        with self._lock:
+            state = {
+                "version": STATE_VERSION,
+                "jobs": self.jobs,
+                "passes": self.passes,
+                "strategies": {strategy: asdict(stats) for strategy, stats in self.strategies.items()},
+            }
+            self._unsaved = 0
+
+        temp_path = f"{self.state_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Saving OCR strategy state failed: {e}")
+
+    def load(self) -> None:
+        """Restore the state from state_path; a missing or unreadable file starts fresh."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Loading OCR strategy state failed, starting fresh: {e}")
+            return
+
+        if state.get("version") != STATE_VERSION:
+            logger.warning(f"Ignoring OCR strategy state of version {state.get('version')}")
+            return
+
+        with self._lock:
+            for strategy, values in state.get("strategies", {}).items():
+                if strategy in self.strategies:
+                    self.strategies[strategy] = StrategyStats(**values)
+            self.jobs = state.get("jobs", 0)
+            self.passes = state.get("passes", 0)
+        logger.info(f"OCR strategy state loaded ({self.jobs} jobs): {' > '.join(self.ranked())}")
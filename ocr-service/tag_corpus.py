@@ -0,0 +1,345 @@
+"""
+Synthetic Price Tag Corpus.
+Generates reproducible shelf photos of price tags with ground-truth labels,
+for benchmarking OCR speed and match accuracy without real photos.
+
+Every sample is a phone-resolution JPEG of a shelf with one price tag: a
+Bosnian product name (with diacritics), a price, a unit price line and a
+barcode number. Distortions are drawn per sample from a seeded generator:
+font, tag size, rotation, blur, sensor noise, glare, JPEG quality and EXIF
+orientation. The same seed always yields the same corpus.
+
+Usage:
+    python tag_corpus.py --count 40 --seed 7 --out corpus/
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# (shopping list item, product name printed on the tag)
+PRODUCTS = [
+    ("mlijeko", "Dukat svježe mlijeko 2,8% 1L"),
+    ("kruh", "Bijeli kruh 500g"),
+    ("hljeb", "Domaći hljeb 600g"),
+    ("čokolada", "Milka čokolada mliječna 100g"),
+    ("šećer", "Šećer kristal 1kg"),
+    ("sir", "Mladi sir 250g"),
+    ("jogurt", "Meggle jogurt voćni 150g"),
+    ("kafa", "Zlatna džezva kafa 200g"),
+    ("ulje", "Suncokretovo ulje 1L"),
+    ("pašteta", "Argeta pileća pašteta 95g"),
+    ("brašno", "Brašno T-500 5kg"),
+    ("jaja", "Svježa jaja M 10 kom"),
+    ("deterdžent", "Persil deterdžent za veš 3L"),
+    ("krompir", "Krompir mladi 2kg"),
+    ("jabuke", "Jabuka Zlatni delišes 1kg"),
+    ("pivo", "Sarajevsko pivo 0,5L"),
+    ("sok", "Cedevita sok narandža 1L"),
+    ("riža", "Riža dugo zrno 1kg"),
+    ("tjestenina", "Tjestenina špageti 500g"),
+    ("keks", "Plazma keks 300g"),
+    ("salama", "Pileća salama 100g"),
+    ("voda", "Prirodna mineralna voda 1,5L"),
+    ("čaj", "Čaj kamilica 20 vrećica"),
+    ("puter", "Puter maslac 250g"),
+    ("pelene", "Pampers pelene veličina 4"),
+    ("grožđe", "Grožđe bijelo 500g"),
+    ("kečap", "Kečap blagi 500g"),
+    ("ćevapi", "Ćevapi pileći 400g"),
+]
+
+# Typical phone camera output sizes (landscape; portrait samples are rotated)
+PHONE_RESOLUTIONS = [(4032, 3024), (4000, 3000), (3264, 2448), (2560, 1920), (1920, 1080), (1600, 1200)]
+
+# TrueType fonts with Latin Extended-A (č, ć, đ, š, ž), first found is used per family
+FONT_CANDIDATES = [
+    "DejaVuSans.ttf", "DejaVuSans-Bold.ttf", "DejaVuSerif.ttf", "DejaVuSansMono-Bold.ttf",
+    "LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf",
+    "arial.ttf", "arialbd.ttf", "Arial.ttf", "Verdana.ttf",
+]
+FONT_DIRS = [
+    "/usr/share/fonts", "/usr/local/share/fonts", "/Library/Fonts", "/System/Library/Fonts",
+    "C:/Windows/Fonts",
+]
+
+TAG_COLORS = [(255, 255, 255), (255, 236, 80), (250, 250, 235), (255, 210, 0)]
+
+
+@dataclass
+class Distortions:
+    """What was done to a sample, so results can be broken down by distortion."""
+
+    font: str
+    resolution: Tuple[int, int]
+    tag_fraction: float
+    rotation: float
+    blur: float
+    noise: float
+    glare: float
+    jpeg_quality: int
+    exif_orientation: int
+
+
+@dataclass
+class TagSample:
+    """One synthetic photo and its ground truth."""
+
+    sample_id: str
+    item_name: str
+    text: str
+    price: str
+    distortions: Distortions
+    image: bytes = field(repr=False, default=b"")
+    # (left, top, right, bottom) of the tag in the upright photo, for region detection
+    tag_box: Optional[Tuple[int, int, int, int]] = None
+
+    def label(self) -> dict:
+        return {
+            "sample_id": self.sample_id,
+            "item_name": self.item_name,
+            "text": self.text,
+            "price": self.price,
+            "distortions": asdict(self.distortions),
+            "tag_box": self.tag_box,
+        }
+
+
+def find_fonts() -> List[str]:
+    """Paths of the candidate fonts installed on this machine."""
+    found: Dict[str, str] = {}
+    for directory in FONT_DIRS:
+        root = Path(directory)
+        if not root.is_dir():
+            continue
+        for name in FONT_CANDIDATES:
+            if name not in found:
+                match = next(root.rglob(name), None)
+                if match is not None:
+                    found[name] = str(match)
+    return [found[name] for name in FONT_CANDIDATES if name in found]
+
+
+def _load_font(path: Optional[str], size: int) -> ImageFont.ImageFont:
+    if path is None:
+        # Pillow's bundled font; Latin Extended coverage depends on the build
+        return ImageFont.load_default(size=size)
+    return ImageFont.truetype(path, size)
+
+
+def _fit_font(draw: ImageDraw.ImageDraw, path: Optional[str], text: str, size: int, width: int):
+    """Largest font not above size whose rendering of text fits in width."""
+    font = _load_font(path, size)
+    while size > 8 and draw.textlength(text, font=font) > width:
+        size = int(size * 0.9)
+        font = _load_font(path, size)
+    return font
+
+
+def _render_tag(rng: random.Random, text: str, price: str, font_path: Optional[str], width: int) -> Image.Image:
+    """The tag itself, upright: name, price, unit price and barcode."""
+    height = int(width * rng.uniform(0.5, 0.65))
+    tag = Image.new("RGB", (width, height), rng.choice(TAG_COLORS))
+    draw = ImageDraw.Draw(tag)
+    margin = width // 20
+
+    name_font = _fit_font(draw, font_path, text, height // 7, width - 2 * margin)
+    draw.text((margin, margin), text, fill=(15, 15, 15), font=name_font)
+
+    price_text = f"{price} KM"
+    price_font = _fit_font(draw, font_path, price_text, height // 3, width // 2)
+    draw.text((width - margin - draw.textlength(price_text, font=price_font), height // 3),
+              price_text, fill=(200, 20, 20), font=price_font)
+
+    small_font = _load_font(font_path, max(10, height // 16))
+    unit = f"Cijena za kom: {price} KM"
+    barcode = "".join(str(rng.randint(0, 9)) for _ in range(13))
+    draw.text((margin, height - 3 * height // 14), unit, fill=(40, 40, 40), font=small_font)
+    draw.text((margin, height - height // 8), barcode, fill=(40, 40, 40), font=small_font)
+    draw.rectangle((0, 0, width - 1, height - 1), outline=(90, 90, 90), width=max(2, width // 200))
+    return tag
+
+
+def _shelf_background(np_rng: np.random.Generator, size: Tuple[int, int]) -> np.ndarray:
+    """Blurred shelf: a base colour, horizontal shelf edges and product blobs."""
+    width, height = size
+    small = Image.new("RGB", (width // 8, height // 8), tuple(int(c) for c in np_rng.integers(60, 200, 3)))
+    draw = ImageDraw.Draw(small)
+    for _ in range(12):
+        x, y = np_rng.integers(0, small.width), np_rng.integers(0, small.height)
+        w, h = np_rng.integers(10, small.width // 4), np_rng.integers(10, small.height // 3)
+        draw.rectangle((x, y, x + w, y + h), fill=tuple(int(c) for c in np_rng.integers(0, 255, 3)))
+    for shelf_y in np.linspace(0, small.height, 4)[1:-1]:
+        draw.rectangle((0, shelf_y, small.width, shelf_y + small.height // 40), fill=(210, 210, 210))
+    background = small.filter(ImageFilter.GaussianBlur(2)).resize(size, Image.Resampling.BILINEAR)
+    return np.asarray(background, dtype=np.int16)
+
+
+def make_sample(index: int, seed: int, fonts: List[str]) -> TagSample:
+    """Build sample index of the corpus for seed; independent of the other samples."""
+    rng = random.Random(seed * 100_003 + index)
+    np_rng = np.random.default_rng(seed * 100_003 + index)
+
+    item_name, text = PRODUCTS[index % len(PRODUCTS)]
+    price = f"{rng.randint(0, 24)},{rng.choice([49, 99, 29, 79, 50, 10])}"
+    font_path = rng.choice(fonts) if fonts else None
+
+    width, height = rng.choice(PHONE_RESOLUTIONS)
+    distortions = Distortions(
+        font=Path(font_path).name if font_path else "default",
+        resolution=(width, height),
+        tag_fraction=round(rng.uniform(0.35, 0.8), 2),
+        rotation=round(rng.uniform(-8.0, 8.0), 1),
+        blur=round(rng.choice([0.0, 0.0, rng.uniform(0.5, 2.5)]), 2),
+        noise=round(rng.uniform(2.0, 14.0), 1),
+        glare=round(rng.choice([0.0, rng.uniform(0.2, 0.7)]), 2),
+        jpeg_quality=rng.randint(70, 95),
+        exif_orientation=rng.choice([1, 1, 1, 6, 8]),
+    )
+
+    # Tag on the shelf, rotated and placed off-centre
+    tag = _render_tag(rng, text, price, font_path, int(width * distortions.tag_fraction))
+    mask = Image.new("L", tag.size, 255).rotate(distortions.rotation, expand=True)
+    tag = tag.rotate(distortions.rotation, resample=Image.Resampling.BICUBIC, expand=True)
+    photo = Image.fromarray(_shelf_background(np_rng, (width, height)).astype(np.uint8))
+    x = rng.randint(0, max(0, width - tag.width))
+    y = rng.randint(0, max(0, height - tag.height))
+    photo.paste(tag, (x, y), mask)
+
+    if distortions.blur > 0:
+        # Blur radius scales with resolution, so it reads the same after downscaling
+        photo = photo.filter(ImageFilter.GaussianBlur(distortions.blur * width / 1200))
+
+    pixels = np.asarray(photo, dtype=np.int16)
+    if distortions.glare > 0:
+        gx, gy = rng.uniform(0.2, 0.8) * width, rng.uniform(0.2, 0.8) * height
+        radius = rng.uniform(0.15, 0.35) * width
+        ys, xs = np.ogrid[:height, :width]
+        spot = np.exp(-(((xs - gx) ** 2 + (ys - gy) ** 2) / (2 * radius ** 2)), dtype=np.float32)
+        pixels = pixels + (distortions.glare * 255 * spot)[..., None].astype(np.int16)
+    noise = np_rng.normal(0.0, distortions.noise, (height, width)).astype(np.int16)
+    pixels = np.clip(pixels + noise[..., None], 0, 255).astype(np.uint8)
+    photo = Image.fromarray(pixels)
+
+    # Portrait shots are stored sideways with an EXIF orientation, like phones do
+    exif = Image.Exif()
+    if distortions.exif_orientation == 6:
+        photo = photo.transpose(Image.Transpose.ROTATE_90)
+    elif distortions.exif_orientation == 8:
+        photo = photo.transpose(Image.Transpose.ROTATE_270)
+    exif[0x0112] = distortions.exif_orientation
+
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=distortions.jpeg_quality, exif=exif)
+    return TagSample(
+        sample_id=f"{seed}-{index:04d}",
+        item_name=item_name,
+        text=text,
+        price=price,
+        distortions=distortions,
+        image=buffer.getvalue(),
+        tag_box=(x, y, x + tag.width, y + tag.height),
+    )
+
+
+def _shoot(tag: Image.Image, background: np.ndarray, position: Tuple[int, int], noise_seed: int) -> Image.Image:
+    """The tag pasted on the shelf, with sensor noise of its own."""
+    photo = Image.fromarray(background.astype(np.uint8))
+    photo.paste(tag, position)
+    noise = np.random.default_rng(noise_seed).normal(0.0, 6.0, (photo.height, photo.width))
+    pixels = np.asarray(photo, dtype=np.int16) + noise.astype(np.int16)[..., None]
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def make_layout_pair(index: int, seed: int, fonts: List[str]) -> Tuple[bytes, bytes, bytes]:
+    """
+    Near-duplicate test photos: a tag on a shelf, the same tag shot again (new
+    sensor noise, re-encoded at 3/4 resolution), and a different product and
+    price on the same tag template at the same spot of the same shelf.
+    """
+    rng = random.Random(seed * 100_003 + index)
+    np_rng = np.random.default_rng(seed * 100_003 + index)
+    font_path = rng.choice(fonts) if fonts else None
+    width, height = 1600, 1200
+    background = _shelf_background(np_rng, (width, height))
+
+    # Both tags are rendered from the same generator state: same colour and size
+    state = rng.getstate()
+    tag = _render_tag(rng, PRODUCTS[index % len(PRODUCTS)][1], "2,49", font_path, 700)
+    rng.setstate(state)
+    other_tag = _render_tag(rng, PRODUCTS[(index + 7) % len(PRODUCTS)][1], "3,99", font_path, 700)
+    position = (rng.randint(0, width - tag.width), rng.randint(0, height - tag.height))
+
+    photos = [
+        _shoot(tag, background, position, 1),
+        _shoot(tag, background, position, 2).resize((width * 3 // 4, height * 3 // 4)),
+        _shoot(other_tag, background, position, 3),
+    ]
+    encoded = []
+    for photo in photos:
+        buffer = io.BytesIO()
+        photo.save(buffer, format="JPEG", quality=85)
+        encoded.append(buffer.getvalue())
+    return encoded[0], encoded[1], encoded[2]
+
+
+def generate_corpus(count: int, seed: int = 7) -> List[TagSample]:
+    """count samples for seed, cycling through PRODUCTS."""
+    fonts = find_fonts()
+    return [make_sample(index, seed, fonts) for index in range(count)]
+
+
+def save_corpus(samples: List[TagSample], directory: Path) -> None:
+    """Write <sample_id>.jpg files and labels.json."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for sample in samples:
+        (directory / f"{sample.sample_id}.jpg").write_bytes(sample.image)
+    labels = [sample.label() for sample in samples]
+    (directory / "labels.json").write_text(json.dumps(labels, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_corpus(directory: Path) -> List[TagSample]:
+    """Read a corpus written by save_corpus."""
+    labels = json.loads((directory / "labels.json").read_text(encoding="utf-8"))
+    samples = []
+    for label in labels:
+        distortions = label["distortions"]
+        distortions["resolution"] = tuple(distortions["resolution"])
+        samples.append(TagSample(
+            sample_id=label["sample_id"],
+            item_name=label["item_name"],
+            text=label["text"],
+            price=label["price"],
+            distortions=Distortions(**distortions),
+            image=(directory / f"{label['sample_id']}.jpg").read_bytes(),
+            tag_box=tuple(label["tag_box"]) if label.get("tag_box") else None,
+        ))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic price tag corpus")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    fonts = find_fonts()
+    if not fonts:
+        print("No TrueType fonts found, using Pillow's default font", file=sys.stderr)
+    samples = generate_corpus(args.count, args.seed)
+    save_corpus(samples, args.out)
+    total_mb = sum(len(sample.image) for sample in samples) / 1024 / 1024
+    print(f"Wrote {len(samples)} samples ({total_mb:.1f} MB) and labels.json to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Tesseract Profile Module.
+Engine settings for reading price tags instead of book pages.
+
+With only "--oem 3 --psm N" Tesseract considers every character of the
+language and its full dictionary, and guesses the resolution from the image.
+The "price_tag" profile narrows that down:
+- a character whitelist: Bosnian/Croatian letters, digits and %.,-
+- user words: every word of the item lexicon (synonyms, lemmas, brands) plus
+  common tag words, in lowercase and capitalized
+- user patterns: prices, weights and volumes ("2,49", "500g", "1,5L", "2,8%")
+- an explicit resolution (user_defined_dpi) instead of the per-image estimate
+
+The "plain" profile is the original configuration. OCR_LSTM_ONLY selects the
+LSTM engine alone (--oem 1) in either profile. Tesseract 4.0 ignores the
+whitelist with the LSTM engine; 4.1 and later honour it.
+
+Word and pattern files are written to OCR_PROFILE_DIR when a backend is
+created, since Tesseract only reads them from disk.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import Settings
+from lexicon import get_lexicon
+
+logger = logging.getLogger(__name__)
+
+PRICE_TAG_WHITELIST = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz"
+    "ČĆĐŠŽčćđšž"
+    "0123456789"
+    "%.,-"
+)
+
+# Words printed on most tags besides the product name
+TAG_WORDS = ["KM", "kom", "kg", "ml", "cijena", "akcija", "popust", "pakovanje"]
+
+# Tesseract pattern syntax: \d digit, \c letter, \* repeats the previous class
+PRICE_TAG_PATTERNS = [
+    r"\d\*,\d\d",
+    r"\d\*.\d\d",
+    r"\d\*g",
+    r"\d\*kg",
+    r"\d\*,\d\*kg",
+    r"\d\*ml",
+    r"\d\*L",
+    r"\d\*,\d\*L",
+    r"\d\*%",
+    r"\d\*,\d\*%",
+]
+
+# Engine modes: default (LSTM, or legacy where the traineddata has it) and LSTM only
+OEM_DEFAULT = 3
+OEM_LSTM_ONLY = 1
+
+
+@dataclass
+class TesseractProfile:
+    """Engine mode and the settings a backend passes to Tesseract."""
+
+    name: str
+    oem: int = OEM_DEFAULT
+    dpi: int = 0
+    whitelist: str = ""
+    user_words_path: Optional[str] = None
+    user_patterns_path: Optional[str] = None
+
+    def variables(self) -> Dict[str, str]:
+        """Tesseract variables, for backends that set them at initialization."""
+        variables = {}
+        if self.whitelist:
+            variables["tessedit_char_whitelist"] = self.whitelist
+        if self.dpi:
+            variables["user_defined_dpi"] = str(self.dpi)
+        if self.user_words_path:
+            variables["user_words_file"] = self.user_words_path
+        if self.user_patterns_path:
+            variables["user_patterns_file"] = self.user_patterns_path
+        return variables
+
+    def command_line(self, psm: int) -> str:
+        """Options for the tesseract binary (pytesseract's config string)."""
+        options = [f"--oem {self.oem}", f"--psm {psm}"]
+        if self.dpi:
+            options.append(f"--dpi {self.dpi}")
+        if self.user_words_path:
+            options.append(f"--user-words {self.user_words_path}")
+        if self.user_patterns_path:
+            options.append(f"--user-patterns {self.user_patterns_path}")
+        if self.whitelist:
+            options.append(f"-c tessedit_char_whitelist={self.whitelist}")
+        return " ".join(options)
+
+
+def user_words() -> List[str]:
+    """Lexicon and tag words, each lowercase and capitalized."""
+    words = set()
+    for word in get_lexicon().words() + TAG_WORDS:
+        words.update((word, word.lower(), word.capitalize()))
+    return sorted(words)
+
+
+def _write_lines(path: Path, lines: List[str]) -> None:
+    """Write atomically: process pool workers create their backends at the same time."""
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def write_word_files(directory: str) -> Tuple[str, str]:
+    """Write the user words and patterns files; returns their paths."""
+    directory_path = Path(directory)
+    directory_path.mkdir(parents=True, exist_ok=True)
+    words_path = directory_path / "price_tag.user-words"
+    patterns_path = directory_path / "price_tag.user-patterns"
+    _write_lines(words_path, user_words())
+    _write_lines(patterns_path, PRICE_TAG_PATTERNS)
+    return str(words_path), str(patterns_path)
+
+
+def create_profile(settings: Settings) -> TesseractProfile:
+    """The profile for OCR_TESSERACT_PROFILE, OCR_DPI and OCR_LSTM_ONLY."""
+    oem = OEM_LSTM_ONLY if settings.ocr_lstm_only else OEM_DEFAULT
+    if settings.ocr_tesseract_profile != "price_tag":
+        return TesseractProfile(name="plain", oem=oem)
+
+    profile = TesseractProfile(
+        name="price_tag",
+        oem=oem,
+        dpi=settings.ocr_dpi,
+        whitelist=PRICE_TAG_WHITELIST
+    )
+    try:
+        profile.user_words_path, profile.user_patterns_path = write_word_files(settings.ocr_profile_dir)
+    except OSError as e:
+        logger.warning(f"Tesseract user words not written, running without them: {e}")
+    return profile
@@ -3,6 +3,7 @@ Simple test script for OCR service improvements.
 Tests the OCR extraction and AI verification with sample data.
 """
 
+import asyncio
 import base64
 import json
 import sys
@@ -118,11 +119,14 @@ def test_ai_verification(ocr_text):
         
         print("\nRunning verification tests...\n")
         
+        # One event loop for all calls so the async client can reuse connections
+        loop = asyncio.new_event_loop()
+        
         for i, (item_name, ocr_text) in enumerate(test_cases, 1):
             print(f"Test {i}: '{item_name}' vs '{ocr_text}'")
             
             try:
-                result = ai_service.verify_match(item_name, ocr_text)
+                result = loop.run_until_complete(ai_service.verify_match(item_name, ocr_text))
                 
                 match_symbol = "✅" if result.is_match else "❌"
                 print(f"  {match_symbol} Match: {result.is_match}")
@@ -146,6 +150,8 @@ def test_ai_verification(ocr_text):
                 
                 except Exception as e2:
                     print(f"  ❌ Fallback also failed: {str(e2)}\n")
+        
+        loop.close()
     
     except ImportError as e:
         print(f"\n❌ Import error: {str(e)}")
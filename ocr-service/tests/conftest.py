@@ -0,0 +1,6 @@
+"""Service modules are imported flat, as in the service itself."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,89 @@
+"""Compact prompt size and handling of replies cut off at max_tokens."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from ai_service import (
+    COMPACT_MAX_TOKENS,
+    COMPACT_SYSTEM_PROMPT,
+    FULL_MAX_TOKENS,
+    SYSTEM_PROMPT,
+    AIVerificationService,
+)
+from config import Settings
+
+VERDICT = {"is_match": True, "confidence": 0.9, "reasoning": "Isti proizvod."}
+
+
+class ScriptedPool:
+    """Answers with the given (content, finish_reason) replies in turn and records the requests."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        content, finish_reason = self.replies.pop(0)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice])
+
+    async def create_within(self, timeout, **kwargs):
+        return await self.create(**kwargs)
+
+
+def make_service(pool: ScriptedPool, compact: bool = True) -> AIVerificationService:
+    service = AIVerificationService()
+    service.compact = compact
+    service._pool = pool
+    return service
+
+
+def estimated_tokens(request: dict) -> int:
+    """UTF-8 bytes / 4 over all messages, the estimate bench_prompt.py falls back to."""
+    return sum(len(message["content"].encode("utf-8")) for message in request["messages"]) // 4
+
+
+def test_compact_system_prompt_is_at_most_half_the_full_one():
+    assert len(COMPACT_SYSTEM_PROMPT.encode("utf-8")) * 2 <= len(SYSTEM_PROMPT.encode("utf-8"))
+
+
+def test_compact_requests_are_smaller():
+    ocr_text = "Dukat svježe mlijeko 2,8% 1L 1,99 KM 3850104000000 22.10.2026 PDV 17%"
+    batch = [("mlijeko", ocr_text), ("sir", ocr_text), ("jogurt", ocr_text)]
+    sizes = {}
+    for compact in (False, True):
+        pool = ScriptedPool(
+            (json.dumps(VERDICT), "stop"),
+            (json.dumps({"results": [dict(VERDICT, id=i) for i in (1, 2, 3)]}), "stop"),
+        )
+        service = make_service(pool, compact)
+        asyncio.run(service.verify_match("mlijeko", ocr_text))
+        asyncio.run(service.verify_matches(batch))
+        sizes[compact] = [estimated_tokens(request) for request in pool.requests]
+    single, batched = sizes[True]
+    assert single < sizes[False][0] / 2
+    assert batched < sizes[False][1] / 2
+
+
+def test_compact_single_and_batch_share_the_system_prompt():
+    pool = ScriptedPool(
+        (json.dumps(VERDICT), "stop"),
+        (json.dumps({"results": [dict(VERDICT, id=1), dict(VERDICT, id=2)]}), "stop"),
+    )
+    service = make_service(pool)
+    asyncio.run(service.verify_match("mlijeko", "Dukat mlijeko 1L"))
+    asyncio.run(service.verify_matches([("mlijeko", "Dukat mlijeko 1L"), ("sir", "Mladi sir")]))
+    assert {request["messages"][0]["content"] for request in pool.requests} == {COMPACT_SYSTEM_PROMPT}
+
+
+def test_truncated_reply_is_asked_again_with_full_budget():
+    pool = ScriptedPool(('{"is_match": true, "confid', "length"), (json.dumps(VERDICT), "stop"))
+    result = asyncio.run(make_service(pool).verify_match("mlijeko", "Dukat mlijeko 1L"))
+    assert result.is_match
+    assert [request["max_tokens"] for request in pool.requests] == [COMPACT_MAX_TOKENS, FULL_MAX_TOKENS]
+
+
+def test_full_prompt_is_the_default():
+    assert Settings.model_fields["ai_prompt_mode"].default == "full"
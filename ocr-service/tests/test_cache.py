@@ -0,0 +1,74 @@
+"""Result cache stores: disk reads stay read-only, eviction only past the limit."""
+
+import asyncio
+import threading
+
+import pytest
+
+from cache import DiskCacheStore, MemoryCacheStore, ResultCache
+from models import OCRResult
+
+
+@pytest.fixture
+def disk_store(tmp_path):
+    store = DiskCacheStore(str(tmp_path / "cache.sqlite3"), max_entries=10, ttl_seconds=60)
+    yield store
+    store.close()
+
+
+def test_disk_get_does_not_write(disk_store):
+    disk_store.set("a", "1")
+    changes = disk_store._conn.total_changes
+    assert disk_store.get("a") == "1"
+    assert disk_store.get("missing") is None
+    assert disk_store._conn.total_changes == changes
+
+
+def test_disk_evicts_only_past_the_limit(disk_store):
+    for index in range(10):
+        disk_store.set(f"k{index}", str(index))
+    assert disk_store._count() == 10
+
+    # A hit makes k0 the most recently used once the next write records it
+    disk_store.get("k0")
+    disk_store.set("k10", "10")
+    assert disk_store._count() == 9
+    assert disk_store.get("k0") == "0"
+    assert disk_store.get("k1") is None
+    assert disk_store.get("k10") == "10"
+
+
+def test_disk_overwrite_does_not_grow_the_count(disk_store):
+    for _ in range(5):
+        disk_store.set("a", "1")
+    disk_store.set("b", "2")
+    assert disk_store.size() == disk_store._count() == 2
+    assert disk_store.get("a") == "1"
+
+
+def test_disk_calls_run_off_the_event_loop(disk_store):
+    cache = ResultCache(disk_store)
+    loop_thread = threading.get_ident()
+    threads = []
+    original_set = disk_store.set
+
+    def recording_set(key, value):
+        threads.append(threading.get_ident())
+        original_set(key, value)
+
+    disk_store.set = recording_set
+
+    async def roundtrip():
+        await cache.set("ocr", "key", OCRResult(text="Mlijeko 1L", confidence=0.9))
+        return await cache.get("ocr", "key", OCRResult)
+
+    assert asyncio.run(roundtrip()).text == "Mlijeko 1L"
+    assert threads and loop_thread not in threads
+
+
+def test_memory_store_runs_inline():
+    cache = ResultCache(MemoryCacheStore(max_entries=2, ttl_seconds=60))
+    assert cache.store.executor is None
+    asyncio.run(cache.set("ai", "key", OCRResult(text="x", confidence=1.0)))
+    assert asyncio.run(cache.get("ai", "key", OCRResult)).text == "x"
+    assert cache.stats()["counters"] == {"ai": {"hits": 1, "misses": 0}}
@@ -0,0 +1,21 @@
+"""Ordering of /verify/list results."""
+
+from main import _rank_matches
+from models import ItemMatch
+
+
+def _match(name: str, is_match: bool, confidence: float) -> ItemMatch:
+    return ItemMatch(item_name=name, is_match=is_match, confidence=confidence, reasoning="")
+
+
+def test_matches_come_first_by_confidence():
+    matches = [
+        _match("confident non-match", False, 0.1),
+        _match("weak match", True, 0.7),
+        _match("unsure non-match", False, 0.6),
+        _match("strong match", True, 0.95),
+    ]
+    _rank_matches(matches)
+    assert [m.item_name for m in matches] == [
+        "strong match", "weak match", "unsure non-match", "confident non-match",
+    ]
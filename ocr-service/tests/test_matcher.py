@@ -0,0 +1,86 @@
+"""Local matcher decisions: clear matches are accepted, nothing is rejected."""
+
+import pytest
+
+from lexicon import get_lexicon
+from matcher import BRAND_MATCH_SCORE, LocalMatcher, similarity
+
+
+@pytest.fixture
+def matcher() -> LocalMatcher:
+    return LocalMatcher(accept_threshold=0.8, lexicon=get_lexicon())
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("mlijeko", "Dukat svježe mlijeko 2,8% 1L 1,99 KM"),
+    ("kruh", "Domaći hljeb 600g 1,20 KM"),
+    ("jabuke", "Jabuka Zlatni delišes 1kg"),
+    ("čokolada", "Milka cokolada mlijecna 100g"),
+])
+def test_clear_match_is_accepted(matcher, item_name, ocr_text):
+    result = matcher.decide(item_name, ocr_text)
+    assert result is not None
+    assert result.is_match
+    assert result.confidence <= 0.95
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("sok", "Cedevita narandža 1L 2,49 KM"),
+    ("voće", "Zlatni delišes jabuka 1kg"),
+    ("tjestenina", "Barilla špageti 500g"),
+    ("mlijeko", "Persil deterdžent za veš 3L"),
+])
+def test_category_or_unrelated_text_is_escalated(matcher, item_name, ocr_text):
+    assert matcher.decide(item_name, ocr_text) is None
+
+
+def test_stats_count_decisions(matcher):
+    matcher.decide("mlijeko", "Dukat svježe mlijeko 1L")
+    matcher.decide("sok", "Cedevita narandža 1L")
+    assert matcher.stats() == {"accepted": 1, "escalated": 1, "settled_fraction": 0.5}
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("čokoladica", "Kinder jaje 20g"),
+    ("pelene", "Pampers Active Baby 4"),
+])
+def test_brand_only_hit_is_escalated(matcher, item_name, ocr_text):
+    assert BRAND_MATCH_SCORE <= similarity(item_name, ocr_text, get_lexicon()) < 0.8
+    assert matcher.decide(item_name, ocr_text) is None
+
+
+def test_brand_named_in_item_is_accepted(matcher):
+    assert matcher.decide("Snickers čokoladica", "Snickers 50g 1,20 KM") is not None
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("pivo", "Nektar breskva 1L"),
+    ("keks", "Jaffa sok narandža 1L"),
+])
+def test_ambiguous_brand_is_not_in_lexicon(matcher, item_name, ocr_text):
+    assert similarity(item_name, ocr_text, get_lexicon()) < BRAND_MATCH_SCORE
+    assert matcher.decide(item_name, ocr_text) is None
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("salama", "Salata zelena kom 1,50 KM"),
+    ("pelene", "Pelete za grijanje 15kg"),
+    ("kruška", "Krušne mrvice 500g"),
+    ("sir", "Sol morska 1kg"),
+])
+def test_one_letter_off_is_escalated(matcher, item_name, ocr_text):
+    assert matcher.decide(item_name, ocr_text) is None
+
+
+@pytest.mark.parametrize("item_name, ocr_text", [
+    ("mlijeko", "Dukat svježe rnlijeko 1L"),
+    ("ulje", "Suncokretovo uIje 1L"),
+    ("sol", "Morska s0l 1kg"),
+])
+def test_ocr_lookalikes_are_accepted(matcher, item_name, ocr_text):
+    assert matcher.decide(item_name, ocr_text) is not None
+
+
+def test_baking_powder_is_not_detergent(matcher):
+    assert similarity("deterdžent", "Prašak za pecivo 12g", get_lexicon()) < 0.5
+    assert matcher.decide("deterdžent", "Prašak za pecivo 12g") is None
@@ -0,0 +1,39 @@
+"""Near-duplicate index: same-template tags must not be taken for each other."""
+
+import pytest
+
+from config import Settings
+from models import OCRResult
+from phash_index import PerceptualHashIndex, region_hash
+from preprocessing import load_image
+from tag_corpus import find_fonts, make_layout_pair
+from text_regions import find_text_regions
+
+
+def _hash(image: bytes) -> int:
+    gray = load_image(image, Settings().ocr_max_dimension)
+    return region_hash(gray, find_text_regions(gray))
+
+
+@pytest.fixture(scope="module")
+def layout_pairs():
+    fonts = find_fonts()
+    return [[_hash(image) for image in make_layout_pair(index, 7, fonts)] for index in range(6)]
+
+
+def test_index_is_off_by_default():
+    assert Settings.model_fields["phash_index_size"].default == 0
+
+
+def test_different_same_template_tags_are_beyond_the_distance(layout_pairs):
+    max_distance = Settings.model_fields["phash_max_distance"].default
+    for photo_hash, _, other_hash in layout_pairs:
+        assert (photo_hash ^ other_hash).bit_count() > max_distance
+
+
+def test_index_does_not_answer_for_a_different_tag(layout_pairs):
+    photo_hash, _, other_hash = layout_pairs[0]
+    index = PerceptualHashIndex(max_entries=8, max_distance=6)
+    index.add(photo_hash, OCRResult(text="Dukat svježe mlijeko 2,49 KM", confidence=0.9))
+    assert index.lookup(photo_hash).text == "Dukat svježe mlijeko 2,49 KM"
+    assert index.lookup(other_hash) is None
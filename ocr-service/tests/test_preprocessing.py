@@ -0,0 +1,28 @@
+"""Variant builders: PIL is the default, NumPy gives the same Otsu output."""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from config import Settings
+from preprocessing import build_variants, build_variants_numpy
+
+
+def _tag() -> Image.Image:
+    image = Image.new("L", (400, 200), 200)
+    ImageDraw.Draw(image).text((20, 80), "Dukat mlijeko 2,49 KM", fill=30)
+    return image
+
+
+def test_pil_is_the_default():
+    assert Settings.model_fields["ocr_preprocessing"].default == "pil"
+
+
+def test_pil_and_numpy_variants_match():
+    for pil_variant, numpy_variant in zip(build_variants(_tag(), "pil"), build_variants(_tag(), "numpy")):
+        assert np.array_equal(np.asarray(pil_variant), np.asarray(numpy_variant))
+
+
+def test_sauvola_uses_numpy_with_the_pil_default():
+    _, binary = build_variants(_tag(), "pil", binarization="sauvola")
+    _, expected = build_variants_numpy(_tag(), "sauvola")
+    assert np.array_equal(np.asarray(binary), np.asarray(expected))
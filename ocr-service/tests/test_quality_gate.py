@@ -0,0 +1,91 @@
+"""Quality gate verdicts on readable and unreadable photos."""
+
+import io
+
+import pytest
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+from config import Settings
+from quality_gate import check_quality
+
+
+def _white_tag_closeup() -> Image.Image:
+    """A sharp close-up filling the frame: white tag, large black text."""
+    image = Image.new("L", (1200, 800), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((60, 80), "Bijeli kruh 500g", fill=0, font=ImageFont.load_default(90))
+    draw.text((500, 400), "2,49 KM", fill=0, font=ImageFont.load_default(200))
+    return image
+
+
+def _test_ocr_sample() -> Image.Image:
+    """The 300x100 sample test_ocr.py sends through the pipeline."""
+    image = Image.new("L", (300, 100), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((10, 30), "BIJELI HLJEB 500g", fill=0)
+    draw.text((10, 60), "2.50 KM", fill=0)
+    return image
+
+
+def test_white_closeup_passes():
+    report = check_quality(_white_tag_closeup(), Settings())
+    assert report.brightness > 235
+    assert report.issue is None
+
+
+def test_test_ocr_sample_passes():
+    assert check_quality(_test_ocr_sample(), Settings()).issue is None
+
+
+def test_tiny_image_is_rejected():
+    image = _test_ocr_sample().resize((120, 40))
+    assert check_quality(image, Settings()).issue == "resolution"
+
+
+def test_dark_photo_is_rejected():
+    image = ImageEnhance.Brightness(_white_tag_closeup()).enhance(0.15)
+    assert check_quality(image, Settings()).issue == "dark"
+
+
+def test_washed_out_photo_is_rejected():
+    image = Image.blend(_white_tag_closeup(), Image.new("L", (1200, 800), 255), 0.8)
+    assert check_quality(image, Settings()).issue == "bright"
+
+
+def test_blurry_photo_is_rejected():
+    image = _white_tag_closeup().filter(ImageFilter.GaussianBlur(12))
+    assert check_quality(image, Settings()).issue == "blurry"
+
+
+def _small_text(size: tuple, font_size: int | None, jpeg: bool = False) -> Image.Image:
+    """A clean white photo with a few words of small black text."""
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(font_size) if font_size else ImageFont.load_default()
+    draw.text((40, size[1] // 3), "Bijeli kruh 500g", fill=0, font=font)
+    draw.text((40, size[1] // 2), "2,49 KM", fill=0, font=font)
+    if jpeg:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        image = Image.open(io.BytesIO(buffer.getvalue())).convert("L")
+    return image
+
+
+@pytest.mark.parametrize("size, font_size, jpeg", [
+    ((1200, 900), 30, False),
+    ((1200, 900), 20, False),
+    ((800, 400), None, True),
+])
+def test_clean_small_text_passes(size, font_size, jpeg):
+    report = check_quality(_small_text(size, font_size, jpeg), Settings())
+    assert report.issue is None
+
+
+def test_dark_small_text_is_rejected():
+    image = ImageEnhance.Brightness(_small_text((1200, 900), 30)).enhance(0.15)
+    assert check_quality(image, Settings()).issue == "dark"
+
+
+def test_washed_out_small_text_is_rejected():
+    image = Image.blend(_small_text((1200, 900), 30), Image.new("L", (1200, 900), 255), 0.8)
+    assert check_quality(image, Settings()).issue == "bright"
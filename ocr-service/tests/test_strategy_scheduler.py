@@ -0,0 +1,40 @@
+"""Strategy scheduler pruning and state defaults."""
+
+from config import Settings
+from strategy_scheduler import DEFAULT_STRATEGIES, StrategyScheduler
+from timings import StageTimings
+
+
+def _job(tried: int, winner: int) -> StageTimings:
+    """A job that ran the first `tried` default strategies and used strategy `winner`."""
+    timings = StageTimings()
+    for strategy in DEFAULT_STRATEGIES[:tried]:
+        timings.record(f"ocr:{strategy}", 0.2)
+    timings.winner = DEFAULT_STRATEGIES[winner]
+    return timings
+
+
+def _train(scheduler: StrategyScheduler) -> None:
+    # The second strategy runs on every job but its text is used on one in fifty
+    for i in range(400):
+        scheduler.record(_job(2, 1 if i % 50 == 0 else 0))
+
+
+def test_rare_winner_is_kept_by_default():
+    scheduler = StrategyScheduler(exploration_rate=0.0, seed=1)
+    _train(scheduler)
+    assert set(scheduler.ranked()) == set(DEFAULT_STRATEGIES)
+    assert not any(stats["pruned"] for stats in scheduler.stats()["strategies"].values())
+
+
+def test_prune_win_rate_skips_rare_winners():
+    scheduler = StrategyScheduler(exploration_rate=0.0, prune_win_rate=0.05, seed=1)
+    _train(scheduler)
+    assert DEFAULT_STRATEGIES[1] not in scheduler.ranked()
+
+
+def test_defaults_keep_state_in_memory():
+    settings = Settings.model_fields
+    assert settings["ocr_adaptive_strategies"].default is False
+    assert settings["ocr_prune_win_rate"].default == 0.0
+    assert settings["ocr_scheduler_state_path"].default == ""
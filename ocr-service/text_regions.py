@@ -0,0 +1,182 @@
+"""
+Text Region Module.
+Finds the parts of a photo that look like printed text (the price tag), so
+Tesseract reads only those crops instead of the whole frame with shelves,
+hands and background.
+
+Detection is CPU-only numpy on a small copy of the grayscale image:
+1. Gradient magnitude, thresholded into an edge map
+2. Edge density per BLOCK x BLOCK cell; text has many edges, but not as many
+   as sensor noise or fine texture
+3. Text cells are joined horizontally (letters into words and lines) and
+   vertically (lines into a tag), then grouped into connected components
+4. Each component's bounding box, with a margin, becomes a region
+
+Regions are ranked by edge mass and returned in reading order. When nothing
+looks like text, or the text covers most of the frame (a close-up of the tag),
+no regions are returned and the caller reads the whole image.
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from timings import StageTimings, measure
+
+# (left, top, right, bottom) in pixels of the image passed in
+Box = Tuple[int, int, int, int]
+
+# Longest side of the copy the detection runs on
+WORK_SIDE = 480
+
+# Cell size on that copy, in pixels
+BLOCK = 8
+
+# Summed horizontal + vertical gradient that counts as an edge (0-510)
+EDGE_LEVEL = 48
+
+# Share of edge pixels in a cell for it to count as text
+MIN_DENSITY = 0.12
+MAX_DENSITY = 0.65
+
+# Cells a text cell is grown by before grouping (horizontal, vertical)
+JOIN_CELLS = (2, 1)
+
+# Smallest component kept, in text cells
+MIN_CELLS = 4
+
+# Margin added around each region, in cells
+MARGIN_CELLS = 1
+
+# Above this share of the frame, cropping saves too little to be worth it
+MAX_COVERAGE = 0.8
+
+
+def _text_cells(gray: Image.Image) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Boolean grid of text-like cells, the edge density per cell, and the scale
+    from the work copy to the input image.
+    """
+    scale = min(1.0, WORK_SIDE / max(gray.size))
+    if scale < 1.0:
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        small = gray.resize(size, Image.Resampling.BILINEAR)
+    else:
+        small = gray
+
+    pixels = np.asarray(small, dtype=np.int16)
+    gradient = np.abs(np.diff(pixels, axis=1))[:-1, :] + np.abs(np.diff(pixels, axis=0))[:, :-1]
+    edges = gradient >= EDGE_LEVEL
+
+    rows, cols = edges.shape[0] // BLOCK, edges.shape[1] // BLOCK
+    if rows == 0 or cols == 0:
+        empty = np.zeros((0, 0))
+        return empty.astype(bool), empty, scale
+    density = (
+        edges[:rows * BLOCK, :cols * BLOCK]
+        .reshape(rows, BLOCK, cols, BLOCK)
+        .mean(axis=(1, 3))
+    )
+    return (density >= MIN_DENSITY) & (density <= MAX_DENSITY), density, scale
+
+
+def _grow(cells: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Binary dilation of the grid by dx cells left/right and dy cells up/down."""
+    grown = cells.copy()
+    for shift in range(1, dx + 1):
+        grown[:, shift:] |= cells[:, :-shift]
+        grown[:, :-shift] |= cells[:, shift:]
+    horizontal = grown.copy()
+    for shift in range(1, dy + 1):
+        grown[shift:, :] |= horizontal[:-shift, :]
+        grown[:-shift, :] |= horizontal[shift:, :]
+    return grown
+
+
+def _components(grown: np.ndarray) -> List[List[Tuple[int, int]]]:
+    """4-connected components of the grid, as lists of (row, col) cells."""
+    seen = np.zeros_like(grown)
+    components = []
+    rows, cols = grown.shape
+    for start in zip(*np.nonzero(grown)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        cells = []
+        while queue:
+            row, col = queue.popleft()
+            cells.append((row, col))
+            for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= r < rows and 0 <= c < cols and grown[r, c] and not seen[r, c]:
+                    seen[r, c] = True
+                    queue.append((r, c))
+        components.append(cells)
+    return components
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _merge(boxes: List[Tuple[Box, float]]) -> List[Tuple[Box, float]]:
+    """Union overlapping boxes (margins can make neighbours touch), summing scores."""
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                (a, score_a), (b, score_b) = boxes[i], boxes[j]
+                if _overlaps(a, b):
+                    union = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    boxes[i] = (union, score_a + score_b)
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def find_text_regions(
+    gray: Image.Image, max_regions: int = 3, timings: Optional[StageTimings] = None
+) -> List[Box]:
+    """
+    Likely text regions of a grayscale image, at most max_regions, in reading
+    order. Empty when the whole image should be read instead.
+    With timings, the "regions" stage is recorded.
+    """
+    with measure(timings, "regions"):
+        text, density, scale = _text_cells(gray)
+        if not text.any():
+            return []
+
+        grown = _grow(text, *JOIN_CELLS)
+        cell_size = BLOCK / scale
+        candidates: List[Tuple[Box, float]] = []
+        for cells in _components(grown):
+            text_cells = [cell for cell in cells if text[cell]]
+            if len(text_cells) < MIN_CELLS:
+                continue
+            rows = [row for row, _ in cells]
+            cols = [col for _, col in cells]
+            box = (
+                max(0, int((min(cols) - MARGIN_CELLS) * cell_size)),
+                max(0, int((min(rows) - MARGIN_CELLS) * cell_size)),
+                min(gray.width, int((max(cols) + 1 + MARGIN_CELLS) * cell_size)),
+                min(gray.height, int((max(rows) + 1 + MARGIN_CELLS) * cell_size)),
+            )
+            score = float(sum(density[cell] for cell in text_cells))
+            candidates.append((box, score))
+
+        candidates = _merge(candidates)
+        candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+        boxes = [box for box, _ in candidates[:max_regions]]
+
+        area = sum((right - left) * (bottom - top) for left, top, right, bottom in boxes)
+        if not boxes or area > MAX_COVERAGE * gray.width * gray.height:
+            return []
+
+        return sorted(boxes, key=lambda box: (box[1], box[0]))
@@ -0,0 +1,64 @@
+"""
+Stage Timing Module.
+Wall-clock time spent in each stage of the OCR pipeline (decode, resize,
+preprocessing, every Tesseract pass), for benchmarks and metrics. Besides the
+durations it notes how the request was settled: the winning strategy, whether
+an attempt was good enough to stop early, near-duplicate (phash) hits, how
+much of the image was read, and the quality gate's scores and verdict.
+
+Timing is opt-in: pipeline functions take an optional StageTimings and do no
+extra work when it is None.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, List, Optional
+
+
+class StageTimings:
+    """
+    Durations per stage name, in seconds. A stage can run several times per
+    request (one entry per Tesseract pass). Appends are atomic under the GIL,
+    so parallel OCR strategies can record into the same instance.
+
+    Instances are plain data, so a process pool worker can return them to the
+    API process along with the result.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        # "<variant>/psm<N>" of the attempt whose text was used
+        self.winner: Optional[str] = None
+        self.early_exit = False
+        self.phash_hit = False
+        # Text regions OCR'd instead of the whole frame (0 = whole frame),
+        # and the pixels Tesseract was given per variant
+        self.regions = 0
+        self.pixels = 0
+        # Quality gate scores, and why the image was rejected (None = accepted)
+        self.sharpness: Optional[float] = None
+        self.brightness: Optional[float] = None
+        self.rejected: Optional[str] = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def total(self, stage: str) -> float:
+        return sum(self.stages.get(stage, ()))
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, durations in other.stages.items():
+            self.stages.setdefault(stage, []).extend(durations)
+
+
+def measure(timings: Optional[StageTimings], stage: str) -> ContextManager:
+    """timings.measure(stage), or a no-op when timing is off."""
+    return timings.measure(stage) if timings is not None else nullcontext()
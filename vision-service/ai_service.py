@@ -3,15 +3,26 @@ AI Verification Service Module.
 Handles semantic matching between shopping item names and product images.
 """
 
+import asyncio
 import base64
 import json
 import logging
-from typing import Optional
-
-from openai import OpenAI
+import time
+from typing import Dict, List, Optional
 
+from circuit_breaker import CircuitOpenError
 from config import get_settings
+from deadline import DeadlineExceeded
+from image_prep import PreparedImage, prepare_image
+from metrics import (
+    AI_CALL_SECONDS,
+    IMAGE_BRIGHTNESS,
+    IMAGE_PREPARE_SECONDS,
+    IMAGE_SHARPNESS,
+    QUALITY_REJECTIONS,
+)
 from models import AIVerificationResult
+from openai_pool import ModelCallPool
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +51,24 @@ ODGOVORI ISKLJUČIVO U JSON FORMATU:
 }
 """
 
+# Appended to SYSTEM_PROMPT when one image is checked against several items
+BATCH_PROMPT_SUFFIX = """
+VIŠE ARTIKALA ODJEDNOM:
+Ovaj put dobijaš JEDNU sliku i VIŠE artikala sa liste, svaki sa brojem (id).
+Za svaki artikal nezavisno odluči da li ga slika prikazuje, po istim pravilima.
+
+U OVOM SLUČAJU ODGOVORI ISKLJUČIVO OVAKVIM JSON OBJEKTOM (tačno jedan element po id-u):
+{
+    "results": [
+        {"id": 1, "is_match": true/false, "confidence": 0.0-1.0, "reasoning": "Kratko objašnjenje"}
+    ]
+}
+"""
+
+# Output token budget for batched calls
+BATCH_TOKENS_PER_ITEM = 80
+BATCH_BASE_TOKENS = 50
+
 
 class AIVerificationService:
     """
@@ -48,25 +77,122 @@ class AIVerificationService:
 
     def __init__(self) -> None:
         self.settings = get_settings()
-        self._client: Optional[OpenAI] = None
+        self._pool: Optional[ModelCallPool] = None
+        self._images = 0
+        self._image_bytes_in = 0
+        self._image_bytes_sent = 0
+        self._prepare_seconds = 0.0
+        self._details: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+        self._model_calls = 0
+        self._model_seconds = 0.0
 
     @property
-    def client(self) -> OpenAI:
-        if self._client is None:
-            if not self.settings.openai_api_key:
+    def pool(self) -> ModelCallPool:
+        """
+        Lazy initialization of the shared OpenAI client pool.
+        """
+        if self._pool is None:
+            if not self.settings.openai_api_key and self.settings.ai_backend != "local":
                 raise ValueError(
                     "OpenAI API key not configured. "
                     "Set OPENAI_API_KEY environment variable."
                 )
-            self._client = OpenAI(api_key=self.settings.openai_api_key)
-        return self._client
+            self._pool = ModelCallPool(self.settings)
+        return self._pool
+
+    def pool_stats(self) -> Optional[dict]:
+        """Connection pool and call queue counters, None before the first call."""
+        return self._pool.stats() if self._pool is not None else None
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def prepare_image(self, image_bytes: bytes) -> PreparedImage:
+        """
+        Resize and re-encode an image for the model, off the event loop.
+        Prepare once and reuse the result for every call about the same image.
+        Check image.quality_issue first: a rejected image must not be sent.
+        """
+        image = await asyncio.to_thread(prepare_image, image_bytes, self.settings)
+        if image.quality is not None:
+            IMAGE_SHARPNESS.observe(image.quality.sharpness)
+            IMAGE_BRIGHTNESS.observe(image.quality.brightness)
+        if image.quality_issue is not None:
+            self._rejected[image.quality_issue] = self._rejected.get(image.quality_issue, 0) + 1
+            QUALITY_REJECTIONS.labels(image.quality_issue).inc()
+            logger.info(
+                "Image rejected by quality gate: %s (%dx%d, sharpness %.0f, brightness %.0f, contrast %.0f)",
+                image.quality_issue,
+                image.quality.width,
+                image.quality.height,
+                image.quality.sharpness,
+                image.quality.brightness,
+                image.quality.contrast,
+            )
+            return image
+        self._images += 1
+        self._image_bytes_in += image.original_bytes
+        self._image_bytes_sent += image.sent_bytes
+        self._prepare_seconds += image.prepare_seconds
+        self._details[image.detail] = self._details.get(image.detail, 0) + 1
+        IMAGE_PREPARE_SECONDS.labels(image.detail).observe(image.prepare_seconds)
+        logger.info(
+            "Image prepared: %dx%d, detail=%s, %d -> %d bytes (%.0f%% saved) in %.0f ms",
+            image.size[0],
+            image.size[1],
+            image.detail,
+            image.original_bytes,
+            image.sent_bytes,
+            100 * (1 - image.sent_bytes / max(1, image.original_bytes)),
+            image.prepare_seconds * 1000,
+        )
+        return image
 
-    def verify_match_from_image(self, item_name: str, image_base64: str) -> AIVerificationResult:
+    def image_stats(self) -> dict:
+        """Upload size savings, quality gate rejections and latency of image preparation and model calls."""
+        saved = self._image_bytes_in - self._image_bytes_sent
+        return {
+            "images": self._images,
+            "bytes_in": self._image_bytes_in,
+            "bytes_sent": self._image_bytes_sent,
+            "bytes_saved_ratio": round(saved / max(1, self._image_bytes_in), 3),
+            "avg_prepare_ms": round(1000 * self._prepare_seconds / max(1, self._images), 1),
+            "detail": dict(self._details),
+            "rejected": dict(self._rejected),
+            "model_calls": self._model_calls,
+            "avg_model_ms": round(1000 * self._model_seconds / max(1, self._model_calls), 1),
+        }
+
+    async def verify_match_from_image(
+        self, item_name: str, image_base64: str, timeout: Optional[float] = None
+    ) -> AIVerificationResult:
         """
         Verify if the product image semantically matches the shopping item.
         """
+        if image_base64.startswith("data:"):
+            image_base64 = image_base64.split(",", 1)[-1]
+        return await self.verify_match_from_bytes(item_name, base64.b64decode(image_base64), timeout)
+
+    async def verify_match_from_bytes(
+        self, item_name: str, image_bytes: bytes, timeout: Optional[float] = None
+    ) -> AIVerificationResult:
+        """
+        Verify a binary upload. The image is prepared and base64-encoded once.
+        """
+        return await self.verify_match_prepared(item_name, await self.prepare_image(image_bytes), timeout)
+
+    async def verify_match_prepared(
+        self, item_name: str, image: PreparedImage, timeout: Optional[float] = None
+    ) -> AIVerificationResult:
+        """
+        Ask the vision model whether the prepared image matches the item.
+        timeout is what is left of the request budget, None for no limit.
+        """
         try:
-            image_url = self._build_image_url(image_base64)
             user_text = (
                 f'Artikal sa liste: "{item_name}"\n\n'
                 "Da li slika prikazuje proizvod koji SEMANTIČKI ODGOVARA artiklu?"
@@ -74,7 +200,9 @@ class AIVerificationService:
 
             logger.info("Verifying image match for item='%s'", item_name)
 
-            response = self.client.chat.completions.create(
+            response = await self._create(
+                timeout,
+                "single",
                 model=self.settings.openai_model,
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
@@ -82,7 +210,10 @@ class AIVerificationService:
                         "role": "user",
                         "content": [
                             {"type": "text", "text": user_text},
-                            {"type": "image_url", "image_url": {"url": image_url}},
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": image.data_url, "detail": image.detail},
+                            },
                         ],
                     },
                 ],
@@ -92,25 +223,17 @@ class AIVerificationService:
             )
 
             result_text = response.choices[0].message.content or "{}"
-            result_json = json.loads(result_text)
-
-            is_match = bool(result_json.get("is_match", False))
-            confidence = float(result_json.get("confidence", 0.0))
-            reasoning = str(result_json.get("reasoning", "Nije moguće utvrditi."))
-
-            confidence = max(0.0, min(1.0, confidence))
+            result = self._parse_result(json.loads(result_text))
 
             logger.info(
                 "AI verification complete: match=%s, confidence=%.2f",
-                is_match,
-                confidence,
+                result.is_match,
+                result.confidence,
             )
 
-            return AIVerificationResult(
-                is_match=is_match,
-                confidence=confidence,
-                reasoning=reasoning,
-            )
+            return result
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except json.JSONDecodeError as exc:
             logger.error("Failed to parse AI response as JSON: %s", exc)
             raise ValueError("AI returned invalid response format") from exc
@@ -118,21 +241,99 @@ class AIVerificationService:
             logger.error("AI verification failed: %s", exc)
             raise ValueError(f"AI verification failed: {str(exc)}") from exc
 
-    def _build_image_url(self, image_base64: str) -> str:
+    async def verify_matches_prepared(
+        self, item_names: List[str], image: PreparedImage, timeout: Optional[float] = None
+    ) -> List[Optional[AIVerificationResult]]:
         """
-        Build a data URL for the base64 image. Detects PNG/JPEG when possible.
+        Check one prepared product image against several items with a single model call.
+        Returns results in item order; None where the model skipped an item.
         """
-        if image_base64.startswith("data:image/"):
-            return image_base64
+        try:
+            item_lines = "\n".join(f'{i}. "{name}"' for i, name in enumerate(item_names, 1))
+            user_text = (
+                f"Artikli sa liste:\n{item_lines}\n\n"
+                "Za svaki artikal: da li slika prikazuje proizvod koji mu SEMANTIČKI ODGOVARA?"
+            )
+
+            logger.info("Verifying image against %d items in one call", len(item_names))
+
+            response = await self._create(
+                timeout,
+                "batch",
+                model=self.settings.openai_model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT + BATCH_PROMPT_SUFFIX},
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": user_text},
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": image.data_url, "detail": image.detail},
+                            },
+                        ],
+                    },
+                ],
+                temperature=0.2,
+                max_tokens=BATCH_BASE_TOKENS + BATCH_TOKENS_PER_ITEM * len(item_names),
+                response_format={"type": "json_object"},
+            )
+
+            result_json = json.loads(response.choices[0].message.content or "{}")
+
+            results: List[Optional[AIVerificationResult]] = [None] * len(item_names)
+            for entry in result_json.get("results", []):
+                try:
+                    index = int(entry.get("id")) - 1
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= index < len(item_names):
+                    results[index] = self._parse_result(entry)
+
+            return results
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except json.JSONDecodeError as exc:
+            logger.error("Failed to parse AI batch response as JSON: %s", exc)
+            raise ValueError("AI returned invalid response format") from exc
+        except Exception as exc:
+            logger.error("AI batch verification failed: %s", exc)
+            raise ValueError(f"AI verification failed: {str(exc)}") from exc
 
-        mime_type = "image/jpeg"
+    async def _create(self, timeout: Optional[float], kind: str, **kwargs):
+        """
+        Model call, bounded and hedged when the request has a budget.
+        kind ("single" or "batch") labels the call's latency metric.
+        """
+        start = time.perf_counter()
         try:
-            image_bytes = base64.b64decode(image_base64, validate=False)
-            if image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
-                mime_type = "image/png"
-            elif image_bytes.startswith(b"\xff\xd8\xff"):
-                mime_type = "image/jpeg"
+            if timeout is None:
+                response = await self.pool.create(**kwargs)
+            else:
+                response = await self.pool.create_within(timeout, **kwargs)
         except Exception:
-            logger.warning("Failed to detect image type, defaulting to JPEG")
+            AI_CALL_SECONDS.labels(kind, "error").observe(time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        AI_CALL_SECONDS.labels(kind, "ok").observe(elapsed)
+        self._model_calls += 1
+        self._model_seconds += elapsed
+        logger.info("Vision model call took %.0f ms", elapsed * 1000)
+        return response
+
+    @staticmethod
+    def _parse_result(result_json: dict) -> AIVerificationResult:
+        """
+        Validate and extract fields from one JSON verdict.
+        """
+        is_match = bool(result_json.get("is_match", False))
+        confidence = float(result_json.get("confidence", 0.0))
+        reasoning = str(result_json.get("reasoning", "Nije moguće utvrditi."))
+
+        confidence = max(0.0, min(1.0, confidence))
 
-        return f"data:{mime_type};base64,{image_base64}"
+        return AIVerificationResult(
+            is_match=is_match,
+            confidence=confidence,
+            reasoning=reasoning,
+        )
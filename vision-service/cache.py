@@ -0,0 +1,294 @@
+"""
+Result Cache Module.
+Content-addressed cache for verification results.
+
+Repeated photos of the same product (and backend retries after timeouts)
+reuse earlier results instead of paying for another vision model call.
+
+Only hashes and results are stored - never the image itself.
+
+Stores:
+- MemoryCacheStore: per-process LRU with TTL (default)
+- DiskCacheStore: SQLite file shared by several workers on the same host;
+  its calls run on a dedicated thread so the event loop never waits on the file
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+ResultT = TypeVar("ResultT")
+
+# Share of the disk cache limit freed when it runs over, so eviction runs
+# once per batch of writes instead of on every write
+EVICTION_HEADROOM = 0.1
+
+
+def image_hash(image_bytes: bytes) -> str:
+    """Hash of the decoded image bytes (not the base64 text)."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def normalize_item_name(item_name: str) -> str:
+    """Normalize item names so 'Mlijeko ' and 'mlijeko' share a cache entry."""
+    return " ".join(item_name.lower().split())
+
+
+def make_key(*parts: str) -> str:
+    """Build a fixed-size key from several parts."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class CacheStore:
+    """
+    Base class for cache stores.
+    Values are JSON strings so every store can be shared or persisted.
+    """
+
+    name = "base"
+
+    # Executor for stores whose calls block on I/O; None runs calls inline
+    executor: Optional[Executor] = None
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCacheStore(CacheStore):
+    """
+    Bounded in-memory store with TTL and LRU eviction.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class DiskCacheStore(CacheStore):
+    """
+    SQLite-backed store shared by all workers that point at the same file.
+    Uses wall-clock time so expiry is consistent across processes.
+
+    Reads do not write: hits are noted in memory and their access times are
+    written with the next set. Least recently used rows are evicted only when
+    the table has grown past max_entries.
+    """
+
+    name = "disk"
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)"
+        )
+        self._conn.commit()
+        # Row count as of the last eviction check plus the new keys written since;
+        # other workers' writes are seen on the next check
+        self._entries = self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._touched[key] = now
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            # Overwriting a key does not add a row; only a new key counts
+            updated = self._conn.execute(
+                "UPDATE results SET value = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (value, now + self.ttl_seconds, now, key),
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, now + self.ttl_seconds, now),
+                )
+                self._entries += 1
+            self._flush_touched()
+            if self._entries > self.max_entries:
+                self._evict(now)
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Write the access times of the hits since the last write."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE results SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows; if still over the limit, the least recently used down to the headroom."""
+        self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        entries = self._count()
+        if entries > self.max_entries:
+            keep = int(self.max_entries * (1 - EVICTION_HEADROOM))
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                (entries - keep,),
+            )
+            entries = keep
+        self._entries = entries
+
+    def size(self) -> int:
+        """Entry count without a query (see _entries), so /health never waits on the file."""
+        return min(self._entries, self.max_entries)
+
+    def close(self) -> None:
+        """Write pending access times and release the file, after queued calls finish."""
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    Typed cache for pydantic results, with hit/miss counters per namespace.
+    """
+
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    async def _call(self, method: Callable[..., ResultT], *args) -> ResultT:
+        """Run a store call inline, or on the store's executor if it blocks."""
+        if self.store.executor is None:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.store.executor, method, *args)
+
+    async def get(self, namespace: str, key: str, model: Type[ModelT]) -> Optional[ModelT]:
+        try:
+            value = await self._call(self.store.get, f"{namespace}:{key}")
+        except Exception as exc:
+            logger.warning("Cache read failed: %s", exc)
+            value = None
+
+        if value is None:
+            self._count(namespace, "misses")
+            return None
+
+        self._count(namespace, "hits")
+        return model.model_validate_json(value)
+
+    async def set(self, namespace: str, key: str, result: BaseModel) -> None:
+        try:
+            await self._call(self.store.set, f"{namespace}:{key}", result.model_dump_json())
+        except Exception as exc:
+            logger.warning("Cache write failed: %s", exc)
+
+    def close(self) -> None:
+        self.store.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {ns: dict(values) for ns, values in self._stats.items()}
+        return {
+            "backend": self.store.name,
+            "entries": self.store.size(),
+            "counters": counters,
+        }
+
+
+def create_result_cache(settings: Settings) -> Optional[ResultCache]:
+    """
+    Create the configured result cache, or None when caching is disabled.
+    """
+    if settings.cache_backend == "none" or settings.cache_max_entries <= 0:
+        return None
+
+    if settings.cache_backend == "disk":
+        store: CacheStore = DiskCacheStore(
+            settings.cache_path, settings.cache_max_entries, settings.cache_ttl_seconds
+        )
+    else:
+        store = MemoryCacheStore(settings.cache_max_entries, settings.cache_ttl_seconds)
+
+    return ResultCache(store)
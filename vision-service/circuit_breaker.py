@@ -0,0 +1,172 @@
+"""
+Circuit Breaker Module.
+Stops sending model calls while OpenAI is failing or slow.
+
+States:
+- closed: calls flow; outcomes go into a rolling window of the last N calls
+- open: the failure rate (errors, timeouts and calls slower than the latency
+  threshold) crossed the limit; calls fail immediately with CircuitOpenError
+  and the API answers 503 instead of waiting on the network
+- half_open: after the open period a few probe calls are let through; if they
+  all succeed the circuit closes, any failure opens it again
+
+All methods run on the event loop, so no locking is needed.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Deque
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The model is not called while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"AI circuit open, retrying the model in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Error-rate and latency circuit breaker over a count-based window.
+    """
+
+    def __init__(
+        self,
+        window_size: int,
+        min_calls: int,
+        error_rate: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        half_open_probes: int,
+    ):
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=max(window_size, self.min_calls))  # True = failed
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "CircuitBreaker":
+        return cls(
+            window_size=settings.circuit_window_size,
+            min_calls=settings.circuit_min_calls,
+            error_rate=settings.circuit_error_rate,
+            slow_call_seconds=settings.circuit_slow_call_seconds,
+            open_seconds=settings.circuit_open_seconds,
+            half_open_probes=settings.circuit_half_open_probes,
+        )
+
+    def _retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def check(self) -> None:
+        """
+        Fail fast while open, without taking a probe slot.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and the open period has not passed
+        """
+        if self.state == OPEN and self._retry_after() > 0:
+            self.short_circuited += 1
+            raise CircuitOpenError(self._retry_after())
+
+    def acquire(self) -> bool:
+        """
+        Admit one model call. Returns True when the call is a half-open probe.
+
+        Raises:
+            CircuitOpenError: If the call is not allowed
+        """
+        if self.state == OPEN:
+            if self._retry_after() > 0:
+                self.short_circuited += 1
+                raise CircuitOpenError(self._retry_after())
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info("AI circuit half-open, probing the model")
+
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.open_seconds)
+            self._probes_in_flight += 1
+            return True
+
+        return False
+
+    def record(self, is_probe: bool, failed: bool, duration: float) -> None:
+        """Record the outcome of an admitted call; slow successes count as failures."""
+        failed = failed or duration >= self.slow_call_seconds
+
+        if is_probe:
+            if self.state != HALF_OPEN:
+                return
+            self._probes_in_flight -= 1
+            if failed:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info("AI circuit closed, model calls resumed")
+            return
+
+        # Late results of calls admitted before the circuit opened are ignored
+        if self.state != CLOSED:
+            return
+
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and self.failure_rate() >= self.error_rate:
+            self._open()
+
+    def release(self, is_probe: bool) -> None:
+        """An admitted call ended without a verdict on model health (e.g. a bad request)."""
+        if is_probe and self.state == HALF_OPEN:
+            self._probes_in_flight -= 1
+
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(
+            "AI circuit opened (failure rate %.0f%% over %d calls), failing fast for %.0fs",
+            self.failure_rate() * 100,
+            len(self._outcomes),
+            self.open_seconds,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "window_calls": len(self._outcomes),
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+            "retry_after_seconds": round(self._retry_after(), 1) if self.state == OPEN else 0.0,
+        }
@@ -13,8 +13,43 @@ class Settings(BaseSettings):
 
     Environment variables:
     - OPENAI_API_KEY: API key for OpenAI GPT models
+    - AI_BACKEND: "openai", or "local" for the offline stand-in ocr-service/fake_openai.py (default: openai)
+    - AI_LOCAL_BASE_URL: Base URL of the local stand-in (default: http://127.0.0.1:8090/v1)
     - OPENAI_MODEL: Model to use (default: gpt-4o-mini)
+    - OPENAI_TIMEOUT_SECONDS: Total timeout per model call attempt (default: 12)
+    - OPENAI_CONNECT_TIMEOUT_SECONDS: Connect timeout per attempt (default: 5)
+    - OPENAI_MAX_CONNECTIONS: Shared keep-alive connection pool size (default: 20)
+    - OPENAI_KEEPALIVE_SECONDS: Idle time before a pooled connection is closed (default: 30)
+    - OPENAI_MAX_CONCURRENCY: Model calls in flight at once, others queue (default: 8)
+    - OPENAI_QUEUE_TIMEOUT_SECONDS: Max wait for a free call slot (default: 5)
+    - OPENAI_MAX_RETRIES: Retries for 429/5xx/connection errors (default: 2)
+    - OPENAI_RETRY_BASE_SECONDS: Base of the jittered exponential backoff (default: 0.5)
+    - OPENAI_HEDGE_ENABLED: Send a second model call when the first is slower than p95 (default: True)
+    - OPENAI_HEDGE_MIN_SECONDS: Never hedge earlier than this (default: 2)
+    - REQUEST_BUDGET_SECONDS: Latency budget of a request without X-Request-Budget-Ms (default: 50)
+    - CIRCUIT_BREAKER_ENABLED: Stop calling the AI while it fails or is slow (default: True)
+    - CIRCUIT_WINDOW_SIZE: Recent model calls the failure rate is measured over (default: 20)
+    - CIRCUIT_MIN_CALLS: Calls in the window before the circuit can open (default: 10)
+    - CIRCUIT_ERROR_RATE: Failure rate at which the circuit opens (default: 0.5)
+    - CIRCUIT_SLOW_CALL_SECONDS: Calls slower than this count as failures (default: 8)
+    - CIRCUIT_OPEN_SECONDS: Time the circuit stays open before probing (default: 30)
+    - CIRCUIT_HALF_OPEN_PROBES: Successful probe calls needed to close the circuit (default: 2)
     - CONFIDENCE_THRESHOLD: Minimum confidence for match (default: 0.6)
+    - AI_BATCH_SIZE: Items checked per vision call on /verify/batch (default: 10)
+    - MAX_UPLOAD_BYTES: Largest accepted binary image upload (default: 15 MB)
+    - IMAGE_PREP_ENABLED: Resize and re-encode images before upload (default: True)
+    - IMAGE_DETAIL: Vision detail level, "auto", "low" or "high" (default: auto)
+    - IMAGE_DETAIL_EDGE_THRESHOLD: Edge density from which auto picks high detail (default: 0.06)
+    - IMAGE_FORMAT: Re-encoding format, "jpeg" or "webp" (default: jpeg)
+    - IMAGE_QUALITY: JPEG/WebP quality of re-encoded images (default: 80)
+    - QUALITY_GATE_ENABLED: Reject blurry, dark, washed-out or tiny photos before the model call (default: True)
+    - QUALITY_MIN_SIDE: Shortest accepted image side in pixels (default: 80)
+    - QUALITY_MIN_SHARPNESS: Lowest accepted sharpness, variance of the Laplacian (default: 10)
+    - QUALITY_MIN_CONTRAST: Lowest accepted spread between text and background levels, 0-255 (default: 70)
+    - CACHE_BACKEND: Result cache store, "memory", "disk" or "none" (default: memory)
+    - CACHE_MAX_ENTRIES: Maximum cached results (default: 1024)
+    - CACHE_TTL_SECONDS: Lifetime of a cached result (default: 600)
+    - CACHE_PATH: SQLite file for the disk store, shared between workers
     - DEBUG: Enable debug logging (default: False)
     """
 
@@ -22,9 +57,69 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"
 
+    # AI backend: "openai" or "local" (ocr-service/fake_openai.py, no API key or network needed)
+    ai_backend: str = "openai"
+    ai_local_base_url: str = "http://127.0.0.1:8090/v1"
+
+    # OpenAI client pool
+    # Worst case (queue + 3 attempts + backoff) stays under the backend's 60 s timeout
+    openai_timeout_seconds: float = 12.0
+    openai_connect_timeout_seconds: float = 5.0
+    openai_max_connections: int = 20
+    openai_keepalive_seconds: float = 30.0
+    openai_max_concurrency: int = 8
+    openai_queue_timeout_seconds: float = 5.0
+    openai_max_retries: int = 2
+    openai_retry_base_seconds: float = 0.5
+    openai_hedge_enabled: bool = True
+    openai_hedge_min_seconds: float = 2.0
+
+    # Request latency budget (X-Request-Budget-Ms header overrides the default)
+    # Below the backend's 60 s timeout so no result is produced after it gave up
+    request_budget_seconds: float = 50.0
+
+    # AI circuit breaker
+    # While open, requests fail fast with 503 instead of waiting on the network
+    circuit_breaker_enabled: bool = True
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 10
+    circuit_error_rate: float = 0.5
+    circuit_slow_call_seconds: float = 8.0
+    circuit_open_seconds: float = 30.0
+    circuit_half_open_probes: int = 2
+
     # Verification thresholds
     confidence_threshold: float = 0.6
 
+    # Batch verification (/verify/batch)
+    ai_batch_size: int = 10
+
+    # Binary uploads (/verify/upload)
+    max_upload_bytes: int = 15 * 1024 * 1024
+
+    # Image preparation before the vision call
+    # Images are shrunk to the resolution the model uses for the chosen detail
+    image_prep_enabled: bool = True
+    image_detail: str = "auto"
+    image_detail_edge_threshold: float = 0.06
+    image_format: str = "jpeg"
+    image_quality: int = 80
+
+    # Image quality gate (quality_gate.py), checked on a small grayscale copy
+    # Rejected photos get a retake message without a model call. The model
+    # recognizes products in softer photos than OCR can read, hence the lower
+    # sharpness minimum than ocr-service
+    quality_gate_enabled: bool = True
+    quality_min_side: int = 80
+    quality_min_sharpness: float = 10.0
+    quality_min_contrast: float = 70.0
+
+    # Result cache (keyed on item name + image hash, never stores images)
+    cache_backend: str = "memory"
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 600
+    cache_path: str = "/tmp/vision-service-cache.sqlite3"
+
     # Debug mode
     debug: bool = False
 
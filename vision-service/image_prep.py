@@ -0,0 +1,205 @@
+"""
+Image Preparation Module.
+Shrinks product photos to what the vision model actually looks at before upload.
+
+OpenAI rescales images on its side: with detail "low" the model sees a 512 px
+version, with "high" the image is fitted into 2048 x 2048 and its short side
+scaled to 768 px. A 12 MP phone photo is uploaded and billed in full only to be
+thrown away, so images are resized to those limits here and re-encoded as JPEG
+or WebP.
+
+Detail "auto" picks "low" (a flat 85 image tokens) for small images and for
+photos with little fine structure, and "high" when the edge density suggests
+printed text (labels, price tags) the model needs to read.
+
+The quality gate (quality_gate.py) runs on the decoded image first; a rejected
+image is not resized or encoded at all.
+"""
+
+import base64
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from PIL import Image, ImageFilter, ImageOps
+
+from config import Settings
+from quality_gate import WORK_SIDE, QualityReport, check_quality
+
+logger = logging.getLogger(__name__)
+
+# What the model sees for each detail level
+LOW_DETAIL_SIZE = 512
+HIGH_DETAIL_LONG_SIDE = 2048
+HIGH_DETAIL_SHORT_SIDE = 768
+
+# Edge density is measured on a thumbnail; pixels above EDGE_LEVEL count as edges
+EDGE_SAMPLE_SIZE = 256
+EDGE_LEVEL = 48
+
+_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+
+@dataclass
+class PreparedImage:
+    """An image ready for the vision model, with what preparing it saved."""
+
+    data_url: str
+    detail: str
+    original_bytes: int
+    sent_bytes: int
+    size: Tuple[int, int]
+    prepare_seconds: float
+    quality: Optional[QualityReport] = None
+
+    @property
+    def quality_issue(self) -> Optional[str]:
+        """Why the quality gate rejected the image, None if it passed or was not checked."""
+        return self.quality.issue if self.quality is not None else None
+
+
+def sniff_mime_type(header: bytes) -> str:
+    """
+    Detect the image type from the first bytes. Defaults to JPEG.
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    return "image/jpeg"
+
+
+def data_url(image_bytes: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(image_bytes).decode('ascii')}"
+
+
+def target_size(width: int, height: int, detail: str) -> Tuple[int, int]:
+    """Largest size the model uses at this detail level; images are never enlarged."""
+    if detail == "low":
+        scale = LOW_DETAIL_SIZE / max(width, height)
+    else:
+        scale = min(HIGH_DETAIL_LONG_SIDE / max(width, height), HIGH_DETAIL_SHORT_SIDE / min(width, height))
+    if scale >= 1.0:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def edge_density(image: Image.Image) -> float:
+    """Fraction of edge pixels on a grayscale thumbnail (0.0 - 1.0)."""
+    sample = image.convert("L")
+    sample.thumbnail((EDGE_SAMPLE_SIZE, EDGE_SAMPLE_SIZE))
+    histogram = sample.filter(ImageFilter.FIND_EDGES).histogram()
+    return sum(histogram[EDGE_LEVEL:]) / max(1, sum(histogram))
+
+
+def choose_detail(image: Image.Image, settings: Settings) -> str:
+    """IMAGE_DETAIL if fixed, otherwise low for small or plain images and high for text."""
+    if settings.image_detail in ("low", "high"):
+        return settings.image_detail
+    if max(image.size) <= LOW_DETAIL_SIZE:
+        return "low"
+    if edge_density(image) >= settings.image_detail_edge_threshold:
+        return "high"
+    return "low"
+
+
+def assess_quality(image_bytes: bytes, settings: Settings) -> Optional[QualityReport]:
+    """Quality gate on a reduced grayscale decode, None if the image cannot be decoded."""
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        # draft never goes below the requested size, so small images keep their resolution
+        image.draft("L", (WORK_SIDE, WORK_SIDE))
+        return check_quality(ImageOps.exif_transpose(image).convert("L"), settings)
+    except (OSError, ValueError) as exc:
+        logger.warning("Image quality could not be checked: %s", exc)
+        return None
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Flatten transparency onto white; JPEG has no alpha channel."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def prepare_image(image_bytes: bytes, settings: Settings) -> PreparedImage:
+    """
+    Resize, re-encode and pick the detail level for one image.
+
+    The original bytes are sent unchanged (with the configured detail, "high"
+    for auto) when preparation is off, the image cannot be decoded, or
+    re-encoding would not make it smaller.
+
+    With QUALITY_GATE_ENABLED the result carries the quality report. An image
+    that fails it comes back without data_url and must not be sent.
+    """
+    start = time.perf_counter()
+    original = PreparedImage(
+        data_url="",
+        detail="low" if settings.image_detail == "low" else "high",
+        original_bytes=len(image_bytes),
+        sent_bytes=len(image_bytes),
+        size=(0, 0),
+        prepare_seconds=0.0,
+    )
+
+    if not settings.image_prep_enabled:
+        if settings.quality_gate_enabled:
+            original.quality = assess_quality(image_bytes, settings)
+        if original.quality_issue is None:
+            original.data_url = data_url(image_bytes, sniff_mime_type(image_bytes[:12]))
+        original.prepare_seconds = time.perf_counter() - start
+        return original
+
+    pil_format, mime_type = _FORMATS.get(settings.image_format, _FORMATS["jpeg"])
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        original.size = image.size
+
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when the result stays large enough
+        image.draft("RGB", target_size(image.width, image.height, "high"))
+        image = _to_rgb(ImageOps.exif_transpose(image))
+
+        # A photo the model cannot judge is not worth resizing and encoding
+        quality = check_quality(image.convert("L"), settings) if settings.quality_gate_enabled else None
+        if quality is not None and quality.issue is not None:
+            original.quality = quality
+            original.prepare_seconds = time.perf_counter() - start
+            return original
+
+        detail = choose_detail(image, settings)
+        size = target_size(image.width, image.height, detail)
+        if size != image.size:
+            image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        buffer = io.BytesIO()
+        image.save(buffer, pil_format, quality=settings.image_quality, optimize=True)
+        encoded = buffer.getvalue()
+    except (OSError, ValueError) as exc:
+        logger.warning("Image could not be prepared, sending it unchanged: %s", exc)
+        original.data_url = data_url(image_bytes, sniff_mime_type(image_bytes[:12]))
+        original.prepare_seconds = time.perf_counter() - start
+        return original
+
+    if len(encoded) >= len(image_bytes) and size == original.size:
+        # Already small and well compressed
+        encoded, mime_type = image_bytes, sniff_mime_type(image_bytes[:12])
+
+    return PreparedImage(
+        data_url=data_url(encoded, mime_type),
+        detail=detail,
+        original_bytes=len(image_bytes),
+        sent_bytes=len(encoded),
+        size=image.size,
+        prepare_seconds=time.perf_counter() - start,
+        quality=quality,
+    )
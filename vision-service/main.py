@@ -1,17 +1,46 @@
 """
 Vision AI Verification Microservice.
 Main FastAPI application.
+
+Endpoints:
+- POST /verify, /verify/upload, /verify/batch: Verify items against product images
+- GET /health: Health check endpoint
+- GET /metrics: Prometheus metrics
 """
 
+import asyncio
+import base64
 import logging
+import math
+import time
 from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from ai_service import AIVerificationService
+from circuit_breaker import CircuitOpenError
+from cache import ResultCache, create_result_cache, image_hash, make_key, normalize_item_name
 from config import get_settings
-from models import VerifyItemRequest, VerifyItemResponse
+from deadline import BUDGET_HEADER, Deadline, DeadlineExceeded
+from metrics import (
+    AI_BATCH_ITEM_RETRIES,
+    CONTENT_TYPE_LATEST,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    register_stats,
+    render,
+)
+from models import (
+    AIVerificationResult,
+    BatchVerifyRequest,
+    BatchVerifyResponse,
+    VerifyItemRequest,
+    VerifyItemResponse,
+)
+from quality_gate import RETAKE_MESSAGES
+from uploads import UploadError, get_item_name, read_image_upload
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,21 +50,40 @@ logger = logging.getLogger(__name__)
 
 
 vision_service: AIVerificationService | None = None
+result_cache: ResultCache | None = None
+
+
+def _decode_image(image_base64: str) -> bytes:
+    """
+    Decode a base64 image, with or without a data URL prefix.
+    """
+    if image_base64.startswith("data:"):
+        image_base64 = image_base64.split(",", 1)[-1]
+    return base64.b64decode(image_base64)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global vision_service
+    global vision_service, result_cache
 
     settings = get_settings()
     logger.info("Initializing Vision AI verification service...")
     vision_service = AIVerificationService()
+    result_cache = create_result_cache(settings)
+    if result_cache is not None:
+        logger.info("Result cache enabled: %s", result_cache.store.name)
     logger.info("Service initialized. AI model: %s", settings.openai_model)
+    if settings.ai_backend == "local":
+        logger.info("AI backend: local stand-in at %s", settings.ai_local_base_url)
 
     yield
 
     logger.info("Shutting down service...")
+    await vision_service.close()
+    if result_cache is not None:
+        await asyncio.to_thread(result_cache.close)
     vision_service = None
+    result_cache = None
 
 
 app = FastAPI(
@@ -57,56 +105,162 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request duration by route and status, and the number of requests in flight."""
+    start = time.perf_counter()
+    with REQUESTS_IN_FLIGHT.track_inprogress():
+        response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        route.path if route is not None else "other",
+        str(response.status_code),
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+def _service_stats() -> dict:
+    """Counters of the running components, shared by /health and /metrics."""
+    return {
+        "cache": result_cache.stats() if result_cache is not None else None,
+        "openai": vision_service.pool_stats() if vision_service is not None else None,
+        "images": vision_service.image_stats() if vision_service is not None else None,
+    }
+
+
+register_stats(_service_stats)
+
+
 @app.get("/health")
 async def health_check():
     settings = get_settings()
     return {
         "status": "healthy",
         "ai_model": settings.openai_model,
+        "ai_backend": settings.ai_backend,
         "services": {"vision_ai": vision_service is not None},
+        **_service_stats(),
     }
 
 
-@app.post("/verify", response_model=VerifyItemResponse)
-async def verify_item(request: VerifyItemRequest):
-    settings = get_settings()
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request, image preparation and model call latencies, cache and queues."""
+    return Response(content=render(), media_type=CONTENT_TYPE_LATEST)
+
 
+def _ensure_service() -> None:
     if vision_service is None:
         raise HTTPException(
             status_code=503,
             detail="Servis nije inicijaliziran. Pokušajte ponovo.",
         )
 
-    try:
-        logger.info("Processing verification request for item: '%s'", request.item_name)
-        ai_result = vision_service.verify_match_from_image(
-            request.item_name,
-            request.image_base64,
-        )
 
-        is_match = ai_result.is_match and ai_result.confidence >= settings.confidence_threshold
+def _circuit_open(exc: CircuitOpenError) -> HTTPException:
+    """
+    503 while the AI circuit is open, so clients retry later instead of waiting.
+    """
+    return HTTPException(
+        status_code=503,
+        detail="AI servis je trenutno nedostupan. Pokušajte ponovo za nekoliko sekundi.",
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+def _request_deadline(budget_ms: float | None) -> Deadline:
+    """Deadline from the X-Request-Budget-Ms header, or REQUEST_BUDGET_SECONDS."""
+    return Deadline.from_header(budget_ms, get_settings().request_budget_seconds)
 
-        if is_match:
-            message = f"✓ Proizvod potvrđen: '{request.item_name}' odgovara slici."
+
+def _deadline_exceeded() -> HTTPException:
+    """
+    504 once the budget is spent, instead of a late answer the caller no longer reads.
+    """
+    return HTTPException(
+        status_code=504,
+        detail="Verifikacija nije završena u predviđenom vremenu. Molimo pokušajte ponovo.",
+    )
+
+
+def _build_response(item_name: str, ai_result: AIVerificationResult) -> VerifyItemResponse:
+    """
+    Apply the confidence threshold and build the user-facing message.
+    """
+    settings = get_settings()
+    is_match = ai_result.is_match and ai_result.confidence >= settings.confidence_threshold
+
+    if is_match:
+        message = f"✓ Proizvod potvrđen: '{item_name}' odgovara slici."
+    else:
+        if ai_result.is_match:
+            message = (
+                f"⚠ Nisam siguran da '{item_name}' odgovara slici. "
+                f"Pouzdanost: {ai_result.confidence:.0%}. Molimo provjerite."
+            )
         else:
-            if ai_result.is_match:
-                message = (
-                    f"⚠ Nisam siguran da '{request.item_name}' odgovara slici. "
-                    f"Pouzdanost: {ai_result.confidence:.0%}. Molimo provjerite."
-                )
-            else:
-                message = (
-                    f"✗ Proizvod '{request.item_name}' NE odgovara slici. "
-                    f"{ai_result.reasoning}"
-                )
+            message = (
+                f"✗ Proizvod '{item_name}' NE odgovara slici. "
+                f"{ai_result.reasoning}"
+            )
 
-        return VerifyItemResponse(
-            is_match=is_match,
-            confidence=ai_result.confidence,
-            ocr_text="",
-            extracted_price=None,
-            message=message,
-        )
+    return VerifyItemResponse(
+        is_match=is_match,
+        confidence=ai_result.confidence,
+        ocr_text="",
+        extracted_price=None,
+        message=message,
+    )
+
+
+def _retake_response(issue: str) -> VerifyItemResponse:
+    """
+    Answer for an image the quality gate rejected: what to fix when retaking it.
+    """
+    return VerifyItemResponse(
+        is_match=False,
+        confidence=0.0,
+        ocr_text="",
+        extracted_price=None,
+        message=RETAKE_MESSAGES[issue],
+    )
+
+
+async def _verify(
+    item_name: str,
+    load_image: Callable[[], bytes],
+    deadline: Deadline,
+) -> VerifyItemResponse:
+    """
+    Shared verification flow for base64 and binary uploads.
+    load_image returns the raw image bytes; the image is only prepared
+    for the model on a cache miss, and photos failing the quality gate
+    are answered without a model call.
+    """
+    try:
+        logger.info("Processing verification request for item: '%s'", item_name)
+        image_bytes = load_image()
+        ai_key = make_key(normalize_item_name(item_name), image_hash(image_bytes))
+        ai_result = await result_cache.get("ai", ai_key, AIVerificationResult) if result_cache else None
+        if ai_result is None:
+            image = await vision_service.prepare_image(image_bytes)
+            if image.quality_issue is not None:
+                return _retake_response(image.quality_issue)
+            ai_result = await vision_service.verify_match_prepared(
+                item_name, image, deadline.remaining()
+            )
+            if result_cache is not None:
+                await result_cache.set("ai", ai_key, ai_result)
+        else:
+            logger.info("AI verification cache hit")
+
+        return _build_response(item_name, ai_result)
+    except CircuitOpenError as exc:
+        logger.warning("Verification failed: %s", exc)
+        raise _circuit_open(exc) from exc
+    except DeadlineExceeded as exc:
+        logger.warning("Verification failed: %s", exc)
+        raise _deadline_exceeded() from exc
     except ValueError as exc:
         logger.error("Verification failed: %s", exc)
         raise HTTPException(
@@ -121,6 +275,159 @@ async def verify_item(request: VerifyItemRequest):
         ) from exc
 
 
+@app.post("/verify", response_model=VerifyItemResponse)
+async def verify_item(
+    request: VerifyItemRequest,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER),
+):
+    _ensure_service()
+    return await _verify(
+        request.item_name,
+        lambda: _decode_image(request.image_base64),
+        _request_deadline(budget_ms),
+    )
+
+
+@app.post("/verify/upload", response_model=VerifyItemResponse)
+async def verify_item_upload(
+    request: Request,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER),
+):
+    """
+    Verify a product image sent as multipart/form-data ("item_name" + "image")
+    or as a raw image/* body with ?item_name=... - no base64 inflation on the wire.
+    """
+    _ensure_service()
+    settings = get_settings()
+    deadline = _request_deadline(budget_ms)
+
+    try:
+        upload = await read_image_upload(request, settings.max_upload_bytes)
+        item_name = get_item_name(upload)
+    except UploadError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    except Exception as exc:
+        logger.error("Failed to read upload: %s", exc)
+        raise HTTPException(
+            status_code=400,
+            detail="Neispravan zahtjev. Slika nije mogla biti pročitana.",
+        ) from exc
+
+    return await _verify(item_name, lambda: upload.image, deadline)
+
+
+async def _verify_image_items(
+    image_base64: str, item_names: List[str], deadline: Deadline
+) -> List[VerifyItemResponse]:
+    """
+    Responses for several items shown in one image.
+    Cached items are skipped; the rest are asked in prompts of AI_BATCH_SIZE items,
+    all sharing one prepared copy of the image. If the image fails the quality
+    gate, those items get the retake message instead.
+    """
+    settings = get_settings()
+    image_bytes = _decode_image(image_base64)
+    image_key = image_hash(image_bytes)
+    results: List[AIVerificationResult | None] = [None] * len(item_names)
+
+    # Group duplicate names so each distinct item is asked once
+    pending: Dict[str, List[int]] = {}
+    for index, item_name in enumerate(item_names):
+        ai_key = make_key(normalize_item_name(item_name), image_key)
+        cached = await result_cache.get("ai", ai_key, AIVerificationResult) if result_cache else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.setdefault(ai_key, []).append(index)
+
+    keys = list(pending)
+    if not keys:
+        return [_build_response(name, result) for name, result in zip(item_names, results)]
+    batch_size = max(1, settings.ai_batch_size)
+    image = await vision_service.prepare_image(image_bytes)
+    if image.quality_issue is not None:
+        # Items answered from the cache keep their result
+        retake = _retake_response(image.quality_issue)
+        return [
+            _build_response(name, result) if result is not None else retake
+            for name, result in zip(item_names, results)
+        ]
+
+    async def run_chunk(chunk_keys: List[str]) -> None:
+        chunk_names = [item_names[pending[key][0]] for key in chunk_keys]
+        chunk_results = await vision_service.verify_matches_prepared(
+            chunk_names, image, deadline.remaining()
+        )
+        for key, item_name, ai_result in zip(chunk_keys, chunk_names, chunk_results):
+            if ai_result is None:
+                # Model skipped this item in the batch answer - ask for it alone
+                AI_BATCH_ITEM_RETRIES.inc()
+                ai_result = await vision_service.verify_match_prepared(
+                    item_name, image, deadline.remaining()
+                )
+            if result_cache is not None:
+                await result_cache.set("ai", key, ai_result)
+            for index in pending[key]:
+                results[index] = ai_result
+
+    await asyncio.gather(*(
+        run_chunk(keys[i:i + batch_size]) for i in range(0, len(keys), batch_size)
+    ))
+    return [_build_response(name, result) for name, result in zip(item_names, results)]
+
+
+@app.post("/verify/batch", response_model=BatchVerifyResponse)
+async def verify_batch(
+    request: BatchVerifyRequest,
+    budget_ms: float | None = Header(default=None, alias=BUDGET_HEADER),
+):
+    """
+    Verify many items in one request (e.g. a whole shopping list).
+
+    Items are grouped by image; each distinct image is sent to the vision
+    model once per AI_BATCH_SIZE items, and images are processed concurrently.
+    Results come back in request order, each in the VerifyItemResponse shape.
+    """
+    _ensure_service()
+    deadline = _request_deadline(budget_ms)
+
+    try:
+        logger.info("Processing batch verification for %d items", len(request.items))
+
+        items_by_image: Dict[str, List[int]] = {}
+        for index, item in enumerate(request.items):
+            items_by_image.setdefault(item.image_base64 or request.image_base64, []).append(index)
+
+        image_responses = await asyncio.gather(*(
+            _verify_image_items(image_base64, [request.items[i].item_name for i in indices], deadline)
+            for image_base64, indices in items_by_image.items()
+        ))
+
+        response_by_item: Dict[int, VerifyItemResponse] = {}
+        for indices, responses in zip(items_by_image.values(), image_responses):
+            response_by_item.update(zip(indices, responses))
+
+        return BatchVerifyResponse(results=[response_by_item[i] for i in range(len(request.items))])
+    except CircuitOpenError as exc:
+        logger.warning("Batch verification failed: %s", exc)
+        raise _circuit_open(exc) from exc
+    except DeadlineExceeded as exc:
+        logger.warning("Batch verification failed: %s", exc)
+        raise _deadline_exceeded() from exc
+    except ValueError as exc:
+        logger.error("Batch verification failed: %s", exc)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Greška pri obradi slike: {str(exc)}",
+        ) from exc
+    except Exception as exc:
+        logger.error("Unexpected error during batch verification: %s", exc)
+        raise HTTPException(
+            status_code=500,
+            detail="Interna greška servera. Molimo pokušajte ponovo.",
+        ) from exc
+
+
 if __name__ == "__main__":
     import uvicorn
 
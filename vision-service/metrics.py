@@ -0,0 +1,134 @@
+"""
+Metrics Module.
+Prometheus metrics, served on GET /metrics.
+
+Latencies are histograms observed where the work happens. Counters the service
+already keeps for /health (result cache, OpenAI pool, circuit breaker, image
+preparation) are not counted a second time: a collector reads them from the
+same stats at scrape time.
+"""
+
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+# Decoding, resizing and re-encoding an upload takes milliseconds
+STAGE_BUCKETS = (0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Whole requests and model calls take up to the request budget
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+REQUEST_SECONDS = Histogram(
+    "request_duration_seconds", "Time to answer an HTTP request",
+    ["endpoint", "status"], buckets=REQUEST_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("requests_in_flight", "HTTP requests being answered")
+
+IMAGE_PREPARE_SECONDS = Histogram(
+    "image_prepare_seconds", "Time to decode, resize and re-encode an image for the model",
+    ["detail"], buckets=STAGE_BUCKETS,
+)
+IMAGE_SHARPNESS = Histogram(
+    "image_sharpness", "Quality gate sharpness score (variance of the Laplacian) per image",
+    buckets=(5, 10, 20, 40, 80, 160, 320, 640, 1280, 2560, 5120),
+)
+IMAGE_BRIGHTNESS = Histogram(
+    "image_brightness", "Quality gate mean brightness (0-255) per image",
+    buckets=(25, 50, 75, 100, 125, 150, 175, 200, 225, 235, 245),
+)
+QUALITY_REJECTIONS = Counter(
+    "quality_rejections_total", "Images rejected by the quality gate before the model call",
+    ["reason"],
+)
+
+AI_CALL_SECONDS = Histogram(
+    "ai_call_seconds", "Time per model call, retries and hedges included",
+    ["kind", "outcome"], buckets=REQUEST_BUCKETS,
+)
+AI_BATCH_ITEM_RETRIES = Counter(
+    "ai_batch_item_retries_total", "Items missing from a batch answer and asked again alone",
+)
+
+
+class StatsCollector(Collector):
+    """
+    Exports the /health counters. read_stats returns the same dicts as
+    /health ("cache", "openai", "images"), None for components that are off
+    or not started yet.
+    """
+
+    def __init__(self) -> None:
+        self.read_stats: Optional[Callable[[], dict]] = None
+
+    def collect(self) -> Iterator[Metric]:
+        if self.read_stats is None:
+            return
+        stats = self.read_stats()
+
+        cache = stats.get("cache")
+        if cache:
+            yield GaugeMetricFamily("cache_entries", "Entries in the result cache", value=cache["entries"])
+            lookups = CounterMetricFamily(
+                "cache_lookups", "Result cache lookups", labels=["namespace", "outcome"],
+            )
+            for namespace, counters in cache["counters"].items():
+                lookups.add_metric([namespace, "hit"], counters["hits"])
+                lookups.add_metric([namespace, "miss"], counters["misses"])
+            yield lookups
+
+        images = stats.get("images")
+        if images:
+            sizes = CounterMetricFamily(
+                "image_bytes", "Image bytes received and sent to the model", labels=["direction"],
+            )
+            sizes.add_metric(["received"], images["bytes_in"])
+            sizes.add_metric(["sent"], images["bytes_sent"])
+            yield sizes
+
+        pool = stats.get("openai")
+        if pool:
+            yield GaugeMetricFamily("ai_calls_in_flight", "Model calls in progress", value=pool["in_flight"])
+            yield GaugeMetricFamily(
+                "ai_calls_queued", "Model calls waiting for a concurrency slot", value=pool["queued"],
+            )
+            for name, description in (
+                ("calls", "Model calls answered"),
+                ("retries", "Model call retries"),
+                ("failures", "Model calls that failed after all retries"),
+                ("queue_timeouts", "Model calls that gave up waiting for a slot"),
+                ("hedges", "Hedged duplicate model calls"),
+                ("hedge_wins", "Hedged calls that answered first"),
+                ("deadline_timeouts", "Model calls cut off by the request budget"),
+            ):
+                yield CounterMetricFamily(f"ai_{name}", description, value=pool[name])
+
+            circuit = pool.get("circuit")
+            if circuit:
+                state = GaugeMetricFamily("ai_circuit_state", "Circuit breaker state", labels=["state"])
+                for name in CIRCUIT_STATES:
+                    state.add_metric([name], 1 if circuit["state"] == name else 0)
+                yield state
+                yield CounterMetricFamily(
+                    "ai_circuit_opened", "Times the circuit opened", value=circuit["times_opened"],
+                )
+                yield CounterMetricFamily(
+                    "ai_short_circuited", "Requests refused while the circuit was open",
+                    value=circuit["short_circuited"],
+                )
+
+
+_stats_collector = StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def register_stats(read_stats: Callable[[], dict]) -> None:
+    """Set the function that returns the service's current stats."""
+    _stats_collector.read_stats = read_stats
+
+
+def render() -> bytes:
+    """All metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY)
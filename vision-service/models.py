@@ -3,9 +3,9 @@ Pydantic models for request/response validation.
 Ensures type safety and clear API contracts.
 """
 
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class VerifyItemRequest(BaseModel):
@@ -63,6 +63,74 @@ class VerifyItemResponse(BaseModel):
     )
 
 
+class BatchVerifyItem(BaseModel):
+    """
+    One item check within a batch request.
+
+    Attributes:
+        item_name: The shopping list item name
+        image_base64: Image for this item; omitted to use the batch's shared image
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    item_name: str = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        alias="itemName",
+        validation_alias="item_name",
+        description="Shopping item name from the list",
+    )
+    image_base64: Optional[str] = Field(
+        None,
+        min_length=100,
+        alias="imageBase64",
+        validation_alias="image_base64",
+        description="Base64-encoded image of the product for this item",
+    )
+
+
+class BatchVerifyRequest(BaseModel):
+    """
+    Request model for batch verification.
+
+    Either every item carries its own image, or a single shared image is
+    checked against all item names (or a mix of both).
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    items: List[BatchVerifyItem] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Item checks to run",
+    )
+    image_base64: Optional[str] = Field(
+        None,
+        min_length=100,
+        alias="imageBase64",
+        validation_alias="image_base64",
+        description="Shared base64 image for items without their own image",
+    )
+
+    @model_validator(mode="after")
+    def check_images(self) -> "BatchVerifyRequest":
+        if self.image_base64 is None and any(item.image_base64 is None for item in self.items):
+            raise ValueError("Every item needs image_base64 unless a shared image_base64 is given")
+        return self
+
+
+class BatchVerifyResponse(BaseModel):
+    """
+    Response model for batch verification.
+    Results are in the same order as the request items.
+    """
+
+    results: List[VerifyItemResponse]
+
+
 class AIVerificationResult(BaseModel):
     """
     Internal model for AI verification results.
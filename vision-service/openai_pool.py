@@ -0,0 +1,274 @@
+"""
+OpenAI Client Pool Module.
+One AsyncOpenAI client per process on a shared, keep-alive httpx pool.
+
+- Per-call timeouts (connect and total) instead of the SDK's 10 minute default
+- A semaphore caps in-flight model calls; callers queue for a bounded time
+- 429, 5xx and connection errors are retried with jittered exponential backoff
+  (Retry-After is honoured); timeouts are not retried
+- A circuit breaker (circuit_breaker.py) fails calls fast while OpenAI is down
+- create_within() bounds a call by the request's remaining budget and sends one
+  hedged duplicate when the first attempt is slower than the recent p95
+- Pool, queue and circuit counters for /health
+- AI_BACKEND=local sends the calls to the offline stand-in (ocr-service/fake_openai.py)
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from circuit_breaker import CLOSED, CircuitBreaker
+from config import Settings
+from deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single backoff sleep
+MAX_RETRY_DELAY_SECONDS = 8.0
+
+# Successful call latencies kept for the hedge delay, and the minimum before hedging
+LATENCY_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+class ModelCallPool:
+    """
+    Shared client plus admission control for model calls.
+    Counters are only touched from the event loop, so they need no lock.
+    """
+
+    def __init__(self, settings: Settings):
+        self.max_concurrency = max(1, settings.openai_max_concurrency)
+        self.max_retries = max(0, settings.openai_max_retries)
+        self.retry_base_seconds = settings.openai_retry_base_seconds
+        self.queue_timeout_seconds = settings.openai_queue_timeout_seconds
+        self.hedge_enabled = settings.openai_hedge_enabled
+        self.hedge_min_seconds = settings.openai_hedge_min_seconds
+
+        self.limits = httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_connections,
+            keepalive_expiry=settings.openai_keepalive_seconds,
+        )
+        self.timeout = httpx.Timeout(
+            settings.openai_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+        )
+        self._http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        local = settings.ai_backend == "local"
+        self.client = AsyncOpenAI(
+            # The local stand-in accepts any key
+            api_key=settings.openai_api_key or ("local" if local else ""),
+            base_url=settings.ai_local_base_url if local else None,
+            http_client=self._http_client,
+            timeout=self.timeout,
+            max_retries=0,  # retried here, with jitter and admission control
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.breaker: Optional[CircuitBreaker] = (
+            CircuitBreaker.from_settings(settings) if settings.circuit_breaker_enabled else None
+        )
+
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.queue_timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_timeouts = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    async def create(self, **kwargs: Any) -> Any:
+        """
+        chat.completions.create with queueing and retries.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            TimeoutError: If no call slot frees up within the queue timeout
+            openai.APIError: If the call still fails after retries
+        """
+        if self.breaker is not None:
+            self.breaker.check()
+
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout_seconds)
+        except asyncio.TimeoutError as exc:
+            self.queue_timeouts += 1
+            raise TimeoutError(
+                f"No model call slot free after {self.queue_timeout_seconds:.0f}s "
+                f"({self.max_concurrency} in flight)"
+            ) from exc
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            return await self._create_with_retries(kwargs)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def create_within(self, timeout: float, **kwargs: Any) -> Any:
+        """
+        create() that gives up when the caller's budget runs out.
+
+        If the first call has not answered after the hedge delay (recent p95
+        latency) and there is a free call slot, an identical second call is sent
+        and whichever answers first wins; the other is cancelled.
+
+        Raises:
+            DeadlineExceeded: If no call answered within timeout
+            CircuitOpenError, TimeoutError, openai.APIError: As create()
+        """
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self.create(**kwargs))
+        tasks = {primary}
+        hedge_delay = self.hedge_delay()
+        error: Optional[BaseException] = None
+
+        try:
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done and self._can_hedge():
+                    self.hedges += 1
+                    logger.info("Model call slower than %.2fs, sending a hedged request", hedge_delay)
+                    tasks.add(asyncio.ensure_future(self.create(**kwargs)))
+
+            while tasks:
+                remaining = timeout - (time.monotonic() - started)
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(0.0, remaining), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.deadline_timeouts += 1
+                    raise DeadlineExceeded("AI verification", timeout)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Recent p95 call latency (at least OPENAI_HEDGE_MIN_SECONDS), None until known."""
+        if not self.hedge_enabled or len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))]
+        return max(self.hedge_min_seconds, p95)
+
+    def _can_hedge(self) -> bool:
+        """Hedge only with spare capacity and a healthy model, never into a queue."""
+        if self.in_flight + self.queued >= self.max_concurrency:
+            return False
+        return self.breaker is None or self.breaker.state == CLOSED
+
+    async def _create_with_retries(self, kwargs: dict) -> Any:
+        attempt = 0
+        while True:
+            is_probe = self.breaker.acquire() if self.breaker is not None else False
+            self.calls += 1
+            started = time.monotonic()
+            try:
+                result = await self.client.chat.completions.create(**kwargs)
+            except APITimeoutError:
+                self._record(is_probe, True, started)
+                self.failures += 1
+                raise
+            except (RateLimitError, InternalServerError, APIConnectionError) as exc:
+                self._record(is_probe, True, started)
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self._retry_delay(attempt, exc)
+                attempt += 1
+                self.retries += 1
+                logger.warning(
+                    "Model call failed (%s), retry %d/%d in %.2fs",
+                    type(exc).__name__,
+                    attempt,
+                    self.max_retries,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+            except Exception:
+                # A bad request says nothing about model health
+                self._release(is_probe)
+                self.failures += 1
+                raise
+            except asyncio.CancelledError:
+                # Abandoned by a deadline or a faster hedge; only slowness is a verdict
+                self._abandon(is_probe, started)
+                raise
+            else:
+                self._record(is_probe, False, started)
+                self._latencies.append(time.monotonic() - started)
+                return result
+
+    def _record(self, is_probe: bool, failed: bool, started: float) -> None:
+        if self.breaker is not None:
+            self.breaker.record(is_probe, failed, time.monotonic() - started)
+
+    def _release(self, is_probe: bool) -> None:
+        if self.breaker is not None:
+            self.breaker.release(is_probe)
+
+    def _abandon(self, is_probe: bool, started: float) -> None:
+        if self.breaker is None:
+            return
+        duration = time.monotonic() - started
+        if duration >= self.breaker.slow_call_seconds:
+            self.breaker.record(is_probe, True, duration)
+        else:
+            self.breaker.release(is_probe)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, at least the server's Retry-After."""
+        delay = random.uniform(0.0, self.retry_base_seconds * (2 ** attempt))
+
+        response: Optional[httpx.Response] = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+
+        return min(delay, MAX_RETRY_DELAY_SECONDS)
+
+    def stats(self) -> dict:
+        hedge_delay = self.hedge_delay()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_connections": self.limits.max_connections,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "queue_timeouts": self.queue_timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_seconds": round(hedge_delay, 3) if hedge_delay is not None else None,
+            "deadline_timeouts": self.deadline_timeouts,
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+        }
+
+    async def close(self) -> None:
+        await self._http_client.aclose()
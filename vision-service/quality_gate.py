@@ -0,0 +1,144 @@
+"""
+Image Quality Gate Module.
+Rejects photos the vision model cannot judge before the paid model call is
+made, and tells the user what to fix when retaking the photo.
+
+All measurements are numpy on a small grayscale copy and take a few
+milliseconds:
+- resolution: shorter side of the decoded image
+- exposure: contrast between the text and the background, the spread between
+  the darkest and the brightest pixels of a TILE x TILE tile. A white tag
+  filling the frame is mostly blown-out white and still perfectly readable;
+  what makes a photo unreadable is text that is no darker than its
+  background, in a dark photo, a washed-out one or under glare. Mean
+  brightness only tells the two apart.
+- sharpness: variance of the Laplacian per TILE x TILE tile.
+
+Both scores are taken from the best tiles (TOP_TILES), not the whole frame:
+small text covers a handful of tiles, and the rest of a sharp, well exposed
+photo is plain label, shelf or wall with neither detail nor contrast.
+
+Checks run in that order; a dark or washed-out photo is reported as such
+rather than as blurry.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from config import Settings
+
+# Longest side of the copy sharpness and exposure are measured on; fixed, so
+# the sharpness score does not depend on the upload resolution
+WORK_SIDE = 512
+
+# Tile size for the local scores; a score is that of the TOP_TILES-th best
+# tile, so one hot pixel or lamp reflection does not pass a photo on its own
+TILE = 32
+TOP_TILES = 2
+
+# Percentiles of a tile taken as its black (text) and white (background)
+# level; a text stroke covers well over 1% of a tile it crosses
+BLACK_PERCENTILE = 1
+WHITE_PERCENTILE = 99
+
+RETAKE_MESSAGES = {
+    "resolution": (
+        "Slika je premale rezolucije. Molimo slikajte proizvod izbliza ili u većoj rezoluciji."
+    ),
+    "dark": "Slika je pretamna. Molimo slikajte proizvod ponovo uz više svjetla.",
+    "bright": (
+        "Slika je presvijetla ili ima odsjaj. Molimo slikajte proizvod ponovo "
+        "bez direktnog svjetla ili blica."
+    ),
+    "blurry": (
+        "Slika je mutna. Molimo držite telefon mirno, sačekajte da se izoštri "
+        "i slikajte proizvod ponovo."
+    ),
+}
+
+
+@dataclass
+class QualityReport:
+    """Scores of one image, and the reason it was rejected (None if it passed)."""
+
+    width: int
+    height: int
+    sharpness: float
+    brightness: float
+    contrast: float
+    issue: Optional[str] = None
+
+    @property
+    def message(self) -> Optional[str]:
+        """Retake message for the user, None if the image passed."""
+        return RETAKE_MESSAGES.get(self.issue) if self.issue else None
+
+
+def _tiles(pixels: np.ndarray) -> np.ndarray:
+    """TILE x TILE tiles as rows of pixels (the whole array if it is smaller)."""
+    rows, cols = pixels.shape[0] // TILE, pixels.shape[1] // TILE
+    if rows == 0 or cols == 0:
+        return pixels.reshape(1, -1)
+    tiles = pixels[:rows * TILE, :cols * TILE].reshape(rows, TILE, cols, TILE)
+    return tiles.transpose(0, 2, 1, 3).reshape(rows * cols, TILE * TILE)
+
+
+def _top(scores: np.ndarray) -> float:
+    """The TOP_TILES-th highest tile score (the lowest one if there are fewer tiles)."""
+    rank = min(TOP_TILES, scores.size)
+    return float(np.partition(scores, scores.size - rank)[scores.size - rank])
+
+
+def _sharpness(pixels: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian in the sharpest tiles."""
+    if pixels.shape[0] < 3 or pixels.shape[1] < 3:
+        return 0.0
+    laplacian = (
+        pixels[:-2, 1:-1] + pixels[2:, 1:-1] + pixels[1:-1, :-2] + pixels[1:-1, 2:]
+        - 4 * pixels[1:-1, 1:-1]
+    )
+    return _top(_tiles(laplacian).var(axis=1))
+
+
+def _contrast(pixels: np.ndarray) -> float:
+    """Spread between the black and the white level in the most contrasted tiles."""
+    black, white = np.percentile(_tiles(pixels), [BLACK_PERCENTILE, WHITE_PERCENTILE], axis=1)
+    return _top(white - black)
+
+
+def measure_quality(gray: Image.Image) -> QualityReport:
+    """Resolution, exposure and sharpness scores of a grayscale image."""
+    scale = min(1.0, WORK_SIDE / max(gray.size))
+    if scale < 1.0:
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        small = gray.resize(size, Image.Resampling.BILINEAR)
+    else:
+        small = gray
+
+    pixels = np.asarray(small, dtype=np.float32)
+    return QualityReport(
+        width=gray.width,
+        height=gray.height,
+        sharpness=_sharpness(pixels),
+        brightness=float(pixels.mean()),
+        contrast=_contrast(pixels),
+    )
+
+
+def check_quality(gray: Image.Image, settings: Settings) -> QualityReport:
+    """
+    Measure an image against the QUALITY_* thresholds.
+    report.issue is "resolution", "dark", "bright" or "blurry" for a rejected
+    image, None for one worth reading.
+    """
+    report = measure_quality(gray)
+    if min(report.width, report.height) < settings.quality_min_side:
+        report.issue = "resolution"
+    elif report.contrast < settings.quality_min_contrast:
+        report.issue = "dark" if report.brightness < 128 else "bright"
+    elif report.sharpness < settings.quality_min_sharpness:
+        report.issue = "blurry"
+    return report
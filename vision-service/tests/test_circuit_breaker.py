@@ -0,0 +1,113 @@
+"""Circuit breaker state transitions."""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock) -> CircuitBreaker:
+    return CircuitBreaker(
+        window_size=10,
+        min_calls=4,
+        error_rate=0.5,
+        slow_call_seconds=5.0,
+        open_seconds=30.0,
+        half_open_probes=2,
+    )
+
+
+def _call(breaker: CircuitBreaker, failed: bool = False, duration: float = 0.1) -> None:
+    breaker.record(breaker.acquire(), failed, duration)
+
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(4):
+        _call(breaker, failed=True)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(3):
+        _call(breaker, failed=True)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_the_error_rate_and_fails_fast(breaker):
+    _call(breaker)
+    _call(breaker)
+    _call(breaker, failed=True)
+    assert breaker.state == CLOSED
+    _call(breaker, failed=True)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.short_circuited == 2
+
+
+def test_slow_successes_count_as_failures(breaker):
+    for _ in range(4):
+        _call(breaker, duration=6.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probes_close_the_circuit(breaker, clock):
+    _trip(breaker)
+    clock.now += 31.0
+
+    first, second = breaker.acquire(), breaker.acquire()
+    assert first and second
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record(first, failed=False, duration=0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.record(second, failed=False, duration=0.1)
+    assert breaker.state == CLOSED
+    assert breaker.failure_rate() == 0.0
+
+
+def test_failed_probe_opens_again(breaker, clock):
+    _trip(breaker)
+    clock.now += 31.0
+    breaker.record(breaker.acquire(), failed=True, duration=0.1)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_released_probe_frees_its_slot(breaker, clock):
+    _trip(breaker)
+    clock.now += 31.0
+    breaker.acquire()
+    breaker.acquire()
+    breaker.release(True)
+    assert breaker.acquire()
+
+
+def test_late_results_after_opening_are_ignored(breaker):
+    admitted = breaker.acquire()
+    _trip(breaker)
+    breaker.record(admitted, failed=True, duration=0.1)
+    assert breaker.stats()["window_calls"] == 4
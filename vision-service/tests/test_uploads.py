@@ -0,0 +1,87 @@
+"""Streaming multipart and raw image upload parsing."""
+
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from uploads import MAX_FIELD_BYTES, UploadError, get_item_name, read_image_upload
+
+MAX_BYTES = 64 * 1024
+IMAGE = os.urandom(40 * 1024)
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    try:
+        parsed = await read_image_upload(request, MAX_BYTES)
+        item_name = get_item_name(parsed)
+    except UploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+    return {
+        "item_name": item_name,
+        "content_type": parsed.content_type,
+        "sha256": hashlib.sha256(parsed.image).hexdigest(),
+    }
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+def test_multipart_image_and_field(client):
+    response = client.post(
+        "/upload",
+        files={"image": ("tag.jpg", IMAGE, "image/jpeg")},
+        data={"item_name": " mlijeko "},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "item_name": "mlijeko",
+        "content_type": "image/jpeg",
+        "sha256": hashlib.sha256(IMAGE).hexdigest(),
+    }
+
+
+def test_multipart_streamed_in_small_chunks(client):
+    boundary = "tagboundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"itemName\"\r\n\r\nkruh\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"a.png\"\r\n"
+        f"Content-Type: image/png\r\n\r\n"
+    ).encode() + IMAGE + f"\r\n--{boundary}--\r\n".encode()
+    chunks = (body[i:i + 1000] for i in range(0, len(body), 1000))
+    response = client.post(
+        "/upload", content=chunks, headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["item_name"] == "kruh"
+    assert response.json()["sha256"] == hashlib.sha256(IMAGE).hexdigest()
+
+
+def test_raw_image_body_with_query_item_name(client):
+    response = client.post(
+        "/upload", params={"item_name": "sir"}, content=IMAGE, headers={"content-type": "image/webp"}
+    )
+    assert response.status_code == 200
+    assert response.json()["content_type"] == "image/webp"
+    assert response.json()["sha256"] == hashlib.sha256(IMAGE).hexdigest()
+
+
+@pytest.mark.parametrize("request_kwargs, status_code", [
+    ({"files": {"image": ("big.jpg", os.urandom(MAX_BYTES + 1), "image/jpeg")}, "data": {"item_name": "x"}}, 413),
+    ({"content": os.urandom(MAX_BYTES + 1), "headers": {"content-type": "image/jpeg"}}, 413),
+    ({"files": [("image", ("a.jpg", IMAGE, "image/jpeg")), ("image", ("b.jpg", IMAGE, "image/jpeg"))]}, 400),
+    ({"data": {"item_name": "x" * (MAX_FIELD_BYTES + 1)}, "files": {"image": ("a.jpg", IMAGE)}}, 413),
+    ({"data": {"item_name": "mlijeko"}, "files": {"other": ("", b"")}}, 400),
+    ({"json": {"item_name": "mlijeko"}}, 415),
+    ({"files": {"image": ("a.jpg", IMAGE, "image/jpeg")}, "data": {"item_name": "  "}}, 422),
+])
+def test_rejected_uploads(client, request_kwargs, status_code):
+    assert client.post("/upload", **request_kwargs).status_code == status_code
@@ -0,0 +1,175 @@
+"""
+Upload Parsing Module.
+Reads binary image uploads straight from the request stream.
+
+Supported bodies:
+- multipart/form-data with an "image" file part and an "item_name" field
+- a raw image/* (or application/octet-stream) body, item name in the query string
+
+The image is collected as slices of the received chunks and joined once,
+so it exists as a single bytes buffer - no base64 inflation, no temp files.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Text fields are item names, not documents
+MAX_FIELD_BYTES = 4096
+
+
+class UploadError(ValueError):
+    """Upload could not be read. Carries the HTTP status to return."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class ImageUpload:
+    """Parsed upload: text fields plus the image bytes."""
+    fields: Dict[str, str] = field(default_factory=dict)
+    image: bytes = b""
+    content_type: Optional[str] = None
+
+
+class _MultipartCollector:
+    """
+    Callback target for the streaming multipart parser.
+    Image data is kept as memoryview slices of the incoming chunks.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.image_parts: List[memoryview] = []
+        self.image_size = 0
+        self.image_content_type: Optional[str] = None
+        self._seen_image = False
+
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._name = ""
+        self._is_image = False
+        self._value = bytearray()
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = params.get(b"name", b"").decode("utf-8", errors="replace")
+        self._is_image = self._name == "image" or b"filename" in params
+
+        if self._is_image:
+            if self._seen_image:
+                raise UploadError(400, "Dozvoljena je samo jedna slika po zahtjevu.")
+            self._seen_image = True
+            content_type = self._headers.get(b"content-type")
+            self.image_content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._is_image:
+            self.image_size += end - start
+            if self.image_size > self.max_bytes:
+                raise UploadError(413, "Slika je prevelika.")
+            self.image_parts.append(memoryview(data)[start:end])
+        else:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise UploadError(413, f"Polje '{self._name}' je predugo.")
+
+    def on_part_end(self) -> None:
+        if not self._is_image and self._name:
+            self.fields[self._name] = self._value.decode("utf-8", errors="replace")
+
+
+async def read_image_upload(request: Request, max_bytes: int) -> ImageUpload:
+    """
+    Stream an image upload from the request.
+
+    Raises:
+        UploadError: For unsupported content types, oversized or missing images
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    content_type = content_type.decode("latin-1").lower()
+
+    if content_type == "multipart/form-data":
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadError(400, "Nedostaje multipart boundary.")
+
+        collector = _MultipartCollector(max_bytes)
+        parser = MultipartParser(boundary, collector.callbacks())
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+
+        upload = ImageUpload(
+            fields=collector.fields,
+            image=b"".join(collector.image_parts),
+            content_type=collector.image_content_type,
+        )
+    elif content_type.startswith("image/") or content_type == "application/octet-stream":
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadError(413, "Slika je prevelika.")
+            chunks.append(chunk)
+
+        upload = ImageUpload(
+            fields=dict(request.query_params),
+            image=b"".join(chunks),
+            content_type=content_type,
+        )
+    else:
+        raise UploadError(
+            415,
+            "Nepodržan tip sadržaja. Koristite multipart/form-data ili image/*."
+        )
+
+    if not upload.image:
+        raise UploadError(400, "Slika nije poslana.")
+
+    return upload
+
+
+def get_item_name(upload: ImageUpload) -> str:
+    """
+    Item name from the upload fields (snake_case or camelCase), validated
+    like VerifyItemRequest.item_name.
+    """
+    item_name = (upload.fields.get("item_name") or upload.fields.get("itemName") or "").strip()
+    if not 1 <= len(item_name) <= 200:
+        raise UploadError(422, "Naziv artikla mora imati između 1 i 200 znakova.")
+    return item_name